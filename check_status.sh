@@ -62,7 +62,7 @@ if [ -f "transfer_cache.db" ]; then
     
     # Klasör bazında
     echo "  Klasör bazında:"
-    sqlite3 transfer_cache.db "SELECT folder, COUNT(*) as count FROM transferred_messages GROUP BY folder ORDER BY count DESC LIMIT 10;" 2>/dev/null | while IFS='|' read folder count; do
+    sqlite3 transfer_cache.db "SELECT f.name, COUNT(*) AS count FROM transferred_messages t JOIN folders f USING(folder_id) GROUP BY f.name ORDER BY count DESC LIMIT 10;" 2>/dev/null | while IFS='|' read folder count; do
         echo "    - $folder: $count mesaj"
     done
 fi
@@ -0,0 +1,158 @@
+"""
+Adaptive Controller Module
+Adjusts worker count and batch size during a transfer from live measurements
+"""
+
+import logging
+import threading
+from typing import List, Optional
+
+from .utils import CircuitBreaker
+
+
+# Batches measured before the settings are adjusted
+ADJUST_WINDOW = 5
+# A window whose latency per message exceeds the best window by this factor
+# counts as overload
+LATENCY_FACTOR = 2.0
+# A window in which more than this share of messages failed counts as overload
+ERROR_RATE_LIMIT = 0.1
+
+
+class AdaptiveController:
+    """
+    AIMD controller for the number of workers and the batch size
+    Engines report every transferred batch with record_batch(). After
+    ADJUST_WINDOW batches the window is evaluated: if more than
+    ERROR_RATE_LIMIT of its messages failed, or the latency per message
+    rose to LATENCY_FACTOR times the best window so far, both settings are
+    halved; otherwise one worker and a tenth of the maximum batch size are
+    added. A throttled response on a watched server halves them at once.
+    The configured values are upper limits; the controller starts at half
+    of them. Thread-safe, so workers and parallel folders share one controller.
+    """
+    
+    def __init__(self, max_workers: int, max_batch_size: int,
+                 logger: Optional[logging.Logger] = None):
+        """
+        Initialize controller
+        
+        Args:
+            max_workers: Upper limit on parallel connection pairs per folder
+            max_batch_size: Upper limit on messages per batched FETCH and bulk APPEND
+            logger: Optional logger for setting changes
+        """
+        self.max_workers = max_workers
+        self.max_batch_size = max_batch_size
+        self.logger = logger or logging.getLogger(__name__)
+        self.workers = max((max_workers + 1) // 2, 1)
+        self.batch_size = max((max_batch_size + 1) // 2, 1)
+        self._batch_step = max(max_batch_size // 10, 1)
+        self._breakers: List[CircuitBreaker] = []
+        self._throttles = 0  # Throttled responses already acted upon
+        self._best_latency: Optional[float] = None  # Seconds per message
+        self._batches = 0
+        self._messages = 0
+        self._failed = 0
+        self._seconds = 0.0
+        self._lock = threading.Lock()
+    
+    def watch(self, breaker: CircuitBreaker) -> None:
+        """
+        Take throttled responses counted by a circuit breaker into account
+        Watching the same breaker again has no effect.
+        
+        Args:
+            breaker: Circuit breaker of a source or destination server
+        """
+        with self._lock:
+            if any(watched is breaker for watched in self._breakers):
+                return
+            self._breakers.append(breaker)
+            self._throttles += breaker.throttle_count
+    
+    def record_batch(self, messages: int, failed: int, seconds: float) -> None:
+        """
+        Report a transferred batch and adjust the settings when due
+        
+        Args:
+            messages: Messages in the batch
+            failed: Messages of the batch that could not be transferred
+            seconds: Time the batch took
+        """
+        if not messages:
+            return
+        
+        with self._lock:
+            self._batches += 1
+            self._messages += messages
+            self._failed += failed
+            self._seconds += seconds
+            
+            throttles = sum(breaker.throttle_count for breaker in self._breakers)
+            if throttles > self._throttles:
+                self._decrease(f"{throttles - self._throttles} throttled responses")
+                self._throttles = throttles
+            elif self._batches >= ADJUST_WINDOW:
+                self._evaluate()
+    
+    def describe(self) -> str:
+        """
+        Current settings for log messages
+        
+        Returns:
+            Text like "3 workers, batch size 40"
+        """
+        return f"{self.workers} workers, batch size {self.batch_size}"
+    
+    def _evaluate(self) -> None:
+        """Adjust the settings at the end of a measurement window"""
+        latency = self._seconds / self._messages
+        error_rate = self._failed / self._messages
+        
+        if error_rate > ERROR_RATE_LIMIT:
+            self._decrease(f"{error_rate:.0%} of messages failed")
+        elif self._best_latency and latency > self._best_latency * LATENCY_FACTOR:
+            self._decrease(
+                f"latency rose to {latency * 1000:.0f} ms per message "
+                f"from {self._best_latency * 1000:.0f} ms"
+            )
+        else:
+            if self._best_latency is None or latency < self._best_latency:
+                self._best_latency = latency
+            self._apply(min(self.workers + 1, self.max_workers),
+                        min(self.batch_size + self._batch_step, self.max_batch_size),
+                        "no throttling, errors or latency rise")
+    
+    def _decrease(self, reason: str) -> None:
+        """
+        Halve both settings
+        
+        Args:
+            reason: Cause for the log message
+        """
+        self._apply(max(self.workers // 2, 1), max(self.batch_size // 2, 1), reason)
+    
+    def _apply(self, workers: int, batch_size: int, reason: str) -> None:
+        """
+        Switch to new settings and start a new measurement window
+        
+        Args:
+            workers: New number of workers
+            batch_size: New batch size
+            reason: Cause for the log message
+        """
+        self._batches = 0
+        self._messages = 0
+        self._failed = 0
+        self._seconds = 0.0
+        
+        if workers == self.workers and batch_size == self.batch_size:
+            return
+        
+        self.logger.info(
+            f"Adaptive: workers {self.workers} -> {workers}, "
+            f"batch size {self.batch_size} -> {batch_size} ({reason})"
+        )
+        self.workers = workers
+        self.batch_size = batch_size
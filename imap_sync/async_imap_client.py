@@ -0,0 +1,749 @@
+"""
+Async IMAP Client Module
+asyncio implementation of the IMAP operations used for transfers
+"""
+import asyncio
+import re
+import ssl
+from typing import List, Tuple, Optional, Dict, Set
+
+from .imap_client import UID_SET_CHUNK, LITERAL_MINUS_MAX, _Literal
+from .utils import (
+    IMAPConnectionError, IMAPFolderError, IMAPFetchError, IMAPAppendError,
+    compress_uid_set
+)
+
+
+# Longest response line accepted from the server
+# UID SEARCH returns all UIDs of a folder on a single line
+STREAM_LIMIT = 16 * 1024 * 1024
+
+# Literal announcement at the end of a response line: {size} or ~{size}
+_LITERAL_RE = re.compile(rb'~?\{(\d+)\}\r\n$')
+
+
+class _Response:
+    """One server response with the literals embedded in it"""
+    
+    def __init__(self, text: bytes, literals: List[bytes]):
+        self.text = text
+        self.literals = literals
+
+
+class AsyncIMAPClient:
+    """
+    asyncio IMAP client with the same operations as IMAPClient
+    One instance holds one connection and runs one command at a time;
+    concurrency comes from running many clients in the same event loop.
+    """
+    
+    def __init__(self, host: str, username: str, password: str, port: int = 993):
+        """
+        Initialize async IMAP client with connection parameters
+        
+        Args:
+            host: IMAP server hostname
+            username: Account username
+            password: Account password
+            port: IMAP port (default: 993 for SSL)
+        """
+        self.host = host
+        self.username = username
+        self.password = password
+        self.port = port
+        self.capabilities: Set[str] = set()
+        self.selected_folder: Optional[str] = None
+        self.uidvalidity: Optional[int] = None  # UIDVALIDITY of the selected folder
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._tag_counter = 0
+    
+    async def connect(self) -> bool:
+        """
+        Establish SSL connection to IMAP server and log in
+        
+        Returns:
+            True if connection successful
+        
+        Raises:
+            IMAPConnectionError: If connection fails
+        """
+        try:
+            # Create SSL connection with certificate validation
+            self._reader, self._writer = await asyncio.open_connection(
+                self.host, self.port, ssl=ssl.create_default_context(), limit=STREAM_LIMIT
+            )
+            # Lock is created here so it belongs to the running event loop
+            self._lock = asyncio.Lock()
+            
+            greeting = await self._read_response()
+            if not greeting.text.startswith((b'* OK', b'* PREAUTH')):
+                raise IMAPConnectionError(
+                    f"Unexpected greeting from {self.host}:{self.port}: {greeting.text!r}"
+                )
+            
+            status, text, _ = await self._command(
+                'LOGIN', self._quote(self.username), self._quote(self.password)
+            )
+            
+            if status != 'OK':
+                raise IMAPConnectionError(
+                    f"Authentication failed for user '{self.username}' on {self.host}:{self.port}: {text}"
+                )
+            
+            # Servers often advertise more capabilities after authentication
+            await self._refresh_capabilities()
+            
+            return True
+        
+        except IMAPConnectionError:
+            await self._close_stream()
+            raise
+        except (OSError, asyncio.IncompleteReadError) as e:
+            await self._close_stream()
+            raise IMAPConnectionError(
+                f"Network error connecting to {self.host}:{self.port}: {str(e)}"
+            )
+        except Exception as e:
+            await self._close_stream()
+            raise IMAPConnectionError(
+                f"Unexpected error connecting to {self.host}:{self.port}: {str(e)}"
+            )
+    
+    def clone(self) -> 'AsyncIMAPClient':
+        """
+        Create a new, unconnected client for the same server and account
+        
+        Returns:
+            New AsyncIMAPClient instance
+        """
+        return AsyncIMAPClient(self.host, self.username, self.password, self.port)
+    
+    async def _refresh_capabilities(self) -> None:
+        """
+        Re-read server capabilities into self.capabilities
+        Failures leave the previous capability list in place
+        """
+        status, _, untagged = await self._command('CAPABILITY')
+        if status != 'OK':
+            return
+        
+        for response in untagged:
+            if response.text.upper().startswith(b'* CAPABILITY '):
+                self.capabilities = set(
+                    response.text[13:].decode('ascii', errors='ignore').upper().split()
+                )
+    
+    def has_capability(self, capability: str) -> bool:
+        """
+        Check whether the connected server advertises a capability
+        
+        Args:
+            capability: Capability name (e.g. 'LITERAL+')
+        
+        Returns:
+            True if capability is advertised
+        """
+        return capability.upper() in self.capabilities
+    
+    async def disconnect(self) -> None:
+        """
+        Close IMAP connection properly
+        Errors during disconnect are silently ignored to ensure cleanup completes
+        """
+        if self._writer:
+            try:
+                await asyncio.wait_for(self._command('LOGOUT'), timeout=10)
+            except Exception:
+                # Ignore errors during disconnect - connection may already be closed
+                pass
+            finally:
+                await self._close_stream()
+    
+    async def _close_stream(self) -> None:
+        """Close the underlying stream without talking to the server"""
+        writer = self._writer
+        self._reader = None
+        self._writer = None
+        self.selected_folder = None
+        self.uidvalidity = None
+        
+        if writer:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except Exception:
+                pass
+    
+    async def select_folder(self, folder: str) -> int:
+        """
+        Select IMAP folder and return message count
+        
+        Args:
+            folder: Folder name to select
+        
+        Returns:
+            Number of messages in folder
+        
+        Raises:
+            IMAPFolderError: If folder selection fails
+        """
+        if not self._writer:
+            raise IMAPFolderError("Not connected to IMAP server")
+        
+        try:
+            status, text, untagged = await self._command(
+                'SELECT', self._quote_mailbox(folder).encode('utf-8')
+            )
+            
+            if status != 'OK':
+                raise IMAPFolderError(
+                    f"Failed to select folder '{folder}': {text}"
+                )
+            
+            message_count = 0
+            uidvalidity = None
+            for response in untagged:
+                match = re.match(rb'\* (\d+) EXISTS', response.text, re.IGNORECASE)
+                if match:
+                    message_count = int(match.group(1))
+                match = re.match(rb'\* OK \[UIDVALIDITY (\d+)\]', response.text, re.IGNORECASE)
+                if match:
+                    uidvalidity = int(match.group(1))
+            
+            self.selected_folder = folder
+            self.uidvalidity = uidvalidity
+            return message_count
+        
+        except IMAPFolderError:
+            raise
+        except (OSError, asyncio.IncompleteReadError) as e:
+            raise IMAPFolderError(
+                f"Network error selecting folder '{folder}': {str(e)}"
+            )
+    
+    async def list_folders(self) -> List[str]:
+        """
+        List all available folders on the server
+        
+        Returns:
+            List of folder names
+        """
+        if not self._writer:
+            raise IMAPFolderError("Not connected to IMAP server")
+        
+        try:
+            status, _, untagged = await self._command('LIST', b'""', b'*')
+            if status != 'OK':
+                return []
+            
+            folder_list = []
+            for response in untagged:
+                folder_name = self._parse_list_response(response)
+                
+                # Skip empty folder names or just separators
+                if folder_name and folder_name not in ['|', '/', '.', '..']:
+                    folder_list.append(folder_name)
+            
+            return folder_list
+        
+        except Exception as e:
+            raise IMAPFolderError(f"Error listing folders: {str(e)}")
+    
+    def _parse_list_response(self, response: _Response) -> Optional[str]:
+        """
+        Extract the folder name from an untagged LIST response
+        
+        Args:
+            response: Untagged response
+        
+        Returns:
+            Folder name, or None if the response is not a LIST response
+        """
+        # Format: * LIST (flags) "delimiter" name
+        match = re.match(rb'\* LIST \([^)]*\) (?:NIL|"(?:[^"\\]|\\.)*") ?(.*)$',
+                         response.text, re.IGNORECASE | re.DOTALL)
+        if not match:
+            return None
+        
+        if response.literals:
+            name = response.literals[-1]
+        else:
+            name = match.group(1).strip()
+            if name.startswith(b'"') and name.endswith(b'"'):
+                name = name[1:-1].replace(b'\\"', b'"').replace(b'\\\\', b'\\')
+        
+        # Same decoding as IMAPClient.list_folders, so cache keys match
+        return name.decode('utf-7').strip()
+    
+    async def folder_exists(self, folder: str) -> bool:
+        """
+        Check if folder exists on server
+        
+        Args:
+            folder: Folder name to check
+        
+        Returns:
+            True if folder exists
+        """
+        if not self._writer:
+            raise IMAPFolderError("Not connected to IMAP server")
+        
+        try:
+            status, _, untagged = await self._command(
+                'LIST', b'""', self._quote_mailbox(folder).encode('utf-8')
+            )
+            
+            if status != 'OK':
+                return False
+            
+            return any(self._parse_list_response(response) is not None for response in untagged)
+        
+        except Exception:
+            return False
+    
+    async def create_folder(self, folder: str) -> bool:
+        """
+        Create folder if it doesn't exist
+        
+        Args:
+            folder: Folder name to create
+        
+        Returns:
+            True if created or already exists
+        
+        Raises:
+            IMAPFolderError: If folder creation fails
+        """
+        if not self._writer:
+            raise IMAPFolderError("Not connected to IMAP server")
+        
+        # Check if folder already exists
+        if await self.folder_exists(folder):
+            return True
+        
+        try:
+            status, text, _ = await self._command(
+                'CREATE', self._quote_mailbox(folder).encode('utf-8')
+            )
+            
+            if status != 'OK':
+                raise IMAPFolderError(
+                    f"Failed to create folder '{folder}': {text}"
+                )
+            
+            return True
+        
+        except (OSError, asyncio.IncompleteReadError) as e:
+            raise IMAPFolderError(
+                f"Network error creating folder '{folder}': {str(e)}"
+            )
+    
+    async def get_uid_list(self, start_uid: int = 1) -> List[str]:
+        """
+        Fetch UIDs from currently selected folder
+        
+        Args:
+            start_uid: Lowest UID to return; above 1 only UID start_uid:* is searched
+        
+        Returns:
+            List of UID strings
+        
+        Raises:
+            IMAPFetchError: If UID retrieval fails
+        """
+        if not self._writer:
+            raise IMAPFetchError("Not connected to IMAP server")
+        
+        try:
+            if start_uid > 1:
+                status, text, untagged = await self._command('UID SEARCH', b'UID %d:*' % start_uid)
+            else:
+                status, text, untagged = await self._command('UID SEARCH', b'ALL')
+            
+            if status != 'OK':
+                raise IMAPFetchError(
+                    f"IMAP search command failed: {text}"
+                )
+            
+            uids = []
+            for response in untagged:
+                if response.text.upper().startswith(b'* SEARCH'):
+                    uids.extend(response.text[8:].decode('utf-8').split())
+            
+            # 'n:*' always matches the highest UID, even if it is below n
+            if start_uid > 1:
+                uids = [uid for uid in uids if int(uid) >= start_uid]
+            
+            return uids
+        
+        except IMAPFetchError:
+            raise
+        except (OSError, asyncio.IncompleteReadError) as e:
+            raise IMAPFetchError(
+                f"Network error retrieving UIDs: {str(e)}"
+            )
+        except Exception as e:
+            raise IMAPFetchError(
+                f"Unexpected error retrieving UIDs: {str(e)}"
+            )
+    
+    async def fetch_message_sizes(self, uids: List[str]) -> Dict[str, int]:
+        """
+        Fetch RFC822.SIZE for a list of UIDs without downloading bodies
+        
+        Args:
+            uids: Message UIDs to query
+        
+        Returns:
+            Dictionary mapping UID string to message size in bytes
+        
+        Raises:
+            IMAPFetchError: If size retrieval fails
+        """
+        if not self._writer:
+            raise IMAPFetchError("Not connected to IMAP server")
+        
+        sizes = {}
+        
+        try:
+            for start in range(0, len(uids), UID_SET_CHUNK):
+                uid_set = compress_uid_set(uids[start:start + UID_SET_CHUNK])
+                status, text, untagged = await self._command(
+                    'UID FETCH', uid_set.encode('ascii'), b'(UID RFC822.SIZE)'
+                )
+                
+                if status != 'OK':
+                    raise IMAPFetchError(
+                        f"IMAP fetch command failed for message sizes: {text}"
+                    )
+                
+                for response in untagged:
+                    metadata = response.text.decode('utf-8', errors='ignore')
+                    uid_match = re.search(r'UID (\d+)', metadata)
+                    size_match = re.search(r'RFC822\.SIZE (\d+)', metadata)
+                    if uid_match and size_match:
+                        sizes[uid_match.group(1)] = int(size_match.group(1))
+            
+            return sizes
+        
+        except IMAPFetchError:
+            raise
+        except (OSError, asyncio.IncompleteReadError) as e:
+            raise IMAPFetchError(
+                f"Network error retrieving message sizes: {str(e)}"
+            )
+        except Exception as e:
+            raise IMAPFetchError(
+                f"Unexpected error retrieving message sizes: {str(e)}"
+            )
+    
+    async def fetch_messages(self, uids: List[str]) -> List[Tuple[str, bytes, str, List[str]]]:
+        """
+        Fetch several messages with a single UID FETCH command
+        
+        Args:
+            uids: Message UIDs to fetch in one round trip
+        
+        Returns:
+            List of (uid, message_data, date, flags) tuples
+            UIDs missing from the server response are left out
+        
+        Raises:
+            IMAPFetchError: If the batch fetch fails
+        """
+        if not self._writer:
+            raise IMAPFetchError("Not connected to IMAP server")
+        
+        if not uids:
+            return []
+        
+        uid_set = compress_uid_set(uids)
+        
+        try:
+            status, text, untagged = await self._command(
+                'UID FETCH', uid_set.encode('ascii'), b'(UID RFC822 INTERNALDATE FLAGS)'
+            )
+        except (OSError, asyncio.IncompleteReadError) as e:
+            raise IMAPFetchError(
+                f"Network error fetching messages {uid_set}: {str(e)}"
+            )
+        except Exception as e:
+            raise IMAPFetchError(
+                f"Unexpected error fetching messages {uid_set}: {str(e)}"
+            )
+        
+        if status != 'OK':
+            raise IMAPFetchError(
+                f"IMAP fetch command failed for messages {uid_set}: {text}"
+            )
+        
+        wanted = set(uids)
+        messages = []
+        
+        for response in untagged:
+            if not response.literals:
+                continue
+            
+            metadata = response.text.decode('utf-8', errors='ignore')
+            uid_match = re.search(r'UID (\d+)', metadata)
+            if not uid_match or uid_match.group(1) not in wanted:
+                continue
+            
+            # Extract INTERNALDATE
+            date_match = re.search(r'INTERNALDATE "([^"]+)"', metadata)
+            date = date_match.group(1) if date_match else ''
+            
+            # Extract FLAGS
+            flags_match = re.search(r'FLAGS \(([^)]*)\)', metadata)
+            flags_str = flags_match.group(1) if flags_match else ''
+            flags = [f.strip() for f in flags_str.split()] if flags_str else []
+            
+            messages.append((uid_match.group(1), response.literals[0], date, flags))
+        
+        return messages
+    
+    async def fetch_message(self, uid: str) -> Tuple[bytes, str, List[str]]:
+        """
+        Fetch single message by UID
+        
+        Args:
+            uid: Message UID to fetch
+        
+        Returns:
+            Tuple of (message_data, date, flags)
+        
+        Raises:
+            IMAPFetchError: If message fetch fails
+        """
+        messages = await self.fetch_messages([uid])
+        
+        if not messages or not messages[0][1]:
+            raise IMAPFetchError(
+                f"Empty response when fetching message UID {uid} - message may not exist"
+            )
+        
+        _, message_data, date, flags = messages[0]
+        return (message_data, date, flags)
+    
+    async def append_message(self, folder: str, message_data: bytes,
+                             date: str, flags: List[str]) -> str:
+        """
+        Append message to destination folder with original metadata
+        
+        Args:
+            folder: Destination folder name
+            message_data: RFC822 message data as bytes
+            date: Original internal date string
+            flags: List of message flags
+        
+        Returns:
+            New UID assigned by destination server ('' if not reported)
+        
+        Raises:
+            IMAPAppendError: If message append fails
+        """
+        if not self._writer:
+            raise IMAPAppendError("Not connected to IMAP server")
+        
+        if not message_data:
+            raise IMAPAppendError("Cannot append empty message data")
+        
+        try:
+            parts = [self._quote_mailbox(folder).encode('utf-8')]
+            parts.extend(self._append_arguments(flags, date))
+            parts.append(_Literal(message_data))
+            
+            status, text, _ = await self._command('APPEND', *parts)
+        except (OSError, asyncio.IncompleteReadError) as e:
+            raise IMAPAppendError(
+                f"Network error appending message to folder '{folder}': {str(e)}"
+            )
+        except Exception as e:
+            raise IMAPAppendError(
+                f"Unexpected error appending message to folder '{folder}': {str(e)}"
+            )
+        
+        if status != 'OK':
+            raise IMAPAppendError(
+                f"IMAP append command failed for folder '{folder}': {text}"
+            )
+        
+        # Response format: [APPENDUID <uidvalidity> <uid>] ...
+        uid_match = re.search(r'APPENDUID \d+ (\d+)', text)
+        return uid_match.group(1) if uid_match else ''
+    
+    def _can_send_non_sync(self, size: int) -> bool:
+        """
+        Check whether a literal of the given size may be non-synchronizing
+        
+        Args:
+            size: Literal size in bytes
+        
+        Returns:
+            True if LITERAL+ is advertised, or LITERAL- and size is small enough
+        """
+        if self.has_capability('LITERAL+'):
+            return True
+        return self.has_capability('LITERAL-') and size <= LITERAL_MINUS_MAX
+    
+    def _append_arguments(self, flags: List[str], date: str) -> List[bytes]:
+        """
+        Build the optional flag list and date arguments of an APPEND message
+        
+        Args:
+            flags: List of message flags
+            date: Internal date string (unquoted or quoted)
+        
+        Returns:
+            List of argument byte strings
+        """
+        arguments = []
+        
+        # \Recent is session state and may not be set by APPEND
+        flags = [flag for flag in flags if flag.lower() != '\\recent']
+        if flags:
+            arguments.append(f"({' '.join(flags)})".encode('utf-8'))
+        
+        if date:
+            arguments.append((date if date.startswith('"') else f'"{date}"').encode('utf-8'))
+        
+        return arguments
+    
+    def _quote_mailbox(self, folder: str) -> str:
+        """
+        Quote folder name if it contains spaces or special characters
+        
+        Args:
+            folder: Folder name
+        
+        Returns:
+            Folder name ready to be used as a command argument
+        """
+        if ' ' in folder or any(c in folder for c in ['&', '|', '/']):
+            return f'"{folder}"'
+        return folder
+    
+    def _quote(self, value: str):
+        """
+        Encode a string argument as a quoted string, or a literal if not ASCII
+        
+        Args:
+            value: Argument value
+        
+        Returns:
+            Quoted argument bytes or _Literal instance
+        """
+        try:
+            encoded = value.encode('ascii')
+        except UnicodeEncodeError:
+            return _Literal(value.encode('utf-8'))
+        
+        if b'\r' in encoded or b'\n' in encoded:
+            return _Literal(encoded)
+        return b'"' + encoded.replace(b'\\', b'\\\\').replace(b'"', b'\\"') + b'"'
+    
+    def _new_tag(self) -> bytes:
+        """Return the next command tag"""
+        self._tag_counter += 1
+        return b'A%04d' % self._tag_counter
+    
+    async def _read_response(self) -> _Response:
+        """
+        Read one response line together with the literals it announces
+        
+        Returns:
+            Response with line text (literal markers kept) and literal data
+        
+        Raises:
+            ConnectionResetError: If the server closed the connection
+        """
+        text = b''
+        literals = []
+        
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                raise ConnectionResetError("Connection closed by server")
+            
+            text += line
+            match = _LITERAL_RE.search(line)
+            if not match:
+                break
+            literals.append(await self._reader.readexactly(int(match.group(1))))
+        
+        return _Response(text.rstrip(b'\r\n'), literals)
+    
+    async def _command(self, name: str, *parts) -> Tuple[str, str, List[_Response]]:
+        """
+        Send a command and collect its untagged responses and tagged result
+        Literals are sent non-synchronizing when the server advertises
+        LITERAL+ or LITERAL-, otherwise after the server continuation.
+        
+        Args:
+            name: Command name (e.g. 'UID FETCH')
+            *parts: Arguments as bytes or _Literal instances
+        
+        Returns:
+            Tuple of (status, text, untagged)
+            - status: 'OK', 'NO' or 'BAD'
+            - text: Text of the tagged response after the status
+            - untagged: Untagged responses received while the command ran
+        """
+        async with self._lock:
+            tag = self._new_tag()
+            untagged = []
+            tagged = None
+            buffer = tag + b' ' + name.encode('ascii')
+            
+            for part in parts:
+                if not isinstance(part, _Literal):
+                    buffer += b' ' + part
+                    continue
+                
+                size = len(part.data)
+                if self._can_send_non_sync(size):
+                    # LITERAL+ / LITERAL-: send data without waiting for '+'
+                    self._writer.write(buffer + b' {%d+}\r\n' % size)
+                    self._writer.write(part.data)
+                    await self._writer.drain()
+                    buffer = b''
+                    continue
+                
+                self._writer.write(buffer + b' {%d}\r\n' % size)
+                await self._writer.drain()
+                buffer = b''
+                
+                # Wait for continuation; a tagged response means rejection
+                while True:
+                    response = await self._read_response()
+                    if response.text.startswith(b'+'):
+                        break
+                    if response.text.startswith(tag + b' '):
+                        tagged = response
+                        break
+                    untagged.append(response)
+                
+                if tagged is not None:
+                    break
+                
+                self._writer.write(part.data)
+            
+            if tagged is None:
+                self._writer.write(buffer + b'\r\n')
+                await self._writer.drain()
+            
+            while tagged is None:
+                response = await self._read_response()
+                if response.text.startswith(tag + b' '):
+                    tagged = response
+                elif not response.text.startswith(b'+'):
+                    untagged.append(response)
+            
+            status, _, text = tagged.text[len(tag) + 1:].partition(b' ')
+            return (
+                status.decode('ascii', errors='ignore').upper(),
+                text.decode('utf-8', errors='ignore'),
+                untagged
+            )
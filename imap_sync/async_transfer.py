@@ -0,0 +1,544 @@
+"""
+Async Transfer Engine Module
+asyncio counterpart of TransferEngine, so one process can drive many sessions
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, List, Optional, Dict, Set, Tuple
+from tqdm import tqdm
+
+from .async_imap_client import AsyncIMAPClient
+from .cache import CacheManager
+from .config import TransferConfig
+from .transfer import TransferResult, sync_start_uid, advance_watermark
+from .utils import CircuitBreaker, RetryHandler, format_size, IMAPFetchError, IMAPAppendError
+
+
+class AsyncTransferEngine:
+    """
+    Transfer engine for one source/destination session pair on asyncio
+    While a batch is appended to the destination, the next batch is
+    already being fetched from the source. Cache writes are quick local
+    SQLite calls and run directly on the event loop. Engines over further
+    session pairs can share the batches of a folder, see transfer_folder().
+    """
+    
+    def __init__(self, source_client: AsyncIMAPClient, dest_client: AsyncIMAPClient,
+                 cache_manager: CacheManager, logger: logging.Logger,
+                 max_message_size: int = 52428800, retry_count: int = 3,
+                 retry_delay: int = 5, fetch_batch_size: int = 50,
+                 fetch_batch_bytes: int = 20971520, show_progress: bool = True,
+                 source_breaker: Optional[CircuitBreaker] = None,
+                 dest_breaker: Optional[CircuitBreaker] = None):
+        """
+        Initialize AsyncTransferEngine with dependencies
+        
+        Args:
+            source_client: Connected source client with the folder selected
+            dest_client: Connected destination client
+            cache_manager: Cache manager for duplicate detection
+            logger: Logger instance
+            max_message_size: Maximum message size in bytes (default: 50MB)
+            retry_count: Number of retry attempts for network errors
+            retry_delay: Initial delay between retries in seconds
+            fetch_batch_size: Maximum number of messages per batched FETCH
+            fetch_batch_bytes: Maximum total message bytes per batched FETCH (default: 20MB)
+            show_progress: Show a progress bar (disable when running many sessions)
+            source_breaker: Circuit breaker of the source server; pass the same
+                breaker to engines talking to the same server so that they
+                back off together (default: one per engine)
+            dest_breaker: Circuit breaker of the destination server
+        """
+        self.source_client = source_client
+        self.dest_client = dest_client
+        self.cache_manager = cache_manager
+        self.logger = logger
+        self.max_message_size = max_message_size
+        self.fetch_batch_size = fetch_batch_size
+        self.fetch_batch_bytes = fetch_batch_bytes
+        self.show_progress = show_progress
+        self.retry_handler = RetryHandler(max_retries=retry_count, delay=retry_delay, logger=logger)
+        self.source_breaker = source_breaker or CircuitBreaker(source_client.host, logger=logger)
+        self.dest_breaker = dest_breaker or CircuitBreaker(dest_client.host, logger=logger)
+    
+    def _plan_batches(self, uids: List[str], sizes: Dict[str, int]) -> List[List[str]]:
+        """
+        Group UIDs into fetch batches bounded by message count and total bytes
+        A message larger than the byte limit is placed in a batch of its own
+        
+        Args:
+            uids: UIDs to transfer, in transfer order
+            sizes: Known message sizes by UID (missing sizes count as 0)
+        
+        Returns:
+            Lists of UIDs, one list per batched FETCH
+        """
+        batches = []
+        batch = []
+        batch_bytes = 0
+        
+        for uid in uids:
+            size = sizes.get(uid, 0)
+            
+            if batch and (len(batch) >= self.fetch_batch_size or
+                          batch_bytes + size > self.fetch_batch_bytes):
+                batches.append(batch)
+                batch = []
+                batch_bytes = 0
+            
+            batch.append(uid)
+            batch_bytes += size
+        
+        if batch:
+            batches.append(batch)
+        
+        return batches
+    
+    async def _fetch_batch(self, batch: List[str]) -> Tuple[List[tuple], Dict[str, bool]]:
+        """
+        Fetch a batch of messages with one UID FETCH command
+        UIDs missing from the batched response are fetched one by one
+        
+        Args:
+            batch: UIDs to fetch
+        
+        Returns:
+            Tuple of (fetched, failures)
+            - fetched: List of (uid, message_data, date, flags) tuples
+            - failures: Dictionary of UIDs that could not be fetched (all False)
+        """
+        fetched = []
+        
+        try:
+            self.logger.debug(f"Fetching batch of {len(batch)} messages from source server")
+            await self.source_breaker.wait_async()
+            fetched = await self.source_client.fetch_messages(batch)
+        except IMAPFetchError as e:
+            self.logger.warning(
+                f"Batched fetch failed, falling back to single message fetch: {str(e)}"
+            )
+        
+        seen = {message[0] for message in fetched}
+        failures = {}
+        
+        for uid in batch:
+            if uid in seen:
+                continue
+            try:
+                message = await self.retry_handler.execute_async(
+                    self.source_client.fetch_message, uid,
+                    circuit_breaker=self.source_breaker
+                )
+                fetched.append((uid,) + tuple(message))
+            except Exception as e:
+                self.logger.error(
+                    f"Failed to fetch message UID {uid} after {self.retry_handler.max_retries} retries: {str(e)}"
+                )
+                failures[uid] = False
+        
+        return fetched, failures
+    
+    async def _store_message(self, uid: str, message_data: bytes, date: str, flags: List[str],
+                             folder: str, dest_folder: str) -> Optional[bool]:
+        """
+        Append a fetched message to destination and record it in cache
+        
+        Args:
+            uid: Source message UID
+            message_data: RFC822 message data
+            date: Original internal date string
+            flags: List of message flags
+            folder: Source folder name (for cache)
+            dest_folder: Destination folder name (for append)
+        
+        Returns:
+            True if transfer successful, None if the message exceeds the
+            size limit, False otherwise
+        """
+        message_size = len(message_data)
+        
+        if message_size > self.max_message_size:
+            self.logger.warning(
+                f"Skipping message UID {uid}: size {format_size(message_size)} "
+                f"exceeds limit {format_size(self.max_message_size)}"
+            )
+            return None
+        
+        try:
+            self.logger.debug(f"Appending message UID {uid} to destination server")
+            dest_uid = await self.retry_handler.execute_async(
+                self.dest_client.append_message, dest_folder, message_data, date, flags,
+                circuit_breaker=self.dest_breaker
+            )
+        except IMAPAppendError as e:
+            self.logger.error(
+                f"Failed to append message UID {uid} after {self.retry_handler.max_retries} retries: {str(e)}"
+            )
+            return False
+        except Exception as e:
+            self.logger.error(
+                f"Unexpected error appending message UID {uid}: {str(e)}",
+                exc_info=True
+            )
+            return False
+        
+        # Mark as transferred in cache
+        try:
+            self.cache_manager.mark_transferred(uid, dest_uid, folder, message_size)
+        except Exception as e:
+            self.logger.error(
+                f"Failed to mark message UID {uid} as transferred in cache: {str(e)}",
+                exc_info=True
+            )
+            # Continue anyway - message was transferred successfully
+        
+        self.logger.debug(
+            f"Successfully transferred message UID {uid} -> {dest_uid} "
+            f"({format_size(message_size)})"
+        )
+        return True
+    
+    async def _run_batches(self, batches: Deque[List[str]], folder: str, dest_folder: str,
+                           progress_bar: tqdm) -> Tuple[Dict[str, Optional[bool]], int]:
+        """
+        Transfer batches taken from a shared queue over this engine's session pair
+        The next batch is fetched while the current one is appended
+        
+        Args:
+            batches: Batches still to transfer, shared with other engines
+            folder: Source folder name (for cache)
+            dest_folder: Destination folder name (for append)
+            progress_bar: Shared progress bar
+        
+        Returns:
+            Tuple of (outcomes, stored_bytes); outcomes maps UID to transfer
+            success (None if skipped by size)
+        """
+        outcomes: Dict[str, Optional[bool]] = {}
+        stored_bytes = 0
+        fetch_task = None
+        
+        try:
+            batch = batches.popleft() if batches else None
+            if batch:
+                fetch_task = asyncio.ensure_future(self._fetch_batch(batch))
+            
+            while fetch_task is not None:
+                fetched, failures = await fetch_task
+                current = batch
+                fetch_task = None
+                if batches:
+                    batch = batches.popleft()
+                    fetch_task = asyncio.ensure_future(self._fetch_batch(batch))
+                
+                outcomes.update(failures)
+                for uid, message_data, date, flags in fetched:
+                    outcomes[uid] = await self._store_message(uid, message_data, date, flags,
+                                                              folder, dest_folder)
+                    if outcomes[uid]:
+                        stored_bytes += len(message_data)
+                del fetched
+                progress_bar.update(len(current))
+        finally:
+            if fetch_task is not None:
+                fetch_task.cancel()
+        
+        return outcomes, stored_bytes
+    
+    def _advance_watermark(self, folder: str, source_uids: List[str], pending: Set[str]) -> None:
+        """
+        Store the highest UID below which every source message is transferred
+        This engine does not sync flag changes, so a stored HIGHESTMODSEQ is kept
+        
+        Args:
+            folder: Source folder name (for cache)
+            source_uids: UIDs examined in this run
+            pending: UIDs among them that were not transferred
+        """
+        uidvalidity = self.source_client.uidvalidity
+        state = self.cache_manager.get_folder_state(folder)
+        highest_modseq = state[2] if state and state[0] == uidvalidity else None
+        advance_watermark(self.cache_manager, folder, uidvalidity, source_uids, pending,
+                          highest_modseq, self.logger)
+    
+    async def transfer_folder(self, folder: str, dest_folder_override: Optional[str] = None,
+                              workers: Optional[List['AsyncTransferEngine']] = None) -> TransferResult:
+        """
+        Transfer all untransferred messages from the selected source folder
+        
+        Args:
+            folder: Folder name to transfer (source folder)
+            dest_folder_override: Optional destination folder name (if different from source)
+            workers: Engines over further session pairs with the same folder
+                selected; the batches are spread over this engine and them
+        
+        Returns:
+            TransferResult with statistics
+        """
+        start_time = time.time()
+        dest_folder = dest_folder_override if dest_folder_override else folder
+        
+        self.logger.info(f"Starting async transfer for folder '{folder}'")
+        
+        total_messages = 0
+        transferred = 0
+        skipped = 0
+        failed = 0
+        total_size = 0
+        skipped_by_size = 0
+        errors = []
+        pending_uids: Set[str] = set()  # Not transferred; held below the watermark
+        tasks = []
+        progress_bar = None
+        
+        try:
+            try:
+                # Discards the cached state if UIDVALIDITY changed
+                start_uid = sync_start_uid(self.cache_manager, folder,
+                                           self.source_client.uidvalidity, self.logger)
+                source_uids = await self.source_client.get_uid_list(start_uid)
+                total_messages = len(source_uids)
+            except IMAPFetchError as e:
+                error_msg = f"Failed to retrieve UIDs from source server: {str(e)}"
+                self.logger.error(error_msg)
+                errors.append(error_msg)
+                return TransferResult(
+                    total_messages=0,
+                    transferred=0,
+                    skipped=0,
+                    failed=0,
+                    total_size=0,
+                    duration_seconds=time.time() - start_time,
+                    errors=errors
+                )
+            
+            transferred_uids = set(self.cache_manager.get_transferred_uids(folder, start_uid))
+            untransferred_uids = [uid for uid in source_uids if uid not in transferred_uids]
+            skipped = total_messages - len(untransferred_uids)
+            
+            self.logger.info(
+                f"Folder '{folder}': {len(untransferred_uids)} untransferred messages "
+                f"({skipped} already transferred)"
+            )
+            
+            if not untransferred_uids:
+                self._advance_watermark(folder, source_uids, pending_uids)
+                return TransferResult(
+                    total_messages=total_messages,
+                    transferred=0,
+                    skipped=skipped,
+                    failed=0,
+                    total_size=0,
+                    duration_seconds=time.time() - start_time,
+                    errors=[]
+                )
+            
+            # Learn message sizes up front so batches can be bounded in bytes
+            try:
+                sizes = await self.source_client.fetch_message_sizes(untransferred_uids)
+            except IMAPFetchError as e:
+                self.logger.warning(f"Could not retrieve message sizes, batching by count only: {str(e)}")
+                sizes = {}
+            
+            # Oversized messages are skipped before any body is fetched
+            accepted = []
+            for uid in untransferred_uids:
+                if sizes.get(uid, 0) > self.max_message_size:
+                    self.logger.warning(
+                        f"Skipping message UID {uid}: size {format_size(sizes[uid])} "
+                        f"exceeds limit {format_size(self.max_message_size)}"
+                    )
+                    pending_uids.add(uid)
+                else:
+                    accepted.append(uid)
+            skipped_by_size = len(untransferred_uids) - len(accepted)
+            untransferred_uids = accepted
+            
+            if not untransferred_uids:
+                self._advance_watermark(folder, source_uids, pending_uids)
+                return TransferResult(
+                    total_messages=total_messages,
+                    transferred=0,
+                    skipped=skipped,
+                    failed=0,
+                    total_size=0,
+                    duration_seconds=time.time() - start_time,
+                    errors=[],
+                    skipped_by_size=skipped_by_size
+                )
+            
+            batches = deque(self._plan_batches(untransferred_uids, sizes))
+            progress_bar = tqdm(
+                total=len(untransferred_uids),
+                desc=f"Transferring {folder}",
+                unit="msg",
+                disable=not self.show_progress
+            )
+            
+            # Every session pair takes the next batch from the shared queue
+            engines = ([self] + list(workers or []))[:len(batches)]
+            if len(engines) > 1:
+                self.logger.info(f"Transferring with {len(engines)} session pairs")
+            tasks = [
+                asyncio.ensure_future(engine._run_batches(batches, folder, dest_folder, progress_bar))
+                for engine in engines
+            ]
+            outcomes: Dict[str, Optional[bool]] = {}
+            for engine_outcomes, stored_bytes in await asyncio.gather(*tasks):
+                outcomes.update(engine_outcomes)
+                total_size += stored_bytes
+            
+            for uid in untransferred_uids:
+                outcome = outcomes.get(uid, False)
+                if outcome:
+                    transferred += 1
+                elif outcome is None:
+                    skipped_by_size += 1
+                    pending_uids.add(uid)
+                else:
+                    failed += 1
+                    pending_uids.add(uid)
+                    errors.append(f"UID {uid}: Transfer failed")
+            
+            # Remember how far this folder is complete for the next run
+            self._advance_watermark(folder, source_uids, pending_uids)
+            
+            duration = time.time() - start_time
+            self.logger.info(
+                f"Transfer of '{folder}' complete: {transferred} transferred, "
+                f"{skipped} skipped, {skipped_by_size} skipped by size, "
+                f"{failed} failed in {duration:.1f} seconds"
+            )
+            
+            return TransferResult(
+                total_messages=total_messages,
+                transferred=transferred,
+                skipped=skipped,
+                failed=failed,
+                total_size=total_size,
+                duration_seconds=duration,
+                errors=errors,
+                skipped_by_size=skipped_by_size,
+                bytes_transferred=total_size
+            )
+        
+        except Exception as e:
+            error_msg = f"Critical error during transfer of '{folder}': {str(e)}"
+            self.logger.error(error_msg, exc_info=True)
+            errors.append(error_msg)
+            
+            return TransferResult(
+                total_messages=total_messages,
+                transferred=transferred,
+                skipped=skipped,
+                failed=failed,
+                total_size=total_size,
+                duration_seconds=time.time() - start_time,
+                errors=errors,
+                skipped_by_size=skipped_by_size,
+                bytes_transferred=total_size
+            )
+        finally:
+            # A failed session must not leave the others running
+            for task in tasks:
+                task.cancel()
+            if progress_bar is not None:
+                progress_bar.close()
+
+
+async def transfer_folders_concurrently(
+        jobs: List[Tuple[AsyncTransferEngine, str, Optional[str]]],
+        max_concurrency: int = 50) -> List[TransferResult]:
+    """
+    Run many folder transfers in one event loop
+    Each job uses its own engine and session pair, e.g. one per mailbox
+    when migrating many accounts from the same server. Entry point for
+    scripts driving many accounts; the command line runs a single folder.
+    
+    Args:
+        jobs: List of (engine, folder, dest_folder_override) tuples
+        max_concurrency: Maximum number of transfers running at once
+    
+    Returns:
+        TransferResult per job, in the same order as jobs
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def run(engine: AsyncTransferEngine, folder: str,
+                  dest_folder: Optional[str]) -> TransferResult:
+        async with semaphore:
+            return await engine.transfer_folder(folder, dest_folder_override=dest_folder)
+    
+    return list(await asyncio.gather(*(run(*job) for job in jobs)))
+
+
+async def transfer_single_folder(config: TransferConfig, cache_manager: CacheManager,
+                                 logger: logging.Logger) -> TransferResult:
+    """
+    Open async session pairs and transfer config.folder
+    Used by main for --use-asyncio instead of the synchronous clients. With
+    config.workers above 1 that many session pairs share the folder's
+    batches in one event loop. The destination folder is created if it
+    does not exist.
+    
+    Args:
+        config: Transfer configuration
+        cache_manager: Initialized cache manager
+        logger: Logger instance
+    
+    Returns:
+        TransferResult with statistics
+    
+    Raises:
+        IMAPConnectionError: If the first session pair cannot be opened
+        IMAPFolderError: If the source folder cannot be selected
+    """
+    if config.source_compress or config.dest_compress:
+        logger.info("COMPRESS=DEFLATE is not available with the asyncio engine, sessions are uncompressed")
+    
+    source_client = AsyncIMAPClient(config.source_host, config.source_user,
+                                    config.source_pass, config.port)
+    dest_client = AsyncIMAPClient(config.dest_host, config.dest_user,
+                                  config.dest_pass, config.port)
+    clients = [source_client, dest_client]
+    
+    async def open_pair(index: int) -> Optional[Tuple[AsyncIMAPClient, AsyncIMAPClient]]:
+        source, dest = source_client.clone(), dest_client.clone()
+        clients.extend((source, dest))
+        try:
+            await asyncio.gather(source.connect(), dest.connect())
+            await source.select_folder(config.folder)
+        except Exception as e:
+            logger.warning(f"Session pair {index + 2}: could not open connections: {str(e)}")
+            return None
+        return source, dest
+    
+    try:
+        await asyncio.gather(source_client.connect(), dest_client.connect())
+        message_count = await source_client.select_folder(config.folder)
+        logger.info(f"✓ Source folder '{config.folder}' has {message_count} messages")
+        await dest_client.create_folder(config.folder)
+        
+        settings = dict(
+            max_message_size=config.max_message_size,
+            retry_count=config.retry_count,
+            retry_delay=config.retry_delay,
+            fetch_batch_size=config.fetch_batch_size,
+            fetch_batch_bytes=config.fetch_batch_bytes
+        )
+        engine = AsyncTransferEngine(source_client, dest_client, cache_manager, logger, **settings)
+        
+        # Further session pairs back off together with the first one
+        pairs = await asyncio.gather(*(open_pair(index) for index in range(config.workers - 1)))
+        workers = [
+            AsyncTransferEngine(source, dest, cache_manager, logger, show_progress=False,
+                                source_breaker=engine.source_breaker,
+                                dest_breaker=engine.dest_breaker, **settings)
+            for source, dest in (pair for pair in pairs if pair)
+        ]
+        return await engine.transfer_folder(config.folder, workers=workers)
+    finally:
+        await asyncio.gather(*(client.disconnect() for client in clients))
@@ -3,15 +3,21 @@
 Automatic Multi-Folder Transfer
 Automatically discovers and transfers all folders from source to destination
 """
+import copy
 import logging
 import sys
-from typing import List, Dict
+import threading
+import time
+from collections import deque
+from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 
 from .imap_client import IMAPClient
 from .cache import CacheManager
+from .connection_pool import ConnectionPool
+from .adaptive import AdaptiveController
 from .transfer import TransferEngine, TransferResult
-from .utils import IMAPFolderError
+from .utils import IMAPConnectionError, IMAPFolderError, IMAPTransferError
 
 
 @dataclass
@@ -21,6 +27,7 @@ class FolderTransferResult:
     success: bool
     result: TransferResult = None
     error: str = None
+    unchanged: bool = False
 
 
 class AutoTransferEngine:
@@ -31,7 +38,16 @@ class AutoTransferEngine:
     def __init__(self, source_client: IMAPClient, dest_client: IMAPClient,
                  cache_manager: CacheManager, logger: logging.Logger,
                  max_message_size: int = 52428800, retry_count: int = 3,
-                 retry_delay: int = 5):
+                 retry_delay: int = 5, fetch_batch_size: int = 50,
+                 fetch_batch_bytes: int = 20971520, append_pipeline_depth: int = 8,
+                 pipeline: bool = False, pipeline_queue_bytes: int = 41943040,
+                 workers: int = 1, parallel_folders: int = 1,
+                 max_connections_per_host: int = 10, sync_expunges: bool = False,
+                 binary: bool = False, spool_threshold: int = 10485760,
+                 fetch_chunk_size: int = 8388608,
+                 source_pool: Optional[ConnectionPool] = None,
+                 dest_pool: Optional[ConnectionPool] = None,
+                 controller: Optional[AdaptiveController] = None):
         """
         Initialize AutoTransferEngine
         
@@ -43,6 +59,25 @@ class AutoTransferEngine:
             max_message_size: Maximum message size in bytes
             retry_count: Number of retry attempts
             retry_delay: Delay between retries
+            fetch_batch_size: Maximum number of messages per batched FETCH
+            fetch_batch_bytes: Maximum total message bytes per batched FETCH
+            append_pipeline_depth: APPEND commands kept in flight (1 disables pipelining)
+            pipeline: Overlap fetching and appending within each folder
+            pipeline_queue_bytes: Maximum bytes of fetched messages waiting to be appended
+            workers: Number of parallel connection pairs used for each folder
+            parallel_folders: Number of folders transferred at the same time
+            max_connections_per_host: Upper limit on open connections to one
+                server across all parallel folders and workers
+            sync_expunges: Delete destination copies of messages expunged from source
+            binary: Transfer with BINARY fetch/append when both servers support it
+            spool_threshold: Messages larger than this many bytes are spooled to disk
+            fetch_chunk_size: Messages larger than this many bytes are fetched
+                in resumable ranges of this size (0 disables)
+            source_pool: Pool providing and repairing source connections;
+                a private pool is created when not given
+            dest_pool: Pool providing and repairing destination connections
+            controller: Adaptive controller shared by all folders, choosing
+                workers and batch size within the configured limits
         """
         self.source_client = source_client
         self.dest_client = dest_client
@@ -51,6 +86,29 @@ class AutoTransferEngine:
         self.max_message_size = max_message_size
         self.retry_count = retry_count
         self.retry_delay = retry_delay
+        self.fetch_batch_size = fetch_batch_size
+        self.fetch_batch_bytes = fetch_batch_bytes
+        self.append_pipeline_depth = append_pipeline_depth
+        self.pipeline = pipeline
+        self.pipeline_queue_bytes = pipeline_queue_bytes
+        self.workers = workers
+        self.parallel_folders = parallel_folders
+        self.max_connections_per_host = max_connections_per_host
+        self.sync_expunges = sync_expunges
+        self.binary = binary
+        self.spool_threshold = spool_threshold
+        self.fetch_chunk_size = fetch_chunk_size
+        self._owned_pools = []  # Pools created here, closed after each run
+        if source_pool is None:
+            source_pool = ConnectionPool(source_client, logger)
+            self._owned_pools.append(source_pool)
+        if dest_pool is None:
+            dest_pool = ConnectionPool(dest_client, logger)
+            self._owned_pools.append(dest_pool)
+        self.source_pool = source_pool
+        self.dest_pool = dest_pool
+        self.controller = controller
+        self._folder_status: Dict[str, Dict[str, int]] = {}  # Source STATUS read before transferring
         
         # Folders to skip (system folders that shouldn't be transferred)
         self.skip_folders = [
@@ -202,6 +260,22 @@ class AutoTransferEngine:
         self.logger.info("=" * 60)
         
         try:
+            # A connection may have dropped while the previous folder finished
+            reconnects = 0
+            try:
+                if self.source_pool.ensure_healthy(self.source_client):
+                    reconnects += 1
+                if self.dest_pool.ensure_healthy(self.dest_client):
+                    reconnects += 1
+            except IMAPTransferError as e:
+                error_msg = f"Failed to restore connection: {e}"
+                self.logger.error(error_msg)
+                return FolderTransferResult(
+                    folder_name=folder_name,
+                    success=False,
+                    error=error_msg
+                )
+            
             # Select source folder
             try:
                 message_count = self.source_client.select_folder(folder_name)
@@ -251,21 +325,41 @@ class AutoTransferEngine:
                 logger=self.logger,
                 max_message_size=self.max_message_size,
                 retry_count=self.retry_count,
-                retry_delay=self.retry_delay
+                retry_delay=self.retry_delay,
+                fetch_batch_size=self.fetch_batch_size,
+                fetch_batch_bytes=self.fetch_batch_bytes,
+                append_pipeline_depth=self.append_pipeline_depth,
+                pipeline=self.pipeline,
+                pipeline_queue_bytes=self.pipeline_queue_bytes,
+                workers=self.workers,
+                sync_expunges=self.sync_expunges,
+                binary=self.binary,
+                spool_threshold=self.spool_threshold,
+                fetch_chunk_size=self.fetch_chunk_size,
+                source_pool=self.source_pool,
+                dest_pool=self.dest_pool,
+                controller=self.controller
             )
             
             # Transfer messages (use normalized destination folder name)
             dest_folder_name = self.normalize_folder_name(folder_name, for_destination=True)
             result = transfer_engine.transfer_folder(folder_name, dest_folder_override=dest_folder_name)
+            result.reconnects += reconnects
             
             # Log folder summary
             self.logger.info("-" * 60)
             self.logger.info(f"Folder '{folder_name}' Complete:")
             self.logger.info(f"  Transferred: {result.transferred}")
             self.logger.info(f"  Skipped: {result.skipped}")
+            if result.skipped_by_size:
+                self.logger.info(f"  Skipped (size limit): {result.skipped_by_size}")
+            if result.flags_updated or result.expunged:
+                self.logger.info(f"  Flags updated: {result.flags_updated}, expunged: {result.expunged}")
             self.logger.info(f"  Failed: {result.failed}")
             self.logger.info("-" * 60)
             
+            self._record_folder_status(folder_name, result)
+            
             return FolderTransferResult(
                 folder_name=folder_name,
                 success=(result.failed == 0),
@@ -284,9 +378,98 @@ class AutoTransferEngine:
                 error=error_msg
             )
     
+    def _skip_unchanged_folders(self, folders: List[str]) -> Tuple[List[str], Dict[str, FolderTransferResult]]:
+        """
+        Find folders that did not change since their last complete sync
+        Reads STATUS of every folder in one go and compares MESSAGES,
+        UIDNEXT, UIDVALIDITY and HIGHESTMODSEQ with the values recorded
+        after the previous run, so idle folders cost no SELECT, search or
+        cache scan.
+        
+        Args:
+            folders: Folder names to transfer
+        
+        Returns:
+            Tuple of (folders to transfer, results for unchanged folders)
+        """
+        try:
+            self._folder_status = self.source_client.folder_status(folders)
+        except IMAPFolderError as e:
+            self.logger.warning(f"Could not read folder status, checking every folder: {e}")
+            self._folder_status = {}
+            return folders, {}
+        
+        changed = []
+        unchanged = {}
+        for folder in folders:
+            status = self._folder_status.get(folder)
+            if status and status == self.cache_manager.get_folder_status(folder):
+                unchanged[folder] = FolderTransferResult(
+                    folder_name=folder,
+                    success=True,
+                    result=TransferResult(
+                        total_messages=status.get('MESSAGES', 0),
+                        transferred=0,
+                        skipped=0,
+                        failed=0,
+                        total_size=0,
+                        duration_seconds=0.0,
+                        errors=[]
+                    ),
+                    unchanged=True
+                )
+            else:
+                changed.append(folder)
+        
+        if unchanged:
+            self.logger.info(f"{len(unchanged)} of {len(folders)} folders unchanged since last run, skipping them")
+        
+        return changed, unchanged
+    
+    def _record_folder_status(self, folder_name: str, result: TransferResult) -> None:
+        """
+        Remember the source STATUS of a folder once it is completely in sync
+        Folders with failed or oversized messages are not recorded, so the
+        next run looks at them again.
+        
+        Args:
+            folder_name: Source folder name
+            result: Transfer result of the folder
+        """
+        status = self._folder_status.get(folder_name)
+        if not status or result.failed or result.skipped_by_size or result.errors:
+            return
+        
+        try:
+            self.cache_manager.set_folder_status(folder_name, status)
+        except Exception as e:
+            self.logger.warning(f"Failed to save status of folder '{folder_name}': {e}")
+    
     def transfer_all_folders(self) -> Dict[str, FolderTransferResult]:
         """
         Discover and transfer all folders from source to destination
+        Connections of parallel workers are reused from folder to folder;
+        when the pools were created by this engine they are closed at the end.
+        
+        Returns:
+            Dictionary mapping folder names to their transfer results
+        """
+        try:
+            return self._transfer_all_folders()
+        finally:
+            self._close_owned_pools()
+    
+    def _close_owned_pools(self) -> None:
+        """
+        Close idle connections of pools this engine created itself
+        Pools passed in by the caller are left open for later runs.
+        """
+        for pool in self._owned_pools:
+            pool.close()
+    
+    def _transfer_all_folders(self) -> Dict[str, FolderTransferResult]:
+        """
+        Discover and transfer all folders, see transfer_all_folders()
         
         Returns:
             Dictionary mapping folder names to their transfer results
@@ -310,6 +493,16 @@ class AutoTransferEngine:
             self.logger.info(f"  {idx}. {folder}")
         self.logger.info("")
         
+        all_folders = folders
+        folders, unchanged = self._skip_unchanged_folders(all_folders)
+        
+        # Transfer several folders at once over a pool of connection pairs
+        if self.parallel_folders > 1 and len(folders) > 1:
+            results = self._transfer_folders_parallel(folders)
+            results = self._merge_results(all_folders, results, unchanged)
+            self.display_summary(results)
+            return results
+        
         # Transfer each folder
         results = {}
         
@@ -333,11 +526,233 @@ class AutoTransferEngine:
                 # Continue with next folder
                 continue
         
+        results = self._merge_results(all_folders, results, unchanged)
+        
         # Display final summary
         self.display_summary(results)
         
         return results
     
+    def _merge_results(self, folders: List[str], results: Dict[str, FolderTransferResult],
+                       unchanged: Dict[str, FolderTransferResult]) -> Dict[str, FolderTransferResult]:
+        """
+        Combine transferred and unchanged folders in discovery order
+        
+        Args:
+            folders: All discovered folder names
+            results: Results of transferred folders
+            unchanged: Results of folders skipped as unchanged
+        
+        Returns:
+            Dictionary mapping folder names to their results
+        """
+        merged = {}
+        for folder in folders:
+            if folder in unchanged:
+                merged[folder] = unchanged[folder]
+            elif folder in results:
+                merged[folder] = results[folder]
+        return merged
+    
+    def follow_all_folders(self, poll_interval: int = 60) -> None:
+        """
+        Keep all folders in sync until interrupted
+        Every poll_interval seconds the folder list and the STATUS of every
+        folder are read again; only folders that changed since their last
+        complete sync are transferred. IDLE only watches the selected folder,
+        so polling is used for the whole account. Pools this engine created
+        stay open between polls and are closed when following stops.
+        
+        Args:
+            poll_interval: Seconds between polls
+        """
+        self.logger.info(f"Follow mode: polling all folders with STATUS every {poll_interval} seconds")
+        
+        try:
+            while True:
+                time.sleep(poll_interval)
+                
+                try:
+                    folders = [
+                        folder for folder in self.source_client.list_folders()
+                        if not self.should_skip_folder(folder)
+                    ]
+                    
+                    changed, _ = self._skip_unchanged_folders(folders)
+                    if not changed:
+                        # Keep the otherwise unused destination connection alive
+                        self.dest_client.noop()
+                        continue
+                except (IMAPConnectionError, IMAPFolderError) as e:
+                    reconnected = self.source_pool.ensure_healthy(self.source_client)
+                    reconnected = self.dest_pool.ensure_healthy(self.dest_client) or reconnected
+                    if reconnected:
+                        self.logger.warning(f"Follow mode: connection lost and re-established: {e}")
+                    else:
+                        self.logger.warning(f"Follow mode: could not list folders: {e}")
+                    continue
+                
+                if self.parallel_folders > 1 and len(changed) > 1:
+                    results = self._transfer_folders_parallel(changed)
+                else:
+                    results = {folder: self.transfer_folder(folder) for folder in changed}
+                
+                transferred = sum(r.result.transferred for r in results.values() if r.result)
+                failed_folders = sum(1 for r in results.values() if not r.success)
+                self.logger.info(
+                    f"Follow mode: {len(changed)} folders changed, {transferred} messages transferred, "
+                    f"{failed_folders} folders failed"
+                )
+        finally:
+            self._close_owned_pools()
+    
+    def _plan_connections(self, folder_count: int) -> Tuple[int, int]:
+        """
+        Decide how many folders run at once and how many workers each gets
+        Keeps the total number of connections to each host within
+        max_connections_per_host. When source and destination are the same
+        server, every connection pair counts twice against the limit.
+        
+        Args:
+            folder_count: Number of folders to transfer
+        
+        Returns:
+            Tuple of (folder_slots, workers_per_folder)
+        """
+        same_host = self.source_client.host.lower() == self.dest_client.host.lower()
+        connections_per_pair = 2 if same_host else 1
+        max_pairs = max(1, self.max_connections_per_host // connections_per_pair)
+        
+        workers = min(self.workers, max_pairs)
+        if workers < self.workers:
+            self.logger.warning(
+                f"Reducing workers per folder from {self.workers} to {workers} "
+                f"to stay within {self.max_connections_per_host} connections per host"
+            )
+        
+        slots = max(1, min(self.parallel_folders, folder_count, max_pairs // workers))
+        return slots, workers
+    
+    def _open_slot_engines(self, count: int, workers: int) -> List['AutoTransferEngine']:
+        """
+        Take additional connection pairs from the pools, each wrapped in its own engine
+        Slots that cannot connect are left out, the remaining ones carry on
+        
+        Args:
+            count: Number of additional connection pairs to open
+            workers: Workers per folder for the new engines
+        
+        Returns:
+            List of engines sharing this engine's cache and settings
+        """
+        engines = []
+        
+        for index in range(count):
+            try:
+                source_client = self.source_pool.acquire()
+            except Exception as e:
+                self.logger.warning(f"Folder slot {index + 2}: could not open connections: {e}")
+                continue
+            try:
+                dest_client = self.dest_pool.acquire()
+            except Exception as e:
+                self.logger.warning(f"Folder slot {index + 2}: could not open connections: {e}")
+                self.source_pool.release(source_client)
+                continue
+            
+            engines.append(self._slot_engine(source_client, dest_client, workers))
+        
+        return engines
+    
+    def _slot_engine(self, source_client: IMAPClient, dest_client: IMAPClient,
+                     workers: int) -> 'AutoTransferEngine':
+        """
+        Copy this engine onto another connection pair
+        
+        Args:
+            source_client: Connected source client for the slot
+            dest_client: Connected destination client for the slot
+            workers: Workers per folder
+        
+        Returns:
+            AutoTransferEngine sharing cache, logger and settings
+        """
+        engine = copy.copy(self)
+        engine.source_client = source_client
+        engine.dest_client = dest_client
+        engine.workers = workers
+        engine.parallel_folders = 1
+        return engine
+    
+    def _transfer_folders_parallel(self, folders: List[str]) -> Dict[str, FolderTransferResult]:
+        """
+        Transfer folders concurrently, one folder per connection pair at a time
+        Each slot takes the next folder from a shared queue when it finishes
+        the previous one, so one large folder does not block the rest.
+        
+        Args:
+            folders: Folder names to transfer
+        
+        Returns:
+            Dictionary mapping folder names to their transfer results,
+            in the same order as the folders list
+        """
+        slots, workers = self._plan_connections(len(folders))
+        extra_engines = self._open_slot_engines(slots - 1, workers)
+        engines = [self._slot_engine(self.source_client, self.dest_client, workers)] + extra_engines
+        self.logger.info(
+            f"Transferring {len(engines)} folders at a time "
+            f"with {workers} connection pair(s) per folder"
+        )
+        
+        pending = deque(enumerate(folders, 1))
+        results = {}
+        lock = threading.Lock()
+        stop_event = threading.Event()
+        
+        def run_slot(engine: 'AutoTransferEngine') -> None:
+            while not stop_event.is_set():
+                with lock:
+                    if not pending:
+                        return
+                    idx, folder = pending.popleft()
+                
+                self.logger.info(f"[{idx}/{len(folders)}] Processing folder: {folder}")
+                try:
+                    result = engine.transfer_folder(folder)
+                except Exception as e:
+                    self.logger.error(f"Critical error transferring folder '{folder}': {e}")
+                    result = FolderTransferResult(
+                        folder_name=folder,
+                        success=False,
+                        error=str(e)
+                    )
+                
+                with lock:
+                    results[folder] = result
+        
+        threads = [
+            threading.Thread(target=run_slot, args=(engine,),
+                             name=f"imap-folder-slot-{index + 1}", daemon=True)
+            for index, engine in enumerate(engines)
+        ]
+        
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            stop_event.set()
+            self.logger.warning("Transfer interrupted, waiting for running folders to stop")
+            raise
+        finally:
+            for engine in extra_engines:
+                self.source_pool.release(engine.source_client)
+                self.dest_pool.release(engine.dest_client)
+        
+        return {folder: results[folder] for folder in folders if folder in results}
+    
     def display_summary(self, results: Dict[str, FolderTransferResult]) -> None:
         """
         Display final transfer summary for all folders
@@ -352,32 +767,59 @@ class AutoTransferEngine:
         
         total_transferred = 0
         total_skipped = 0
+        total_skipped_by_size = 0
         total_failed = 0
         total_size = 0
+        total_bytes_transferred = 0
+        total_binary_saved = 0
+        total_reconnects = 0
         successful_folders = 0
         failed_folders = 0
+        unchanged_folders = 0
         
         for folder_name, result in results.items():
+            if result.unchanged:
+                unchanged_folders += 1
             if result.success and result.result:
                 successful_folders += 1
                 total_transferred += result.result.transferred
                 total_skipped += result.result.skipped
+                total_skipped_by_size += result.result.skipped_by_size
                 total_failed += result.result.failed
                 total_size += result.result.total_size
+                total_bytes_transferred += result.result.bytes_transferred
+                total_binary_saved += result.result.binary_bytes_saved
             else:
                 failed_folders += 1
+            # Connections are lost most often in folders that end up failing
+            if result.result:
+                total_reconnects += result.result.reconnects
         
         self.logger.info(f"Total folders processed: {len(results)}")
         self.logger.info(f"  Successful: {successful_folders}")
         self.logger.info(f"  Failed: {failed_folders}")
+        if unchanged_folders:
+            self.logger.info(f"  Unchanged since last run: {unchanged_folders}")
         self.logger.info("")
         self.logger.info(f"Total messages transferred: {total_transferred}")
         self.logger.info(f"Total messages skipped: {total_skipped}")
+        if total_skipped_by_size:
+            self.logger.info(f"Total messages skipped (size limit): {total_skipped_by_size}")
         self.logger.info(f"Total messages failed: {total_failed}")
+        if total_reconnects:
+            self.logger.info(f"Reconnects after connection loss: {total_reconnects}")
         
         if total_size > 0:
             from .utils import format_size
             self.logger.info(f"Total data transferred: {format_size(total_size)}")
+            if total_bytes_transferred:
+                totals = self.cache_manager.statistics.totals()
+                self.logger.info(
+                    f"Data transferred in this run: {format_size(total_bytes_transferred)} "
+                    f"({totals.message_rate:.1f} messages/s, {format_size(int(totals.byte_rate))}/s)"
+                )
+            if total_binary_saved:
+                self.logger.info(f"Saved by BINARY transfer: {format_size(total_binary_saved)}")
         
         # Display per-folder summary
         if results:
@@ -386,7 +828,10 @@ class AutoTransferEngine:
             self.logger.info("-" * 60)
             
             for folder_name, result in results.items():
-                if result.success and result.result:
+                if result.unchanged:
+                    status = "✓"
+                    details = "unchanged since last run"
+                elif result.success and result.result:
                     status = "✓"
                     details = f"{result.result.transferred} transferred, {result.result.skipped} skipped, {result.result.failed} failed"
                 else:
@@ -0,0 +1,349 @@
+"""
+Bandwidth Module
+Token-bucket rate limits for IMAP traffic, adjustable by a time-of-day schedule
+"""
+
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .utils import format_size
+
+
+# How often the schedule file and the current time are checked (seconds)
+SCHEDULE_CHECK_INTERVAL = 30
+
+# Smallest burst a bucket allows, so low rates still pass whole socket reads
+MIN_BURST = 65536
+
+# Limit names used on the command line and in schedule files
+LIMIT_NAMES = ('global', 'source', 'dest')
+
+DAY_NAMES = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+
+class TokenBucket:
+    """
+    Token bucket limiting bytes per second
+    consume() may take more tokens than the bucket holds; the caller then
+    sleeps until the debt is paid off, so single large reads or writes are
+    accounted for exactly. Thread-safe, so all connections to a server can
+    share one bucket.
+    """
+    
+    def __init__(self, rate: int = 0):
+        """
+        Initialize bucket
+        
+        Args:
+            rate: Bytes per second, 0 for no limit
+        """
+        self.rate = 0
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.set_rate(rate)
+    
+    def set_rate(self, rate: int) -> None:
+        """
+        Change the limit; takes effect for the next consume() call
+        
+        Args:
+            rate: Bytes per second, 0 for no limit
+        """
+        with self._lock:
+            if rate and not self.rate:
+                # Start full instead of with the debt of an unlimited period
+                self._tokens = max(rate, MIN_BURST)
+                self._updated = time.monotonic()
+            self.rate = rate
+    
+    def consume(self, count: int) -> None:
+        """
+        Take tokens for count bytes, sleeping while the bucket is in debt
+        
+        Args:
+            count: Bytes sent or received
+        """
+        with self._lock:
+            if not self.rate or count <= 0:
+                return
+            now = time.monotonic()
+            burst = max(self.rate, MIN_BURST)
+            self._tokens = min(self._tokens + (now - self._updated) * self.rate, burst)
+            self._updated = now
+            self._tokens -= count
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        
+        if wait:
+            time.sleep(wait)
+
+
+def consume_tokens(buckets: List[TokenBucket], count: int) -> None:
+    """
+    Take tokens for count bytes from every bucket in turn
+    
+    Args:
+        buckets: Buckets limiting the connection, e.g. its server's and the global one
+        count: Bytes sent or received
+    """
+    for bucket in buckets:
+        bucket.consume(count)
+
+
+def _parse_time(value: str) -> int:
+    """
+    Convert "HH:MM" to minutes after midnight
+    
+    Args:
+        value: Time of day
+    
+    Returns:
+        Minutes after midnight
+    
+    Raises:
+        ValueError: If value is not a valid time of day
+    """
+    hours, _, minutes = str(value).partition(':')
+    result = int(hours) * 60 + int(minutes or 0)
+    if not 0 <= result <= 24 * 60:
+        raise ValueError(f"invalid time of day: {value}")
+    return result
+
+
+def _parse_limits(entry: Dict, where: str) -> Dict[str, int]:
+    """
+    Read the limits of a schedule entry
+    
+    Args:
+        entry: Dictionary with optional "global", "source" and "dest" keys
+        where: Position in the file for error messages
+    
+    Returns:
+        Dictionary mapping limit name to bytes per second (0 for no limit)
+    
+    Raises:
+        ValueError: If a limit is not a non-negative integer
+    """
+    if not isinstance(entry, dict):
+        raise ValueError(f"{where}: must be a JSON object")
+    
+    limits = {}
+    for name in LIMIT_NAMES:
+        value = entry.get(name, 0)
+        if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+            raise ValueError(f"{where}: '{name}' must be a non-negative integer (bytes per second)")
+        limits[name] = value
+    return limits
+
+
+def load_schedule(path: str) -> Dict:
+    """
+    Read and check a bandwidth schedule file
+    The file is JSON, for example:
+        
+        {
+            "default": {"global": 0},
+            "windows": [
+                {"days": ["mon", "tue", "wed", "thu", "fri"],
+                 "start": "08:30", "end": "18:00",
+                 "global": 2097152, "dest": 1048576}
+            ]
+        }
+    
+    The first window containing the current local time applies, otherwise
+    "default". A window whose end is before its start runs past midnight;
+    "days" refers to the day the window starts and defaults to every day.
+    Limits are bytes per second, missing or 0 means no limit.
+    
+    Args:
+        path: Path of the schedule file
+    
+    Returns:
+        Dictionary with "default" limits and a list of parsed "windows"
+    
+    Raises:
+        ValueError: If the file cannot be read or is invalid
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"Cannot read bandwidth schedule '{path}': {str(e)}")
+    
+    if not isinstance(data, dict):
+        raise ValueError(f"Bandwidth schedule '{path}' must contain a JSON object")
+    
+    schedule = {
+        'default': _parse_limits(data.get('default', {}), f"Bandwidth schedule '{path}', default"),
+        'windows': []
+    }
+    
+    for index, window in enumerate(data.get('windows', [])):
+        where = f"windows[{index}]"
+        try:
+            days = []
+            for day in window.get('days', DAY_NAMES):
+                if str(day).lower()[:3] not in DAY_NAMES:
+                    raise ValueError(f"unknown day: {day}")
+                days.append(DAY_NAMES.index(str(day).lower()[:3]))
+            start = _parse_time(window['start'])
+            end = _parse_time(window['end'])
+        except (KeyError, ValueError, AttributeError, TypeError) as e:
+            raise ValueError(f"Bandwidth schedule '{path}', {where}: invalid days, start or end ({str(e)})")
+        schedule['windows'].append({
+            'days': days,
+            'start': start,
+            'end': end,
+            'label': f"{window['start']}-{window['end']}",
+            'limits': _parse_limits(window, f"Bandwidth schedule '{path}', {where}")
+        })
+    
+    return schedule
+
+
+class BandwidthLimiter:
+    """
+    Global and per-server byte rate limits for all IMAP connections
+    Source connections draw from the source and global buckets,
+    destination connections from the destination and global buckets.
+    With a schedule file, a background thread re-reads the file when it
+    changes and switches the limits when a time window starts or ends, so
+    limits can be changed without restarting the transfer.
+    """
+    
+    def __init__(self, global_rate: int = 0, source_rate: int = 0, dest_rate: int = 0,
+                 schedule_path: Optional[str] = None, logger: Optional[logging.Logger] = None):
+        """
+        Initialize limiter
+        
+        Args:
+            global_rate: Bytes per second for all connections together (0: no limit)
+            source_rate: Bytes per second for all source connections (0: no limit)
+            dest_rate: Bytes per second for all destination connections (0: no limit)
+            schedule_path: Optional schedule file; its limits replace the rates above
+            logger: Optional logger for limit changes
+        
+        Raises:
+            ValueError: If the schedule file cannot be read or is invalid
+        """
+        self.logger = logger or logging.getLogger(__name__)
+        self.schedule_path = schedule_path
+        self.buckets = {name: TokenBucket() for name in LIMIT_NAMES}
+        self._static = {'global': global_rate, 'source': source_rate, 'dest': dest_rate}
+        self._schedule: Optional[Dict] = None
+        self._schedule_mtime: Optional[float] = None
+        self._active: Optional[str] = None  # Description of the limits in effect
+        self._stop_event: Optional[threading.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        
+        if schedule_path:
+            self._schedule = load_schedule(schedule_path)
+            self._schedule_mtime = os.path.getmtime(schedule_path)
+        self.refresh()
+    
+    def limiters_for(self, role: str) -> List[TokenBucket]:
+        """
+        Buckets a connection has to draw from
+        
+        Args:
+            role: 'source' or 'dest'
+        
+        Returns:
+            The server's bucket and the global bucket
+        """
+        return [self.buckets[role], self.buckets['global']]
+    
+    def start(self) -> None:
+        """Start following the schedule file in a background thread"""
+        if not self.schedule_path or self._thread:
+            return
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(
+            target=self._follow_schedule, args=(self._stop_event,),
+            name="bandwidth-schedule", daemon=True
+        )
+        self._thread.start()
+    
+    def close(self) -> None:
+        """Stop the schedule thread; the current limits stay in effect"""
+        thread, self._thread = self._thread, None
+        if self._stop_event:
+            self._stop_event.set()
+        if thread:
+            thread.join(timeout=5)
+    
+    def refresh(self) -> None:
+        """
+        Apply the limits that are due now
+        Re-reads the schedule file if it was modified; an invalid file is
+        logged and the previous schedule kept.
+        """
+        if self.schedule_path:
+            try:
+                mtime = os.path.getmtime(self.schedule_path)
+                if mtime != self._schedule_mtime:
+                    self._schedule_mtime = mtime
+                    self._schedule = load_schedule(self.schedule_path)
+                    self.logger.info(f"Reloaded bandwidth schedule '{self.schedule_path}'")
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"Keeping previous bandwidth schedule: {str(e)}")
+        
+        limits, source = self._due_limits(datetime.datetime.now())
+        for name, rate in limits.items():
+            self.buckets[name].set_rate(rate)
+        
+        active = ", ".join(
+            f"{name} {format_size(rate) + '/s' if rate else 'unlimited'}"
+            for name, rate in limits.items()
+        ) + f" ({source})"
+        if active != self._active:
+            self._active = active
+            self.logger.info(f"Bandwidth limits: {active}")
+    
+    def _due_limits(self, now: datetime.datetime) -> Tuple[Dict[str, int], str]:
+        """
+        Find the limits for a point in time
+        
+        Args:
+            now: Local time
+        
+        Returns:
+            Tuple of (limits by name, description of where they come from)
+        """
+        if not self._schedule:
+            return self._static, "command line"
+        
+        minute = now.hour * 60 + now.minute
+        today = now.weekday()
+        yesterday = (today - 1) % 7
+        
+        for window in self._schedule['windows']:
+            start, end, days = window['start'], window['end'], window['days']
+            if start <= end:
+                inside = today in days and start <= minute < end
+            else:
+                # Runs past midnight: late part today or early part after yesterday's start
+                inside = ((today in days and minute >= start) or
+                          (yesterday in days and minute < end))
+            if inside:
+                return window['limits'], f"schedule window {window['label']}"
+        
+        return self._schedule['default'], "schedule default"
+    
+    def _follow_schedule(self, stop_event: threading.Event) -> None:
+        """
+        Schedule thread: apply due limits every SCHEDULE_CHECK_INTERVAL seconds
+        
+        Args:
+            stop_event: Set by close() to end the thread
+        """
+        while not stop_event.wait(SCHEDULE_CHECK_INTERVAL):
+            try:
+                self.refresh()
+            except Exception as e:
+                self.logger.warning(f"Could not update bandwidth limits: {str(e)}")
@@ -3,10 +3,193 @@ Cache Manager Module
 Handles SQLite database management and duplicate control
 """
 
+import functools
 import sqlite3
-from typing import List, Dict, Optional
-from datetime import datetime
+import threading
+import time
+from typing import List, Dict, Iterator, Optional, Set, Tuple
 
+from .utils import ManifestEntry
+from .statistics import FolderStatistics, TransferStatistics
+
+
+# Schema version kept in PRAGMA user_version; caches without it use the
+# version 1 layout (TEXT UIDs, folder names in every row) and are migrated
+SCHEMA_VERSION = 2
+
+# UIDs per IN (...) lookup; shorter chunks are padded, so every lookup of
+# a kind reuses one prepared statement
+LOOKUP_CHUNK = 500
+
+# Applied to every connection. WAL appends each commit to one log file
+# and needs a single sync per commit instead of the rollback journal's
+# several; synchronous=FULL keeps that sync, as the crash guarantees of
+# mark_transferred rely on committed records being on disk.
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = FULL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16384",  # 16 MB page cache
+    "PRAGMA busy_timeout = 5000",
+)
+
+# Version 2 schema. Messages are clustered by (folder_id, uid) WITHOUT
+# ROWID, so a folder's records are one contiguous key range and inserts
+# update no secondary index.
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS folders (
+        folder_id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS transferred_messages (
+        folder_id INTEGER NOT NULL,
+        uid INTEGER NOT NULL,
+        dest_uid INTEGER,
+        message_size INTEGER,
+        transferred_at INTEGER,
+        PRIMARY KEY (folder_id, uid)
+    ) WITHOUT ROWID
+    """,
+    # UIDVALIDITY and incremental sync watermark
+    """
+    CREATE TABLE IF NOT EXISTS folder_state (
+        folder_id INTEGER PRIMARY KEY,
+        uidvalidity INTEGER NOT NULL,
+        highest_uid INTEGER NOT NULL,
+        highest_modseq INTEGER,
+        updated_at INTEGER
+    )
+    """,
+    # Source STATUS at the last complete sync
+    """
+    CREATE TABLE IF NOT EXISTS folder_status (
+        folder_id INTEGER PRIMARY KEY,
+        uidvalidity INTEGER,
+        uidnext INTEGER,
+        messages INTEGER,
+        highest_modseq INTEGER,
+        updated_at INTEGER
+    )
+    """,
+    # Source folder contents without bodies
+    """
+    CREATE TABLE IF NOT EXISTS folder_manifest (
+        folder_id INTEGER NOT NULL,
+        uid INTEGER NOT NULL,
+        message_size INTEGER,
+        internal_date TEXT,
+        flags TEXT,
+        PRIMARY KEY (folder_id, uid)
+    ) WITHOUT ROWID
+    """,
+    # Folders with batched, possibly uncommitted transfer records; see mark_transferred
+    """
+    CREATE TABLE IF NOT EXISTS unflushed_folders (
+        folder_id INTEGER PRIMARY KEY,
+        opened_at INTEGER
+    )
+    """,
+)
+
+# Statements used per message or per chunk. They are module constants so
+# the connection's statement cache finds them again and each is prepared once.
+_IN_UIDS = ', '.join('?' * LOOKUP_CHUNK)
+SQL_INSERT_MESSAGE = """
+    INSERT INTO transferred_messages (folder_id, uid, dest_uid, message_size, transferred_at)
+    VALUES (?, ?, ?, ?, ?)
+"""
+SQL_IS_TRANSFERRED = "SELECT 1 FROM transferred_messages WHERE folder_id = ? AND uid = ?"
+SQL_TRANSFERRED_UIDS = "SELECT uid FROM transferred_messages WHERE folder_id = ? AND uid >= ?"
+SQL_DEST_UIDS = f"""
+    SELECT uid, dest_uid FROM transferred_messages
+    WHERE folder_id = ? AND dest_uid IS NOT NULL AND uid IN ({_IN_UIDS})
+"""
+SQL_COUNT_UIDS = f"""
+    SELECT COUNT(*), COALESCE(SUM(message_size), 0) FROM transferred_messages
+    WHERE folder_id = ? AND uid IN ({_IN_UIDS})
+"""
+SQL_DELETE_MESSAGE = "DELETE FROM transferred_messages WHERE folder_id = ? AND uid = ?"
+SQL_DELETE_MANIFEST_ENTRY = "DELETE FROM folder_manifest WHERE folder_id = ? AND uid = ?"
+SQL_INSERT_MANIFEST_ENTRY = """
+    INSERT OR REPLACE INTO folder_manifest (folder_id, uid, message_size, internal_date, flags)
+    VALUES (?, ?, ?, ?, ?)
+"""
+SQL_FOLDER_ID = "SELECT folder_id FROM folders WHERE name = ?"
+
+# Copies version 1 tables (renamed with a _v1 suffix) into the version 2
+# schema. Rows whose UIDs are not plain numbers cannot be carried over.
+MIGRATION_V1 = {
+    'transferred_messages': """
+        INSERT OR IGNORE INTO transferred_messages
+        (folder_id, uid, dest_uid, message_size, transferred_at)
+        SELECT f.folder_id, CAST(t.source_uid AS INTEGER),
+               CASE WHEN t.dest_uid GLOB '[0-9]*' AND NOT t.dest_uid GLOB '*[^0-9]*'
+                    THEN CAST(t.dest_uid AS INTEGER) END,
+               t.message_size, CAST(strftime('%s', t.transferred_at) AS INTEGER)
+        FROM transferred_messages_v1 t JOIN folders f ON f.name = t.folder
+        WHERE t.source_uid GLOB '[0-9]*' AND NOT t.source_uid GLOB '*[^0-9]*'
+    """,
+    'folder_state': """
+        INSERT OR IGNORE INTO folder_state
+        (folder_id, uidvalidity, highest_uid, highest_modseq, updated_at)
+        SELECT f.folder_id, s.uidvalidity, s.highest_uid, {highest_modseq},
+               CAST(strftime('%s', s.updated_at) AS INTEGER)
+        FROM folder_state_v1 s JOIN folders f ON f.name = s.folder
+    """,
+    'folder_status': """
+        INSERT OR IGNORE INTO folder_status
+        (folder_id, uidvalidity, uidnext, messages, highest_modseq, updated_at)
+        SELECT f.folder_id, s.uidvalidity, s.uidnext, s.messages, s.highest_modseq,
+               CAST(strftime('%s', s.updated_at) AS INTEGER)
+        FROM folder_status_v1 s JOIN folders f ON f.name = s.folder
+    """,
+    'folder_manifest': """
+        INSERT OR IGNORE INTO folder_manifest
+        (folder_id, uid, message_size, internal_date, flags)
+        SELECT f.folder_id, CAST(m.uid AS INTEGER), m.message_size, m.internal_date, m.flags
+        FROM folder_manifest_v1 m JOIN folders f ON f.name = m.folder
+        WHERE m.uid GLOB '[0-9]*' AND NOT m.uid GLOB '*[^0-9]*'
+    """,
+    'unflushed_folders': """
+        INSERT OR IGNORE INTO unflushed_folders (folder_id, opened_at)
+        SELECT f.folder_id, CAST(strftime('%s', u.opened_at) AS INTEGER)
+        FROM unflushed_folders_v1 u JOIN folders f ON f.name = u.folder
+    """,
+}
+
+
+def _synchronized(method):
+    """
+    Serialize calls on the shared SQLite connection
+    Every cache read and write goes through this lock, so a single
+    CacheManager can be used by parallel transfer workers
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _uid_chunks(uids: List[str]) -> Iterator[List[int]]:
+    """
+    Split UIDs into lists of exactly LOOKUP_CHUNK integers for IN (...) lookups
+    The last chunk is padded by repeating its last UID, which does not
+    change the result of an IN test.
+    
+    Args:
+        uids: Message UIDs
+    
+    Yields:
+        Lists of LOOKUP_CHUNK integer UIDs
+    """
+    numbers = [int(uid) for uid in uids]
+    for start in range(0, len(numbers), LOOKUP_CHUNK):
+        chunk = numbers[start:start + LOOKUP_CHUNK]
+        yield chunk + [chunk[-1]] * (LOOKUP_CHUNK - len(chunk))
 
 
 class CacheManager:
@@ -15,60 +198,162 @@ class CacheManager:
     Provides duplicate detection and resume functionality
     """
     
-    def __init__(self, db_path: str = "transfer_cache.db"):
+    def __init__(self, db_path: str = "transfer_cache.db", commit_every: int = 1,
+                 commit_interval: float = 1.0):
         """
         Initialize CacheManager with database path
         
         Args:
             db_path: Path to SQLite database file
+            commit_every: Commit transfer records in groups of this many
+                messages; 1 commits (and syncs to disk) every message
+            commit_interval: With commit_every above 1, seconds after which a
+                group is committed even if it is not full (0: only when full)
         """
         self.db_path = db_path
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
         self.conn: Optional[sqlite3.Connection] = None
         self.cursor: Optional[sqlite3.Cursor] = None
+        self.migrated_from: Optional[int] = None  # Schema version converted by initialize()
+        self._lock = threading.RLock()
+        self._folder_ids: Dict[str, int] = {}
+        self._unflushed = 0  # Transfer records written but not committed
+        self._flush_timer: Optional[threading.Timer] = None
+        self._open_folders: Set[str] = set()  # Folders journaled in unflushed_folders by this run
+        self.statistics = TransferStatistics()
     
+    @_synchronized
     def initialize(self) -> None:
         """
-        Create database and tables if they don't exist
-        Sets up the transferred_messages table with appropriate schema and indexes
+        Open the database, creating the tables if they don't exist
+        A cache written with the version 1 schema is migrated in a single
+        transaction; migrated_from is set to 1 in that case.
         
         Raises:
             Exception: If database initialization fails
         """
         try:
-            self.conn = sqlite3.connect(self.db_path)
+            # Connection is shared across worker threads, guarded by self._lock
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
             self.cursor = self.conn.cursor()
             
-            # Create transferred_messages table
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS transferred_messages (
-                    source_uid TEXT NOT NULL,
-                    dest_uid TEXT NOT NULL,
-                    folder TEXT NOT NULL,
-                    transferred_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    message_size INTEGER,
-                    PRIMARY KEY (source_uid, folder)
-                )
-            """)
-            
-            # Create indexes for faster queries
-            self.cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_folder 
-                ON transferred_messages(folder)
-            """)
-            
-            self.cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_transferred_at 
-                ON transferred_messages(transferred_at)
-            """)
+            for pragma in PRAGMAS:
+                self.cursor.execute(pragma)
             
-            self.conn.commit()
+            self.cursor.execute("PRAGMA user_version")
+            version = self.cursor.fetchone()[0]
+            if version > SCHEMA_VERSION:
+                raise Exception(
+                    f"Cache database '{self.db_path}' uses schema version {version}, "
+                    f"this program supports up to {SCHEMA_VERSION}"
+                )
             
+            if version < SCHEMA_VERSION:
+                # DDL does not start a transaction implicitly; open one so
+                # a failed migration leaves the old cache untouched
+                self.cursor.execute("BEGIN")
+                try:
+                    if self._has_v1_schema():
+                        self._migrate_v1()
+                        self.migrated_from = 1
+                    else:
+                        for statement in SCHEMA:
+                            self.cursor.execute(statement)
+                    self.cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                    self._commit()
+                except Exception:
+                    self.conn.rollback()
+                    raise
+                
+                if self.migrated_from:
+                    # Give the space of the dropped version 1 tables back;
+                    # in WAL mode the file shrinks at the checkpoint
+                    self.cursor.execute("VACUUM")
+                    self.cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        
         except sqlite3.Error as e:
             raise Exception(f"Failed to initialize cache database at '{self.db_path}': {str(e)}")
         except Exception as e:
             raise Exception(f"Unexpected error initializing cache database: {str(e)}")
 
+    def _has_v1_schema(self) -> bool:
+        """
+        Check whether the database holds version 1 tables
+        
+        Returns:
+            True if transferred_messages exists with the TEXT source_uid column
+        """
+        self.cursor.execute("PRAGMA table_info(transferred_messages)")
+        return 'source_uid' in [row[1] for row in self.cursor.fetchall()]
+    
+    def _migrate_v1(self) -> None:
+        """
+        Convert version 1 tables to the version 2 schema
+        Must run inside a transaction: the old tables are renamed, copied
+        into the new ones and dropped.
+        
+        Raises:
+            sqlite3.Error: If a statement fails
+        """
+        self.cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        old_tables = [name for (name,) in self.cursor.fetchall() if name in MIGRATION_V1]
+        
+        self.cursor.execute("DROP INDEX IF EXISTS idx_folder")
+        self.cursor.execute("DROP INDEX IF EXISTS idx_transferred_at")
+        for table in old_tables:
+            self.cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_v1")
+        
+        for statement in SCHEMA:
+            self.cursor.execute(statement)
+        
+        self.cursor.execute(
+            "INSERT OR IGNORE INTO folders (name) "
+            + " UNION ".join(f"SELECT folder FROM {table}_v1" for table in old_tables)
+        )
+        
+        for table in old_tables:
+            statement = MIGRATION_V1[table]
+            if table == 'folder_state':
+                # Caches created before delta sync lack the highest_modseq column
+                self.cursor.execute("PRAGMA table_info(folder_state_v1)")
+                has_modseq = 'highest_modseq' in [row[1] for row in self.cursor.fetchall()]
+                statement = statement.format(highest_modseq='s.highest_modseq' if has_modseq else 'NULL')
+            self.cursor.execute(statement)
+            self.cursor.execute(f"DROP TABLE {table}_v1")
     
+    def _folder_id(self, folder: str, create: bool = False) -> Optional[int]:
+        """
+        Look up the id of a folder in the folders table
+        
+        Args:
+            folder: Folder name
+            create: Add the folder if it is not known yet
+        
+        Returns:
+            Folder id, or None if the folder is unknown and create is False
+        
+        Raises:
+            sqlite3.Error: If the lookup or insert fails
+        """
+        folder_id = self._folder_ids.get(folder)
+        if folder_id is not None:
+            return folder_id
+        
+        self.cursor.execute(SQL_FOLDER_ID, (folder,))
+        row = self.cursor.fetchone()
+        if row:
+            folder_id = row[0]
+        elif create:
+            self.cursor.execute("INSERT INTO folders (name) VALUES (?)", (folder,))
+            folder_id = self.cursor.lastrowid
+        else:
+            return None
+        
+        self._folder_ids[folder] = folder_id
+        return folder_id
+    
+    @_synchronized
     def is_transferred(self, source_uid: str, folder: str) -> bool:
         """
         Check if a message has already been transferred
@@ -76,7 +361,7 @@ class CacheManager:
         Args:
             source_uid: Source message UID
             folder: Folder name
-            
+        
         Returns:
             True if message already transferred, False otherwise
             Returns False if database query fails
@@ -85,27 +370,30 @@ class CacheManager:
             return False
         
         try:
+            folder_id = self._folder_id(folder)
+            if folder_id is None:
+                return False
+            
             # Use parameterized query to prevent SQL injection
-            self.cursor.execute(
-                "SELECT 1 FROM transferred_messages WHERE source_uid = ? AND folder = ?",
-                (source_uid, folder)
-            )
+            self.cursor.execute(SQL_IS_TRANSFERRED, (folder_id, int(source_uid)))
             
             return self.cursor.fetchone() is not None
-            
+        
         except sqlite3.Error as e:
             # Log error but don't crash - return False to allow transfer attempt
             return False
         except Exception:
             return False
     
-    def get_transferred_uids(self, folder: str) -> List[str]:
+    @_synchronized
+    def get_transferred_uids(self, folder: str, min_uid: int = 1) -> List[str]:
         """
         Retrieve all transferred UIDs for a specific folder
         
         Args:
             folder: Folder name
-            
+            min_uid: Only return UIDs greater than or equal to this value
+        
         Returns:
             List of transferred source UIDs
             Returns empty list if database query fails
@@ -114,15 +402,16 @@ class CacheManager:
             return []
         
         try:
-            # Use parameterized query to prevent SQL injection
-            self.cursor.execute(
-                "SELECT source_uid FROM transferred_messages WHERE folder = ?",
-                (folder,)
-            )
+            folder_id = self._folder_id(folder)
+            if folder_id is None:
+                return []
             
-            results = self.cursor.fetchall()
-            return [row[0] for row in results]
+            # A range scan of the (folder_id, uid) key
+            self.cursor.execute(SQL_TRANSFERRED_UIDS, (folder_id, min_uid))
             
+            results = self.cursor.fetchall()
+            return [str(row[0]) for row in results]
+        
         except sqlite3.Error as e:
             # Return empty list on error - will cause all messages to be transferred
             return []
@@ -130,17 +419,24 @@ class CacheManager:
             return []
 
     
+    @_synchronized
     def mark_transferred(self, source_uid: str, dest_uid: str, folder: str, 
                         message_size: Optional[int] = None) -> None:
         """
         Mark a message as transferred by inserting a record
+        With commit_every above 1, records are committed in groups of
+        commit_every messages or after commit_interval seconds, whichever
+        comes first, so a crash loses at most the last group. The first
+        record of a folder is committed at once together with an entry in
+        unflushed_folders; the entry stays until finish_folder() or close(),
+        so the next run knows which folders to check with needs_verification().
         
         Args:
             source_uid: Source message UID
-            dest_uid: Destination message UID
+            dest_uid: Destination message UID ('' or None if unknown)
             folder: Folder name
             message_size: Optional message size in bytes
-            
+        
         Raises:
             Exception: If database insert fails
         """
@@ -148,19 +444,43 @@ class CacheManager:
             raise Exception("Cache database not initialized")
         
         try:
+            folder_id = self._folder_id(folder, create=True)
+            
             # Insert new record with current timestamp
             self.cursor.execute(
-                """
-                INSERT INTO transferred_messages 
-                (source_uid, dest_uid, folder, transferred_at, message_size)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                (source_uid, dest_uid, folder, datetime.now(), message_size)
+                SQL_INSERT_MESSAGE,
+                (
+                    folder_id, int(source_uid), int(dest_uid) if str(dest_uid or '').isdigit() else None,
+                    message_size, int(time.time())
+                )
             )
             
-            # Commit immediately for crash safety
-            self.conn.commit()
+            self.statistics.record(folder, message_size or 0)
+            if not self.statistics.is_loaded(folder):
+                self._load_statistics(folder)
             
+            if self.commit_every <= 1:
+                # Commit immediately for crash safety
+                self._commit()
+                return
+            
+            if folder not in self._open_folders:
+                self.cursor.execute(
+                    "INSERT OR REPLACE INTO unflushed_folders (folder_id, opened_at) VALUES (?, ?)",
+                    (folder_id, int(time.time()))
+                )
+                self._open_folders.add(folder)
+                self._commit()
+                return
+            
+            self._unflushed += 1
+            if self._unflushed >= self.commit_every:
+                self._commit()
+            elif self._flush_timer is None and self.commit_interval > 0:
+                self._flush_timer = threading.Timer(self.commit_interval, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        
         except sqlite3.IntegrityError as e:
             # Duplicate entry - message already marked as transferred
             # This is not a critical error, just log it
@@ -171,13 +491,439 @@ class CacheManager:
             raise Exception(f"Unexpected error marking message as transferred: {str(e)}")
 
     
+    @_synchronized
+    def flush(self) -> None:
+        """
+        Commit batched transfer records now
+        
+        Raises:
+            Exception: If the commit fails
+        """
+        if not self.conn or not self._unflushed:
+            return
+        
+        try:
+            self._commit()
+        except sqlite3.Error as e:
+            raise Exception(f"Database error committing transfer records: {str(e)}")
+    
+    @_synchronized
+    def finish_folder(self, folder: str) -> None:
+        """
+        Commit batched transfer records and remove the folder's entry in
+        unflushed_folders; called when a pass over the folder has ended
+        
+        Args:
+            folder: Folder name
+        
+        Raises:
+            Exception: If database write fails
+        """
+        if not self.cursor or not self.conn:
+            raise Exception("Cache database not initialized")
+        
+        try:
+            folder_id = self._folder_id(folder)
+            if folder_id is not None:
+                self.cursor.execute("DELETE FROM unflushed_folders WHERE folder_id = ?", (folder_id,))
+            self._commit()
+            self._open_folders.discard(folder)
+        
+        except sqlite3.Error as e:
+            raise Exception(f"Database error finishing folder '{folder}': {str(e)}")
+    
+    @_synchronized
+    def needs_verification(self, folder: str) -> bool:
+        """
+        Check whether an earlier run may have lost transfer records of a folder
+        True if that run batched commits and stopped without finishing the
+        folder: its last group of messages may be on the destination
+        without being recorded here.
+        
+        Args:
+            folder: Folder name
+        
+        Returns:
+            True if uncached messages of the folder must be looked up on
+            the destination before transferring them
+        """
+        if not self.cursor or folder in self._open_folders:
+            return False
+        
+        try:
+            folder_id = self._folder_id(folder)
+            if folder_id is None:
+                return False
+            self.cursor.execute("SELECT 1 FROM unflushed_folders WHERE folder_id = ?", (folder_id,))
+            return self.cursor.fetchone() is not None
+        
+        except sqlite3.Error:
+            return False
+    
+    @_synchronized
+    def get_highest_dest_uid(self, folder: str) -> int:
+        """
+        Get the highest destination UID recorded for a folder
+        
+        Args:
+            folder: Folder name
+        
+        Returns:
+            Highest recorded destination UID, 0 if none is known
+        """
+        if not self.cursor:
+            return 0
+        
+        try:
+            folder_id = self._folder_id(folder)
+            if folder_id is None:
+                return 0
+            self.cursor.execute(
+                "SELECT MAX(dest_uid) FROM transferred_messages WHERE folder_id = ?",
+                (folder_id,)
+            )
+            row = self.cursor.fetchone()
+            return row[0] if row and row[0] else 0
+        
+        except sqlite3.Error:
+            return 0
+    
+    @_synchronized
+    def get_dest_uids(self, folder: str, source_uids: List[str]) -> Dict[str, str]:
+        """
+        Look up the destination UIDs recorded for transferred messages
+        
+        Args:
+            folder: Folder name
+            source_uids: Source message UIDs
+        
+        Returns:
+            Dictionary mapping source UID to destination UID; messages that
+            were not transferred or whose destination UID is unknown are omitted
+        """
+        if not self.cursor:
+            return {}
+        
+        dest_uids = {}
+        
+        try:
+            folder_id = self._folder_id(folder)
+            if folder_id is None:
+                return {}
+            
+            for chunk in _uid_chunks(source_uids):
+                self.cursor.execute(SQL_DEST_UIDS, (folder_id, *chunk))
+                dest_uids.update((str(uid), str(dest_uid)) for uid, dest_uid in self.cursor.fetchall())
+            
+            return dest_uids
+        
+        except sqlite3.Error:
+            return {}
+    
+    @_synchronized
+    def forget_messages(self, folder: str, source_uids: List[str]) -> None:
+        """
+        Remove transfer records of messages expunged from the source
+        
+        Args:
+            folder: Folder name
+            source_uids: Source message UIDs
+        
+        Raises:
+            Exception: If database write fails
+        """
+        if not self.cursor or not self.conn:
+            raise Exception("Cache database not initialized")
+        
+        # A rollback below must not discard batched transfer records
+        if self._unflushed:
+            self._commit()
+        
+        try:
+            folder_id = self._folder_id(folder)
+            if folder_id is None:
+                return
+            
+            forgotten, forgotten_size = 0, 0
+            for chunk in _uid_chunks(source_uids):
+                self.cursor.execute(SQL_COUNT_UIDS, (folder_id, *chunk))
+                count, size = self.cursor.fetchone()
+                forgotten += count
+                forgotten_size += size
+            
+            self.cursor.executemany(
+                SQL_DELETE_MESSAGE, ((folder_id, int(uid)) for uid in source_uids)
+            )
+            self.cursor.executemany(
+                SQL_DELETE_MANIFEST_ENTRY, ((folder_id, int(uid)) for uid in source_uids)
+            )
+            self._commit()
+            self.statistics.forget(folder, forgotten, forgotten_size)
+        
+        except sqlite3.Error as e:
+            self._rollback()
+            raise Exception(f"Database error removing messages of folder '{folder}': {str(e)}")
+    
+    @_synchronized
+    def get_folder_state(self, folder: str) -> Optional[Tuple[int, int, Optional[int]]]:
+        """
+        Get the incremental sync state of a folder
+        
+        Args:
+            folder: Folder name
+        
+        Returns:
+            Tuple of (uidvalidity, highest_uid, highest_modseq), or None if the
+            folder has no state. Every message with UID <= highest_uid has been
+            transferred; highest_modseq is None when the source lacks CONDSTORE.
+        """
+        if not self.cursor:
+            return None
+        
+        try:
+            folder_id = self._folder_id(folder)
+            if folder_id is None:
+                return None
+            self.cursor.execute(
+                "SELECT uidvalidity, highest_uid, highest_modseq FROM folder_state WHERE folder_id = ?",
+                (folder_id,)
+            )
+            row = self.cursor.fetchone()
+            return (row[0], row[1], row[2]) if row else None
+        
+        except sqlite3.Error:
+            return None
+    
+    @_synchronized
+    def set_folder_state(self, folder: str, uidvalidity: int, highest_uid: int,
+                         highest_modseq: Optional[int] = None) -> None:
+        """
+        Store UIDVALIDITY and the incremental sync watermark of a folder
+        
+        Args:
+            folder: Folder name
+            uidvalidity: UIDVALIDITY of the source folder
+            highest_uid: Highest UID below which every message is transferred
+            highest_modseq: HIGHESTMODSEQ up to which flag changes are synced
+        
+        Raises:
+            Exception: If database write fails
+        """
+        if not self.cursor or not self.conn:
+            raise Exception("Cache database not initialized")
+        
+        try:
+            self.cursor.execute(
+                """
+                INSERT OR REPLACE INTO folder_state
+                (folder_id, uidvalidity, highest_uid, highest_modseq, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (self._folder_id(folder, create=True), uidvalidity, highest_uid,
+                 highest_modseq, int(time.time()))
+            )
+            self._commit()
+        
+        except sqlite3.Error as e:
+            raise Exception(f"Database error saving state for folder '{folder}': {str(e)}")
+    
+    @_synchronized
+    def get_folder_status(self, folder: str) -> Optional[Dict[str, int]]:
+        """
+        Get the source STATUS recorded after the last complete sync of a folder
+        
+        Args:
+            folder: Folder name
+        
+        Returns:
+            Dictionary of STATUS items (MESSAGES, UIDNEXT, UIDVALIDITY and,
+            if known, HIGHESTMODSEQ), or None if nothing is recorded
+        """
+        if not self.cursor:
+            return None
+        
+        try:
+            folder_id = self._folder_id(folder)
+            if folder_id is None:
+                return None
+            self.cursor.execute(
+                """
+                SELECT uidvalidity, uidnext, messages, highest_modseq
+                FROM folder_status WHERE folder_id = ?
+                """,
+                (folder_id,)
+            )
+            row = self.cursor.fetchone()
+        
+        except sqlite3.Error:
+            return None
+        
+        if not row:
+            return None
+        
+        names = ('UIDVALIDITY', 'UIDNEXT', 'MESSAGES', 'HIGHESTMODSEQ')
+        return {name: value for name, value in zip(names, row) if value is not None}
+    
+    @_synchronized
+    def set_folder_status(self, folder: str, status: Dict[str, int]) -> None:
+        """
+        Record the source STATUS of a folder that was synced completely
+        
+        Args:
+            folder: Folder name
+            status: STATUS items as returned by IMAPClient.folder_status
+        
+        Raises:
+            Exception: If database write fails
+        """
+        if not self.cursor or not self.conn:
+            raise Exception("Cache database not initialized")
+        
+        try:
+            self.cursor.execute(
+                """
+                INSERT OR REPLACE INTO folder_status
+                (folder_id, uidvalidity, uidnext, messages, highest_modseq, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    self._folder_id(folder, create=True), status.get('UIDVALIDITY'),
+                    status.get('UIDNEXT'), status.get('MESSAGES'), status.get('HIGHESTMODSEQ'),
+                    int(time.time())
+                )
+            )
+            self._commit()
+        
+        except sqlite3.Error as e:
+            raise Exception(f"Database error saving status for folder '{folder}': {str(e)}")
+    
+    @_synchronized
+    def invalidate_folder(self, folder: str) -> None:
+        """
+        Forget everything cached for a folder
+        Used when the source UIDVALIDITY changed and cached UIDs no longer
+        identify the same messages
+        
+        Args:
+            folder: Folder name
+        
+        Raises:
+            Exception: If database write fails
+        """
+        if not self.cursor or not self.conn:
+            raise Exception("Cache database not initialized")
+        
+        # A rollback below must not discard batched transfer records
+        if self._unflushed:
+            self._commit()
+        
+        try:
+            folder_id = self._folder_id(folder)
+            if folder_id is not None:
+                for table in ('transferred_messages', 'folder_manifest', 'folder_state', 'folder_status'):
+                    self.cursor.execute(f"DELETE FROM {table} WHERE folder_id = ?", (folder_id,))
+                self._commit()
+            self.statistics.reset(folder)
+        
+        except sqlite3.Error as e:
+            self._rollback()
+            raise Exception(f"Database error invalidating folder '{folder}': {str(e)}")
+    
+    @_synchronized
+    def save_manifest(self, folder: str, entries: List[ManifestEntry],
+                      replace_all: bool = True) -> None:
+        """
+        Store the manifest of a folder
+        Only new, changed and vanished entries are written, so a full scan
+        of an unchanged folder costs one read of the stored manifest.
+        
+        Args:
+            folder: Folder name
+            entries: Manifest entries
+            replace_all: Entries not in the list are removed (full manifest);
+                False adds or updates entries (incremental manifest)
+        
+        Raises:
+            Exception: If database write fails
+        """
+        if not self.cursor or not self.conn:
+            raise Exception("Cache database not initialized")
+        
+        # A rollback below must not discard batched transfer records
+        if self._unflushed:
+            self._commit()
+        
+        try:
+            folder_id = self._folder_id(folder, create=True)
+            self.cursor.execute(
+                "SELECT uid, message_size, internal_date, flags FROM folder_manifest WHERE folder_id = ?",
+                (folder_id,)
+            )
+            stored = {row[0]: row[1:] for row in self.cursor.fetchall()}
+            
+            rows = []
+            for entry in entries:
+                uid = int(entry.uid)
+                row = (entry.size, entry.internal_date, ' '.join(entry.flags))
+                if stored.pop(uid, None) != row:
+                    rows.append((folder_id, uid) + row)
+            
+            self.cursor.executemany(SQL_INSERT_MANIFEST_ENTRY, rows)
+            if replace_all and stored:
+                self.cursor.executemany(
+                    SQL_DELETE_MANIFEST_ENTRY, ((folder_id, uid) for uid in stored)
+                )
+            self._commit()
+        
+        except sqlite3.Error as e:
+            self._rollback()
+            raise Exception(f"Database error saving manifest for folder '{folder}': {str(e)}")
+    
+    @_synchronized
+    def get_manifest(self, folder: str) -> List[ManifestEntry]:
+        """
+        Retrieve the stored manifest of a folder
+        
+        Args:
+            folder: Folder name
+        
+        Returns:
+            Manifest entries ordered by UID
+            Returns empty list if no manifest is stored or query fails
+        """
+        if not self.cursor:
+            return []
+        
+        try:
+            folder_id = self._folder_id(folder)
+            if folder_id is None:
+                return []
+            self.cursor.execute(
+                """
+                SELECT uid, message_size, internal_date, flags
+                FROM folder_manifest
+                WHERE folder_id = ?
+                ORDER BY uid
+                """,
+                (folder_id,)
+            )
+            
+            return [
+                ManifestEntry(str(uid), size or 0, internal_date or '', flags.split() if flags else [])
+                for uid, size, internal_date, flags in self.cursor.fetchall()
+            ]
+        
+        except sqlite3.Error:
+            return []
+    
+    @_synchronized
     def get_statistics(self, folder: Optional[str] = None) -> Dict[str, int]:
         """
         Get transfer statistics
         
         Args:
             folder: Optional folder name to filter by. If None, returns stats for all folders
-            
+        
         Returns:
             Dictionary with statistics (total_transferred, total_size, etc.)
             Returns default values if database query fails
@@ -185,25 +931,19 @@ class CacheManager:
         if not self.cursor:
             return {"total_transferred": 0, "total_size": 0}
         
+        if folder:
+            # Kept in memory, so callers may ask after every message
+            stats = self.folder_statistics(folder)
+            return {"total_transferred": stats.stored_messages, "total_size": stats.stored_bytes}
+        
         try:
-            if folder:
-                # Get statistics for specific folder
-                self.cursor.execute(
-                    """
-                    SELECT COUNT(*), COALESCE(SUM(message_size), 0)
-                    FROM transferred_messages 
-                    WHERE folder = ?
-                    """,
-                    (folder,)
-                )
-            else:
-                # Get statistics for all folders
-                self.cursor.execute(
-                    """
-                    SELECT COUNT(*), COALESCE(SUM(message_size), 0)
-                    FROM transferred_messages
-                    """
-                )
+            # Get statistics for all folders
+            self.cursor.execute(
+                """
+                SELECT COUNT(*), COALESCE(SUM(message_size), 0)
+                FROM transferred_messages
+                """
+            )
             
             result = self.cursor.fetchone()
             count, total_size = result if result else (0, 0)
@@ -213,31 +953,105 @@ class CacheManager:
                 "total_size": total_size if total_size else 0
             }
             
-            # If no folder specified, also get per-folder breakdown
-            if not folder:
-                self.cursor.execute(
-                    """
-                    SELECT folder, COUNT(*) 
-                    FROM transferred_messages 
-                    GROUP BY folder
-                    """
-                )
-                folder_counts = self.cursor.fetchall()
-                for folder_name, count in folder_counts:
-                    stats[f"folder_{folder_name}"] = count
+            # Also get per-folder breakdown
+            self.cursor.execute(
+                """
+                SELECT f.name, COUNT(*)
+                FROM transferred_messages t JOIN folders f ON f.folder_id = t.folder_id
+                GROUP BY t.folder_id
+                """
+            )
+            folder_counts = self.cursor.fetchall()
+            for folder_name, count in folder_counts:
+                stats[f"folder_{folder_name}"] = count
             
             return stats
-            
+        
         except sqlite3.Error as e:
             # Return default values on error
             return {"total_transferred": 0, "total_size": 0}
         except Exception:
             return {"total_transferred": 0, "total_size": 0}
     
+    @_synchronized
+    def folder_statistics(self, folder: str) -> FolderStatistics:
+        """
+        Get the running statistics of a folder
+        The folder's cache totals are queried once; afterwards they are
+        kept in memory and updated as messages are recorded or forgotten.
+        
+        Args:
+            folder: Folder name
+        
+        Returns:
+            Copy of the folder's counters
+        """
+        if self.cursor and not self.statistics.is_loaded(folder):
+            try:
+                self._load_statistics(folder)
+            except sqlite3.Error:
+                pass
+        
+        return self.statistics.folder(folder)
+    
+    def _load_statistics(self, folder: str) -> None:
+        """
+        Read the cache totals of a folder into the running statistics
+        
+        Args:
+            folder: Folder name
+        
+        Raises:
+            sqlite3.Error: If the query fails
+        """
+        folder_id = self._folder_id(folder)
+        if folder_id is None:
+            self.statistics.load(folder, 0, 0)
+            return
+        
+        self.cursor.execute(
+            """
+            SELECT COUNT(*), COALESCE(SUM(message_size), 0)
+            FROM transferred_messages
+            WHERE folder_id = ?
+            """,
+            (folder_id,)
+        )
+        count, total_size = self.cursor.fetchone()
+        self.statistics.load(folder, count, total_size)
+    
+    def _commit(self) -> None:
+        """Commit the open transaction, including batched transfer records"""
+        self.conn.commit()
+        self._unflushed = 0
+        if self._flush_timer:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+    
+    def _rollback(self) -> None:
+        """Roll back the open transaction, forgetting folder ids it may have added"""
+        self.conn.rollback()
+        self._folder_ids.clear()
+    
+    @_synchronized
     def close(self) -> None:
         """
         Properly close database connection
+        Batched transfer records are committed first; as nothing is lost,
+        the folders of this run no longer need verification.
         """
+        if self.conn:
+            try:
+                self.cursor.executemany(
+                    "DELETE FROM unflushed_folders WHERE folder_id = ?",
+                    ((self._folder_ids[folder],) for folder in self._open_folders
+                     if folder in self._folder_ids)
+                )
+                self._commit()
+                self._open_folders.clear()
+            except sqlite3.Error:
+                pass
+        
         if self.cursor:
             self.cursor.close()
             self.cursor = None
@@ -25,7 +25,32 @@ class TransferConfig:
     retry_delay: int = 5
     log_file: str = "transfer.log"
     cache_db: str = "transfer_cache.db"
+    cache_commit_every: int = 1
+    cache_commit_interval: int = 1000  # milliseconds
     max_message_size: int = 52428800  # 50MB in bytes
+    fetch_batch_size: int = 50
+    fetch_batch_bytes: int = 20971520  # 20MB in bytes
+    append_pipeline_depth: int = 8
+    pipeline: bool = False
+    pipeline_queue_bytes: int = 41943040  # 40MB in bytes
+    workers: int = 1
+    parallel_folders: int = 1
+    max_connections_per_host: int = 10
+    auto_mode: bool = False
+    use_asyncio: bool = False
+    sync_expunges: bool = False
+    follow: bool = False
+    poll_interval: int = 60
+    source_compress: bool = True
+    dest_compress: bool = True
+    binary: bool = False
+    spool_threshold: int = 10485760
+    fetch_chunk_size: int = 8388608
+    adaptive: bool = False
+    max_rate: int = 0
+    source_max_rate: int = 0
+    dest_max_rate: int = 0
+    bandwidth_schedule: Optional[str] = None
 
 
 
@@ -76,6 +101,81 @@ def validate_config(config: TransferConfig) -> bool:
     if not isinstance(config.max_message_size, int) or config.max_message_size < 1:
         raise ConfigValidationError(f"Invalid max_message_size: {config.max_message_size}. Must be a positive integer")
     
+    if not isinstance(config.spool_threshold, int) or config.spool_threshold < 0:
+        raise ConfigValidationError(f"Invalid spool_threshold: {config.spool_threshold}. Must be a non-negative integer")
+    
+    if not isinstance(config.fetch_chunk_size, int) or config.fetch_chunk_size < 0:
+        raise ConfigValidationError(f"Invalid fetch_chunk_size: {config.fetch_chunk_size}. Must be a non-negative integer")
+    
+    # Validate cache commit grouping
+    if not isinstance(config.cache_commit_every, int) or config.cache_commit_every < 1:
+        raise ConfigValidationError(f"Invalid cache_commit_every: {config.cache_commit_every}. Must be a positive integer")
+    
+    if not isinstance(config.cache_commit_interval, int) or config.cache_commit_interval < 0:
+        raise ConfigValidationError(f"Invalid cache_commit_interval: {config.cache_commit_interval}. Must be a non-negative integer")
+    
+    # Validate bandwidth limits
+    for name in ('max_rate', 'source_max_rate', 'dest_max_rate'):
+        value = getattr(config, name)
+        if not isinstance(value, int) or value < 0:
+            raise ConfigValidationError(f"Invalid {name}: {value}. Must be a non-negative integer")
+    
+    if config.bandwidth_schedule and not os.path.isfile(config.bandwidth_schedule):
+        raise ConfigValidationError(f"Bandwidth schedule file not found: {config.bandwidth_schedule}")
+    
+    # Validate fetch batch limits
+    if not isinstance(config.fetch_batch_size, int) or config.fetch_batch_size < 1:
+        raise ConfigValidationError(f"Invalid fetch_batch_size: {config.fetch_batch_size}. Must be a positive integer")
+    
+    if not isinstance(config.fetch_batch_bytes, int) or config.fetch_batch_bytes < 1:
+        raise ConfigValidationError(f"Invalid fetch_batch_bytes: {config.fetch_batch_bytes}. Must be a positive integer")
+    
+    # Validate append pipeline depth
+    if not isinstance(config.append_pipeline_depth, int) or config.append_pipeline_depth < 1:
+        raise ConfigValidationError(f"Invalid append_pipeline_depth: {config.append_pipeline_depth}. Must be a positive integer")
+    
+    # Validate pipeline queue size
+    if not isinstance(config.pipeline_queue_bytes, int) or config.pipeline_queue_bytes < 1:
+        raise ConfigValidationError(f"Invalid pipeline_queue_bytes: {config.pipeline_queue_bytes}. Must be a positive integer")
+    
+    # Validate worker count
+    if not isinstance(config.workers, int) or config.workers < 1:
+        raise ConfigValidationError(f"Invalid workers: {config.workers}. Must be a positive integer")
+    
+    # Validate parallel folder settings
+    if not isinstance(config.parallel_folders, int) or config.parallel_folders < 1:
+        raise ConfigValidationError(f"Invalid parallel_folders: {config.parallel_folders}. Must be a positive integer")
+    
+    if not isinstance(config.max_connections_per_host, int) or config.max_connections_per_host < 1:
+        raise ConfigValidationError(f"Invalid max_connections_per_host: {config.max_connections_per_host}. Must be a positive integer")
+    
+    # Validate follow mode settings
+    if not isinstance(config.poll_interval, int) or config.poll_interval < 1:
+        raise ConfigValidationError(f"Invalid poll_interval: {config.poll_interval}. Must be a positive integer")
+    
+    # The asyncio engine transfers one folder, over `workers` session pairs
+    if config.auto_mode and config.use_asyncio:
+        raise ConfigValidationError("auto mode is not supported with the asyncio engine")
+    
+    if config.sync_expunges and config.use_asyncio:
+        raise ConfigValidationError("expunge sync is not supported with the asyncio engine")
+    
+    if config.follow and config.use_asyncio:
+        raise ConfigValidationError("follow mode is not supported with the asyncio engine")
+    
+    if config.binary and config.use_asyncio:
+        raise ConfigValidationError("binary mode is not supported with the asyncio engine")
+    
+    if config.adaptive and config.use_asyncio:
+        raise ConfigValidationError("adaptive mode is not supported with the asyncio engine")
+    
+    if config.cache_commit_every > 1 and config.use_asyncio:
+        raise ConfigValidationError("batched cache commits are not supported with the asyncio engine")
+    
+    if config.use_asyncio and (config.max_rate or config.source_max_rate or
+                               config.dest_max_rate or config.bandwidth_schedule):
+        raise ConfigValidationError("bandwidth limits are not supported with the asyncio engine")
+    
     return True
 
 
@@ -113,7 +213,32 @@ def load_config_from_args(args: argparse.Namespace) -> TransferConfig:
         retry_delay=getattr(args, 'retry_delay', 5),
         log_file=getattr(args, 'log_file', 'transfer.log'),
         cache_db=getattr(args, 'cache_db', 'transfer_cache.db'),
-        max_message_size=getattr(args, 'max_message_size', 52428800)
+        cache_commit_every=getattr(args, 'cache_commit_every', 1),
+        cache_commit_interval=getattr(args, 'cache_commit_interval', 1000),
+        max_message_size=getattr(args, 'max_message_size', 52428800),
+        fetch_batch_size=getattr(args, 'fetch_batch_size', 50),
+        fetch_batch_bytes=getattr(args, 'fetch_batch_bytes', 20971520),
+        append_pipeline_depth=getattr(args, 'append_pipeline_depth', 8),
+        pipeline=getattr(args, 'pipeline', False),
+        pipeline_queue_bytes=getattr(args, 'pipeline_queue_bytes', 41943040),
+        workers=getattr(args, 'workers', 1),
+        parallel_folders=getattr(args, 'parallel_folders', 1),
+        max_connections_per_host=getattr(args, 'max_connections_per_host', 10),
+        auto_mode=getattr(args, 'auto_mode', False),
+        use_asyncio=getattr(args, 'use_asyncio', False),
+        sync_expunges=getattr(args, 'sync_expunges', False),
+        follow=getattr(args, 'follow', False),
+        poll_interval=getattr(args, 'poll_interval', 60),
+        source_compress=getattr(args, 'source_compress', True),
+        dest_compress=getattr(args, 'dest_compress', True),
+        binary=getattr(args, 'binary', False),
+        spool_threshold=getattr(args, 'spool_threshold', 10485760),
+        fetch_chunk_size=getattr(args, 'fetch_chunk_size', 8388608),
+        adaptive=getattr(args, 'adaptive', False),
+        max_rate=getattr(args, 'max_rate', 0),
+        source_max_rate=getattr(args, 'source_max_rate', 0),
+        dest_max_rate=getattr(args, 'dest_max_rate', 0),
+        bandwidth_schedule=getattr(args, 'bandwidth_schedule', None)
     )
     
     # Validate the configuration
@@ -0,0 +1,183 @@
+"""
+Connection Pool Module
+Reusable, health-checked IMAP connections for one server and account
+"""
+
+import logging
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from .imap_client import IMAPClient
+from .utils import CircuitBreaker, IMAPConnectionError
+
+
+# Idle pooled connections get a NOOP this often; servers may drop clients
+# that stay silent for 30 minutes (RFC 3501 section 5.4)
+KEEPALIVE_INTERVAL = 5 * 60
+
+
+class ConnectionPool:
+    """
+    Pool of connections cloned from one IMAPClient
+    Connections handed back with release() are kept open, sent NOOP while
+    idle and checked again before acquire() hands them out, so parallel
+    workers of consecutive folders reuse sessions instead of logging in
+    again. ensure_healthy() also repairs connections that are in use,
+    including the template client itself. All connections of the pool
+    share one circuit breaker, so throttling seen by one worker pauses them all.
+    """
+    
+    def __init__(self, client: IMAPClient, logger: Optional[logging.Logger] = None,
+                 keepalive_interval: float = KEEPALIVE_INTERVAL):
+        """
+        Initialize pool
+        
+        Args:
+            client: Client whose server and account new connections use
+            logger: Optional logger for reconnect messages
+            keepalive_interval: Seconds between NOOPs on idle connections
+        """
+        self.client = client
+        self.logger = logger or logging.getLogger(__name__)
+        self.keepalive_interval = keepalive_interval
+        self._idle: List[Tuple[IMAPClient, float]] = []  # (client, released at)
+        self._lock = threading.Lock()
+        self._stop_event: Optional[threading.Event] = None
+        self._keepalive_thread: Optional[threading.Thread] = None
+        self.circuit_breaker = CircuitBreaker(client.host, logger=self.logger)
+    
+    def acquire(self, folder: Optional[str] = None) -> IMAPClient:
+        """
+        Hand out a working connection, reusing an idle one when possible
+        
+        Args:
+            folder: Folder to select on the connection, None to leave it as is
+        
+        Returns:
+            Connected IMAPClient, to be given back with release()
+        
+        Raises:
+            IMAPConnectionError: If a new connection cannot be opened
+            IMAPFolderError: If the folder cannot be selected
+        """
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                client, _ = self._idle.pop()
+            
+            try:
+                self.ensure_healthy(client)
+                if folder:
+                    client.select_folder(folder)
+                return client
+            except Exception as e:
+                self.logger.debug(f"Discarding pooled connection to {client.host}: {str(e)}")
+                client.disconnect()
+        
+        client = self.client.clone()
+        try:
+            client.connect()
+            if folder:
+                client.select_folder(folder)
+        except Exception:
+            client.disconnect()
+            raise
+        
+        return client
+    
+    def release(self, client: IMAPClient) -> None:
+        """
+        Take a connection back for later acquire() calls
+        Disconnected clients are dropped.
+        
+        Args:
+            client: Client obtained from acquire()
+        """
+        if not client.connected:
+            return
+        
+        with self._lock:
+            self._idle.append((client, time.monotonic()))
+            if self._keepalive_thread is None:
+                self._stop_event = threading.Event()
+                self._keepalive_thread = threading.Thread(
+                    target=self._keepalive, args=(self._stop_event,),
+                    name="imap-pool-keepalive", daemon=True
+                )
+                self._keepalive_thread.start()
+    
+    def ensure_healthy(self, client: IMAPClient) -> bool:
+        """
+        Check a connection with NOOP and reconnect it if it is broken
+        A reconnect selects the previously selected folder again.
+        
+        Args:
+            client: Client to check
+        
+        Returns:
+            True if the client had to reconnect, False if it was healthy
+        
+        Raises:
+            IMAPConnectionError: If reconnecting fails
+            IMAPFolderError: If the folder cannot be selected again
+        """
+        try:
+            if client.noop():
+                return False
+        except IMAPConnectionError:
+            pass
+        
+        self.logger.warning(f"Connection to {client.host} is broken, reconnecting")
+        client.reconnect()
+        self.logger.info(f"Reconnected to {client.host}")
+        
+        return True
+    
+    def close(self) -> None:
+        """
+        Disconnect all idle connections and stop the keepalive thread
+        The pool stays usable; later acquire() calls open new connections.
+        """
+        with self._lock:
+            idle = [client for client, _ in self._idle]
+            self._idle = []
+            thread, self._keepalive_thread = self._keepalive_thread, None
+            if self._stop_event:
+                self._stop_event.set()
+        
+        if thread:
+            thread.join(timeout=5)
+        for client in idle:
+            client.disconnect()
+    
+    def _keepalive(self, stop_event: threading.Event) -> None:
+        """
+        Keepalive thread: NOOP connections idle for keepalive_interval
+        Connections that fail the NOOP are disconnected and dropped.
+        
+        Args:
+            stop_event: Set by close() to end the thread
+        """
+        while not stop_event.wait(self.keepalive_interval / 2):
+            now = time.monotonic()
+            with self._lock:
+                due = [entry for entry in self._idle if now - entry[1] >= self.keepalive_interval]
+                self._idle = [entry for entry in self._idle if entry not in due]
+            
+            for client, _ in due:
+                try:
+                    alive = client.noop()
+                except IMAPConnectionError:
+                    alive = False
+                
+                if alive:
+                    with self._lock:
+                        # close() may have emptied the pool in the meantime
+                        if not stop_event.is_set():
+                            self._idle.append((client, time.monotonic()))
+                            continue
+                else:
+                    self.logger.debug(f"Dropping idle connection to {client.host} that failed NOOP")
+                client.disconnect()
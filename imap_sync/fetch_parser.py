@@ -0,0 +1,444 @@
+"""
+Fetch Parser Module
+Streaming reader for IMAP FETCH responses
+"""
+
+import imaplib
+import re
+import tempfile
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .utils import SpooledMessage, SPOOL_CHUNK_SIZE
+
+
+# Initial size of the receive buffer; it only grows for lines longer than this
+RECEIVE_BUFFER_SIZE = 65536
+
+# Start of a FETCH response: "* <seq> FETCH ("
+FETCH_RESPONSE = re.compile(rb'\* (\d+) FETCH \(')
+
+# Tokens of a FETCH attribute list
+ATOM = re.compile(rb'[^ ()\[\]{"\r\n]+')
+LITERAL = re.compile(rb'~?\{(\d+)\}$')
+
+
+class ReceiveBuffer:
+    """
+    Reusable input buffer for an imaplib connection
+    Replaces the connection's read and readline, so imaplib and FetchParser
+    consume the same bytes and nothing read ahead by one is lost to the
+    other. Data is received into one bytearray reused for the whole session;
+    literals are copied out of it once, and the part not yet received is
+    read straight into the literal's own buffer, or streamed to a temporary
+    file through a reused chunk buffer for spooled literals.
+    """
+    
+    def __init__(self, connection: imaplib.IMAP4, size: int = RECEIVE_BUFFER_SIZE):
+        """
+        Install buffer on a connection
+        
+        Args:
+            connection: Connected imaplib connection
+            size: Initial buffer size in bytes
+        """
+        self._connection = connection
+        self._buffer = bytearray(size)
+        self._view = memoryview(self._buffer)
+        self._start = 0  # First unread byte
+        self._end = 0  # End of received data
+        self._readinto: Callable[[memoryview], int] = connection.file.readinto1
+        self._spool_chunk: Optional[memoryview] = None  # Allocated on first spooled literal
+        
+        connection.read = self.read
+        connection.readline = self.readline
+    
+    def set_source(self, readinto: Callable[[memoryview], int]) -> bytes:
+        """
+        Receive further data from another source (e.g. a decompressor)
+        
+        Args:
+            readinto: Function filling a memoryview with the next available
+                bytes and returning their count (0 at end of stream)
+        
+        Returns:
+            Bytes received from the old source but not read yet; they belong
+            to the new source's stream and must be passed to it
+        """
+        leftover = bytes(self._view[self._start:self._end])
+        self._start = self._end = 0
+        self._readinto = readinto
+        return leftover
+    
+    def has_buffered_data(self) -> bool:
+        """Check whether received data is waiting to be read"""
+        return self._start < self._end
+    
+    def _fill(self) -> bool:
+        """
+        Receive more data behind the unread bytes
+        Unread bytes are moved to the front first; the buffer only grows
+        when a single line does not fit into it.
+        
+        Returns:
+            False at end of stream
+        """
+        if self._start == self._end:
+            self._start = self._end = 0
+        elif self._end == len(self._buffer):
+            unread = self._end - self._start
+            if self._start > 0:
+                self._buffer[:unread] = self._buffer[self._start:self._end]
+            else:
+                # A bytearray cannot be resized while a memoryview exists
+                self._view.release()
+                self._buffer.extend(bytes(len(self._buffer)))
+                self._view = memoryview(self._buffer)
+            self._start, self._end = 0, unread
+        
+        count = self._readinto(self._view[self._end:])
+        if not count:
+            return False
+        self._end += count
+        return True
+    
+    def _line_end(self) -> int:
+        """
+        Find the end of the next line, receiving data as needed
+        
+        Returns:
+            Buffer index just behind the line terminator, or the end of the
+            received data at end of stream
+        """
+        scanned = 0
+        while True:
+            index = self._buffer.find(b'\n', self._start + scanned, self._end)
+            if index >= 0:
+                return index + 1
+            scanned = self._end - self._start
+            if scanned > imaplib._MAXLINE:
+                raise self._connection.error(f"got more than {imaplib._MAXLINE} bytes")
+            if not self._fill():
+                return self._end
+    
+    def peek_line(self) -> memoryview:
+        """
+        Return the next line without consuming it
+        
+        Returns:
+            View of the line in the buffer, valid until the next read
+        """
+        end = self._line_end()
+        return self._view[self._start:end]
+    
+    def readline(self) -> bytes:
+        """Read one line including its line terminator"""
+        end = self._line_end()
+        line = bytes(self._view[self._start:end])
+        self._start = end
+        return line
+    
+    def readinto(self, target: memoryview) -> int:
+        """
+        Fill target completely (less only at end of stream)
+        Buffered bytes are copied first, the rest is received directly
+        into target without passing through the buffer.
+        
+        Args:
+            target: Writable memoryview to fill
+        
+        Returns:
+            Number of bytes written
+        """
+        count = min(len(target), self._end - self._start)
+        target[:count] = self._view[self._start:self._start + count]
+        self._start += count
+        
+        while count < len(target):
+            received = self._readinto(target[count:])
+            if not received:
+                break
+            count += received
+        
+        return count
+    
+    def read_literal(self, size: int) -> bytearray:
+        """
+        Read a literal into a new buffer of exactly its size
+        
+        Args:
+            size: Literal size in bytes
+        
+        Returns:
+            Literal data
+        
+        Raises:
+            imaplib.IMAP4.abort: If the stream ends inside the literal
+        """
+        data = bytearray(size)
+        with memoryview(data) as view:
+            if self.readinto(view) < size:
+                raise self._connection.abort("socket error: EOF inside literal")
+        return data
+    
+    def spool_literal(self, size: int) -> SpooledMessage:
+        """
+        Stream a literal into an anonymous temporary file
+        At most one chunk of the literal is held in memory at any time.
+        
+        Args:
+            size: Literal size in bytes
+        
+        Returns:
+            SpooledMessage holding the literal data
+        
+        Raises:
+            imaplib.IMAP4.abort: If the stream ends inside the literal
+            OSError: If the temporary file cannot be written
+        """
+        file = tempfile.TemporaryFile()
+        
+        try:
+            count = min(size, self._end - self._start)
+            file.write(self._view[self._start:self._start + count])
+            self._start += count
+            remaining = size - count
+            
+            if remaining and self._spool_chunk is None:
+                self._spool_chunk = memoryview(bytearray(SPOOL_CHUNK_SIZE))
+            
+            while remaining:
+                received = self._readinto(self._spool_chunk[:min(remaining, SPOOL_CHUNK_SIZE)])
+                if not received:
+                    raise self._connection.abort("socket error: EOF inside literal")
+                file.write(self._spool_chunk[:received])
+                remaining -= received
+        except BaseException:
+            file.close()
+            raise
+        
+        return SpooledMessage(file, size)
+    
+    def read(self, size: int) -> bytes:
+        """Read exactly size bytes (fewer at end of stream), used by imaplib for literals"""
+        data = bytearray(size)
+        with memoryview(data) as view:
+            count = self.readinto(view)
+        del data[count:]
+        return bytes(data)
+
+
+class FetchParser:
+    """
+    Incremental parser for the responses to one FETCH command
+    Each FETCH response is parsed as soon as it has been received and
+    yielded with its literals, so a response carrying many messages never
+    has to be held in memory at once. Every other response (untagged data,
+    the tagged completion) is left to imaplib, which keeps its session
+    state, BYE handling and untagged_responses exactly as for any command.
+    """
+    
+    def __init__(self, connection: imaplib.IMAP4, buffer: ReceiveBuffer, tag: bytes,
+                 spool_threshold: int = 0):
+        """
+        Initialize parser for a command that has already been sent
+        
+        Args:
+            connection: imaplib connection the command was sent on
+            buffer: ReceiveBuffer installed on the connection
+            tag: Tag of the FETCH command
+            spool_threshold: Literals larger than this many bytes are
+                spooled to a temporary file (0 keeps all in memory)
+        """
+        self._connection = connection
+        self._buffer = buffer
+        self._tag = tag
+        self._spool_threshold = spool_threshold
+        self._line = b''
+        self._pos = 0
+        self.status: Optional[str] = None
+        self.response: List[Any] = []
+    
+    @property
+    def complete(self) -> bool:
+        """True once the tagged completion has been read"""
+        return self.status is not None
+    
+    def responses(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Read responses until the command completes
+        
+        Yields:
+            Tuple of (sequence number, attributes) per FETCH response.
+            Attribute names are upper case as sent by the server (e.g. 'UID',
+            'FLAGS', 'BODY[]<0>'); numbers are int, strings str, lists
+            Python lists, literals bytearray (SpooledMessage above the spool
+            threshold) and NIL None.
+        
+        Raises:
+            imaplib.IMAP4.abort: If the connection fails or the server says BYE
+            imaplib.IMAP4.error: If the server answers BAD
+        """
+        connection = self._connection
+        
+        while not connection.tagged_commands[self._tag]:
+            # Release the view at once, the buffer cannot grow while it exists
+            with self._buffer.peek_line() as line:
+                match = FETCH_RESPONSE.match(line)
+                header = (int(match.group(1)), match.end()) if match else None
+            
+            if header is None:
+                connection._get_response()
+                continue
+            
+            sequence, self._pos = header
+            self._line = self._next_line()
+            yield sequence, self._read_attributes()
+        
+        self.status, self.response = connection._command_complete('FETCH', self._tag)
+    
+    def drain(self) -> None:
+        """Read and discard the remaining responses of the command"""
+        for _ in self.responses():
+            pass
+    
+    def _next_line(self) -> bytes:
+        """
+        Read the next line without its line terminator
+        
+        Raises:
+            imaplib.IMAP4.abort: At end of stream
+        """
+        line = self._buffer.readline()
+        if not line:
+            raise self._connection.abort("socket error: EOF")
+        return line.rstrip(b'\r\n')
+    
+    def _read_attributes(self) -> Dict[str, Any]:
+        """
+        Parse the attribute list of the current FETCH response
+        
+        Returns:
+            Dictionary mapping attribute name to value
+        """
+        attributes = {}
+        
+        while True:
+            self._skip_spaces()
+            if self._line[self._pos:self._pos + 1] == b')':
+                break
+            name = self._read_name()
+            self._skip_spaces()
+            attributes[name] = self._read_value()
+        
+        return attributes
+    
+    def _skip_spaces(self) -> None:
+        """Advance past spaces on the current line"""
+        while self._line[self._pos:self._pos + 1] == b' ':
+            self._pos += 1
+    
+    def _read_name(self) -> str:
+        """
+        Read an attribute name, including its section and partial range
+        
+        Returns:
+            Upper-case attribute name (e.g. 'BODY[HEADER.FIELDS (TO)]<0>')
+        
+        Raises:
+            imaplib.IMAP4.abort: If the response is malformed
+        """
+        line = self._line
+        start = self._pos
+        depth = 0
+        
+        while self._pos < len(line):
+            char = line[self._pos]
+            if char == 0x5b:  # [
+                depth += 1
+            elif char == 0x5d:  # ]
+                depth -= 1
+            elif depth == 0 and char in (0x20, 0x28, 0x29):  # space ( )
+                break
+            self._pos += 1
+        
+        if self._pos == start:
+            raise self._connection.abort(f"malformed FETCH response: {line!r}")
+        
+        return line[start:self._pos].decode('ascii', errors='replace').upper()
+    
+    def _read_value(self) -> Any:
+        """
+        Read one value: list, quoted string, literal, NIL, number or atom
+        
+        Returns:
+            Parsed value
+        
+        Raises:
+            imaplib.IMAP4.abort: If the response is malformed
+        """
+        line = self._line
+        char = line[self._pos:self._pos + 1]
+        
+        if char == b'(':
+            self._pos += 1
+            values = []
+            while True:
+                self._skip_spaces()
+                if self._line[self._pos:self._pos + 1] == b')':
+                    self._pos += 1
+                    return values
+                if self._pos >= len(self._line):
+                    raise self._connection.abort(f"unterminated list in FETCH response: {line!r}")
+                values.append(self._read_value())
+        
+        if char == b'"':
+            return self._read_quoted()
+        
+        literal = LITERAL.match(line, self._pos)
+        if literal:
+            size = int(literal.group(1))
+            if self._spool_threshold and size > self._spool_threshold:
+                data = self._buffer.spool_literal(size)
+            else:
+                data = self._buffer.read_literal(size)
+            # The response continues on the line following the literal
+            self._line = self._next_line()
+            self._pos = 0
+            return data
+        
+        atom = ATOM.match(line, self._pos)
+        if not atom:
+            raise self._connection.abort(f"malformed FETCH response: {line!r}")
+        self._pos = atom.end()
+        
+        value = atom.group(0)
+        if value.isdigit():
+            return int(value)
+        if value.upper() == b'NIL':
+            return None
+        return value.decode('utf-8', errors='replace')
+    
+    def _read_quoted(self) -> str:
+        """
+        Read a quoted string starting at the current position
+        
+        Returns:
+            String without quotes and escapes
+        """
+        line = self._line
+        self._pos += 1
+        parts = []
+        
+        while True:
+            end = line.find(b'"', self._pos)
+            if end < 0:
+                raise self._connection.abort(f"unterminated string in FETCH response: {line!r}")
+            escape = line.find(b'\\', self._pos, end)
+            if escape < 0:
+                parts.append(line[self._pos:end])
+                self._pos = end + 1
+                break
+            parts.append(line[self._pos:escape] + line[escape + 1:escape + 2])
+            self._pos = escape + 2
+        
+        return b''.join(parts).decode('utf-8', errors='replace')
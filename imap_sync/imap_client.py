@@ -4,14 +4,178 @@ Handles IMAP server connections and operations
 """
 import imaplib
 import re
-from typing import List, Tuple, Optional
-from .utils import IMAPConnectionError, IMAPFolderError, IMAPFetchError, IMAPAppendError
+import select
+import time
+import zlib
+from typing import List, Tuple, Optional, Dict, Iterator, Set
+from .utils import (
+    IMAPConnectionError, IMAPFolderError, IMAPFetchError, IMAPAppendError, IMAPAppendRejected,
+    IMAPStoreError, ManifestEntry, SpooledMessage, compress_uid_set, expand_uid_set, parse_message_id
+)
+from .fetch_parser import ReceiveBuffer, FetchParser
+from .bandwidth import TokenBucket, consume_tokens
+
+
+# Maximum number of UIDs sent in a single UID FETCH command line
+# Keeps command length well below common server line limits
+UID_SET_CHUNK = 2000
+
+# Largest literal that may be sent non-synchronizing under LITERAL- (RFC 7888)
+LITERAL_MINUS_MAX = 4096
+
+# Maximum number of STATUS commands awaiting a response at the same time
+STATUS_PIPELINE_DEPTH = 32
+
+# Servers may drop a client idling for 30 minutes; re-issue IDLE before that (RFC 2177)
+IDLE_TIMEOUT = 25 * 60
+
+# Untagged responses that report a change of the selected folder
+CHANGE_RESPONSES = ('EXISTS', 'EXPUNGE', 'FETCH', 'VANISHED')
+
+# Rate-limited sends are split into chunks of this size, so a large
+# literal goes out at the limited rate rather than in one burst
+RATE_LIMIT_CHUNK = 65536
+
+# imaplib only knows ENABLE (RFC 5161) from Python 3.9 on, and never COMPRESS (RFC 4978)
+imaplib.Commands.setdefault('ENABLE', ('AUTH',))
+imaplib.Commands.setdefault('COMPRESS', ('AUTH', 'SELECTED'))
+
+
+class _Literal:
+    """Literal argument of a command sent by IMAPClient._send_command"""
+    
+    def __init__(self, data: bytes, binary: bool = False):
+        self.data = data
+        self.binary = binary  # Sent as literal8 (~{n}, RFC 3516)
+
+
+class _DeflateStream:
+    """
+    COMPRESS=DEFLATE (RFC 4978) layer for an imaplib connection
+    Replaces the connection's send and serves as the data source of its
+    ReceiveBuffer, so imaplib, FetchParser and IMAPClient._send_command
+    keep working on uncompressed data
+    """
+    
+    def __init__(self, connection: imaplib.IMAP4):
+        self._connection = connection
+        self._inflate = zlib.decompressobj(-zlib.MAX_WBITS)
+        self._deflate = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -zlib.MAX_WBITS)
+        self._pending = memoryview(b'')  # Inflated data not handed out yet
+        self.bytes_raw = 0  # Uncompressed bytes in both directions
+        self.bytes_wire = 0  # Compressed bytes in both directions
+        
+        connection.send = self.send
+    
+    def feed(self, data: bytes) -> None:
+        """
+        Inflate compressed data that was received before this layer existed
+        
+        Args:
+            data: Compressed bytes read ahead by the receive buffer
+        """
+        if not data:
+            return
+        self.bytes_wire += len(data)
+        inflated = self._inflate.decompress(data)
+        self.bytes_raw += len(inflated)
+        self._pending = memoryview(bytes(self._pending) + inflated)
+    
+    def readinto1(self, target: memoryview) -> int:
+        """
+        Fill target with the next inflated bytes, reading the socket once if needed
+        
+        Args:
+            target: Writable memoryview
+        
+        Returns:
+            Number of bytes written, 0 at end of stream
+        """
+        while not self._pending:
+            # Inflate what is left of the last read first; output is capped so
+            # highly compressible literals cannot expand into one huge buffer
+            data = self._inflate.unconsumed_tail
+            if not data:
+                # read1 returns what arrived without waiting for a full buffer
+                data = self._connection.file.read1(65536)
+                if not data:
+                    return 0
+                self.bytes_wire += len(data)
+            inflated = self._inflate.decompress(data, 65536)
+            self.bytes_raw += len(inflated)
+            self._pending = memoryview(inflated)
+        
+        count = min(len(target), len(self._pending))
+        target[:count] = self._pending[:count]
+        self._pending = self._pending[count:]
+        return count
+    
+    def send(self, data: bytes) -> None:
+        """Compress and send data, flushing so the server sees it at once"""
+        compressed = self._deflate.compress(data) + self._deflate.flush(zlib.Z_SYNC_FLUSH)
+        self.bytes_raw += len(data)
+        self.bytes_wire += len(compressed)
+        try:
+            self._connection.sock.sendall(compressed)
+        except OSError as e:
+            raise self._connection.abort(f'socket error: {e}')
+    
+    def has_buffered_data(self) -> bool:
+        """Check whether inflated data is waiting to be read"""
+        return bool(self._pending)
+
+
+class _RateLimitedSocket:
+    """
+    Socket of an imaplib connection that draws tokens for every byte sent
+    Only sendall() is limited; everything else is passed through, so
+    imaplib, the COMPRESS layer and select() keep using it as the socket
+    """
+    
+    def __init__(self, sock, buckets: List[TokenBucket]):
+        self._sock = sock
+        self._buckets = buckets
+    
+    def sendall(self, data) -> None:
+        view = memoryview(data)
+        for start in range(0, len(view), RATE_LIMIT_CHUNK):
+            chunk = view[start:start + RATE_LIMIT_CHUNK]
+            consume_tokens(self._buckets, len(chunk))
+            self._sock.sendall(chunk)
+    
+    def __getattr__(self, name):
+        return getattr(self._sock, name)
+
+
+class _RateLimitedReader:
+    """
+    Socket file of an imaplib connection that draws tokens for every byte read
+    Covers the single-read methods used by ReceiveBuffer and the COMPRESS layer
+    """
+    
+    def __init__(self, file, buckets: List[TokenBucket]):
+        self._file = file
+        self._buckets = buckets
+    
+    def readinto1(self, target) -> int:
+        count = self._file.readinto1(target)
+        consume_tokens(self._buckets, count)
+        return count
+    
+    def read1(self, size: int = -1) -> bytes:
+        data = self._file.read1(size)
+        consume_tokens(self._buckets, len(data))
+        return data
+    
+    def __getattr__(self, name):
+        return getattr(self._file, name)
 
 
 class IMAPClient:
     """IMAP client wrapper for server connections and operations"""
     
-    def __init__(self, host: str, username: str, password: str, port: int = 993):
+    def __init__(self, host: str, username: str, password: str, port: int = 993,
+                 compress: bool = True, rate_limiters: Optional[List[TokenBucket]] = None):
         """
         Initialize IMAP client with connection parameters
         
@@ -20,12 +184,24 @@ class IMAPClient:
             username: Account username
             password: Account password
             port: IMAP port (default: 993 for SSL)
+            compress: Negotiate COMPRESS=DEFLATE when the server offers it
+            rate_limiters: Token buckets limiting the bytes this connection
+                sends and receives on the wire (e.g. from BandwidthLimiter)
         """
         self.host = host
         self.username = username
         self.password = password
         self.port = port
+        self.compress = compress
+        self.rate_limiters = rate_limiters or []
+        self._compression: Optional[_DeflateStream] = None
+        self._receive: Optional[ReceiveBuffer] = None
         self._connection: Optional[imaplib.IMAP4_SSL] = None
+        self.capabilities: Set[str] = set()
+        self.selected_folder: Optional[str] = None
+        self.uidvalidity: Optional[int] = None
+        self.highestmodseq: Optional[int] = None
+        self.enabled: Set[str] = set()
 
     def connect(self) -> bool:
         """
@@ -40,6 +216,10 @@ class IMAPClient:
         try:
             # Create SSL connection with certificate validation
             self._connection = imaplib.IMAP4_SSL(self.host, self.port)
+            if self.rate_limiters:
+                self._connection.sock = _RateLimitedSocket(self._connection.sock, self.rate_limiters)
+                self._connection.file = _RateLimitedReader(self._connection.file, self.rate_limiters)
+            self._receive = ReceiveBuffer(self._connection)
             
             # Authenticate
             status, response = self._connection.login(self.username, self.password)
@@ -49,6 +229,12 @@ class IMAPClient:
                     f"Authentication failed for user '{self.username}' on {self.host}:{self.port}: {response}"
                 )
             
+            # Servers often advertise more capabilities after authentication
+            self._refresh_capabilities()
+            if self.compress:
+                self._start_compression()
+            self._enable_extensions()
+            
             return True
             
         except imaplib.IMAP4.error as e:
@@ -64,6 +250,127 @@ class IMAPClient:
                 f"Unexpected error connecting to {self.host}:{self.port}: {str(e)}"
             )
     
+    def clone(self) -> 'IMAPClient':
+        """
+        Create a new, unconnected client for the same server and account
+        Used to open additional connections for parallel workers
+        
+        Returns:
+            New IMAPClient instance
+        """
+        return IMAPClient(self.host, self.username, self.password, self.port, self.compress,
+                          self.rate_limiters)
+    
+    def _refresh_capabilities(self) -> None:
+        """
+        Re-read server capabilities into self.capabilities
+        Failures leave the pre-authentication capability list in place
+        """
+        try:
+            status, response = self._connection.capability()
+            if status == 'OK' and response and response[-1]:
+                self._connection.capabilities = tuple(
+                    response[-1].decode('ascii', errors='ignore').upper().split()
+                )
+        except imaplib.IMAP4.error:
+            pass
+        
+        self.capabilities = set(self._connection.capabilities)
+    
+    def _start_compression(self) -> None:
+        """
+        Turn on COMPRESS=DEFLATE when the server advertises it
+        Message bodies are mostly text and base64, so this typically cuts
+        the bytes on the wire by more than half. A refusal leaves the
+        connection uncompressed.
+        """
+        if not self.has_capability('COMPRESS=DEFLATE'):
+            return
+        
+        try:
+            status, _ = self._connection._simple_command('COMPRESS', 'DEFLATE')
+        except imaplib.IMAP4.error:
+            return
+        
+        if status == 'OK':
+            self._compression = _DeflateStream(self._connection)
+            self._compression.feed(self._receive.set_source(self._compression.readinto1))
+    
+    @property
+    def connected(self) -> bool:
+        """Whether the client holds a connection (which may still be broken)"""
+        return self._connection is not None
+    
+    @property
+    def compression_active(self) -> bool:
+        """True if the connection is compressed"""
+        return self._compression is not None
+    
+    def compression_ratio(self) -> Optional[float]:
+        """
+        Ratio of uncompressed to transmitted bytes on this connection
+        
+        Returns:
+            Ratio (e.g. 2.5 for 2.5:1), or None if compression is not active
+        """
+        if not self._compression or not self._compression.bytes_wire:
+            return None
+        return self._compression.bytes_raw / self._compression.bytes_wire
+    
+    def _enable_extensions(self) -> None:
+        """
+        Turn on QRESYNC, or CONDSTORE alone, when the server offers it
+        Once enabled, SELECT reports HIGHESTMODSEQ and FETCH accepts
+        CHANGEDSINCE (and VANISHED with QRESYNC). Failures leave the
+        session as it is; delta sync is then simply not used.
+        """
+        self.enabled = set()
+        
+        if not self.has_capability('ENABLE'):
+            return
+        
+        if self.has_capability('QRESYNC'):
+            extension = 'QRESYNC'
+        elif self.has_capability('CONDSTORE'):
+            extension = 'CONDSTORE'
+        else:
+            return
+        
+        try:
+            status, _ = self._connection._simple_command('ENABLE', extension)
+            _, enabled = self._connection._untagged_response(status, [None], 'ENABLED')
+        except imaplib.IMAP4.error:
+            return
+        
+        for item in enabled:
+            if isinstance(item, bytes):
+                self.enabled.update(item.decode('ascii', errors='ignore').upper().split())
+        
+        # QRESYNC implies CONDSTORE (RFC 7162)
+        if 'QRESYNC' in self.enabled:
+            self.enabled.add('CONDSTORE')
+    
+    def supports_delta_sync(self) -> bool:
+        """
+        Check whether changes since a mod-sequence can be fetched
+        
+        Returns:
+            True if CONDSTORE is enabled and the selected folder reported HIGHESTMODSEQ
+        """
+        return 'CONDSTORE' in self.enabled and self.highestmodseq is not None
+    
+    def has_capability(self, capability: str) -> bool:
+        """
+        Check whether the connected server advertises a capability
+        
+        Args:
+            capability: Capability name (e.g. 'MULTIAPPEND')
+        
+        Returns:
+            True if capability is advertised
+        """
+        return capability.upper() in self.capabilities
+    
     def disconnect(self) -> None:
         """
         Close IMAP connection properly
@@ -76,7 +383,49 @@ class IMAPClient:
                 # Ignore errors during disconnect - connection may already be closed
                 pass
             finally:
-                self._connection = None
+                self._reset_session()
+    
+    def reconnect(self) -> bool:
+        """
+        Replace a broken connection with a new one
+        The old socket is closed without waiting for a LOGOUT reply, then the
+        client connects again and re-selects the folder that was selected.
+        UIDVALIDITY is read anew, so callers can tell whether UIDs still refer
+        to the same messages.
+        
+        Returns:
+            True if reconnection successful
+        
+        Raises:
+            IMAPConnectionError: If connecting fails
+            IMAPFolderError: If the folder cannot be selected again
+        """
+        folder = self.selected_folder
+        
+        if self._connection:
+            try:
+                self._connection.shutdown()
+            except Exception:
+                # The socket is most likely broken already
+                pass
+            finally:
+                self._reset_session()
+        
+        self.connect()
+        if folder:
+            self.select_folder(folder)
+        
+        return True
+    
+    def _reset_session(self) -> None:
+        """Forget the connection and all state tied to it"""
+        self._connection = None
+        self.selected_folder = None
+        self.uidvalidity = None
+        self.highestmodseq = None
+        self.enabled = set()
+        self._compression = None
+        self._receive = None
 
     def select_folder(self, folder: str) -> int:
         """
@@ -109,6 +458,20 @@ class IMAPClient:
             
             # Response contains message count as bytes
             message_count = int(response[0])
+            self.selected_folder = folder
+            
+            # UIDVALIDITY tells whether cached UIDs still refer to the same messages
+            _, uidvalidity = self._connection.response('UIDVALIDITY')
+            self.uidvalidity = int(uidvalidity[-1]) if uidvalidity and uidvalidity[-1] else None
+            
+            # HIGHESTMODSEQ is only sent when CONDSTORE is active for the mailbox
+            _, highestmodseq = self._connection.response('HIGHESTMODSEQ')
+            self.highestmodseq = int(highestmodseq[-1]) if highestmodseq and highestmodseq[-1] else None
+            
+            # Only changes reported after this point are news to idle()
+            for name in CHANGE_RESPONSES:
+                self._connection.untagged_responses.pop(name, None)
+            
             return message_count
             
         except imaplib.IMAP4.error as e:
@@ -120,6 +483,94 @@ class IMAPClient:
                 f"Invalid response when selecting folder '{folder}': {str(e)}"
             )
     
+    def noop(self) -> bool:
+        """
+        Send NOOP to keep the connection alive and receive pending updates
+        
+        Returns:
+            True if the server answered OK
+        
+        Raises:
+            IMAPConnectionError: If the connection is lost
+        """
+        if not self._connection:
+            raise IMAPConnectionError("Not connected to IMAP server")
+        
+        try:
+            status, _ = self._connection.noop()
+            return status == 'OK'
+        except imaplib.IMAP4.abort as e:
+            raise IMAPConnectionError(f"Connection to {self.host} lost: {str(e)}")
+        except imaplib.IMAP4.error:
+            return False
+    
+    def idle(self, timeout: float = IDLE_TIMEOUT) -> bool:
+        """
+        Wait with IDLE (RFC 2177) until the selected folder changes
+        Returns as soon as the server reports new messages, expunges or
+        flag changes, or when the timeout expires, and ends IDLE either way.
+        Changes the server reported to earlier commands since the folder was
+        selected count as well, so nothing arriving between the last
+        transfer and IDLE is missed.
+        
+        Args:
+            timeout: Maximum seconds to wait
+        
+        Returns:
+            True if the folder changed, False on timeout
+        
+        Raises:
+            IMAPFolderError: If no folder is selected or the server rejects IDLE
+            IMAPConnectionError: If the connection is lost
+        """
+        if not self._connection or not self.selected_folder:
+            raise IMAPFolderError("IDLE requires a selected folder")
+        
+        connection = self._connection
+        changed = any(name in connection.untagged_responses for name in CHANGE_RESPONSES)
+        
+        # Changes reported to earlier commands need no IDLE round trip
+        if not changed:
+            try:
+                tag = self._send_command('IDLE')
+                
+                # Wait for continuation; a tagged response means rejection
+                while connection._get_response():
+                    if connection.tagged_commands[tag]:
+                        _, response = connection._command_complete('IDLE', tag)
+                        raise IMAPFolderError(f"Server rejected IDLE: {response}")
+                
+                deadline = time.monotonic() + timeout
+                sock = connection.sock
+                
+                while not changed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    # Decrypted SSL data and buffered or inflated data are not visible to select()
+                    pending = ((hasattr(sock, 'pending') and sock.pending()) or
+                               self._receive.has_buffered_data() or
+                               (self._compression is not None and self._compression.has_buffered_data()))
+                    if not pending and not select.select([sock], [], [], remaining)[0]:
+                        break
+                    connection._get_response()
+                    changed = any(name in connection.untagged_responses for name in CHANGE_RESPONSES)
+                
+                connection.send(b'DONE\r\n')
+                connection._command_complete('IDLE', tag)
+            
+            except imaplib.IMAP4.abort as e:
+                raise IMAPConnectionError(f"Connection to {self.host} lost during IDLE: {str(e)}")
+            except imaplib.IMAP4.error as e:
+                raise IMAPFolderError(f"IMAP error during IDLE: {str(e)}")
+            except OSError as e:
+                raise IMAPConnectionError(f"Network error during IDLE: {str(e)}")
+        
+        for name in CHANGE_RESPONSES:
+            connection.untagged_responses.pop(name, None)
+        
+        return changed
+    
     def list_folders(self) -> List[str]:
         """
         List all available folders on the server
@@ -195,6 +646,77 @@ class IMAPClient:
         except Exception:
             return False
     
+    def folder_status(self, folders: List[str]) -> Dict[str, Dict[str, int]]:
+        """
+        Read MESSAGES, UIDNEXT and UIDVALIDITY (and HIGHESTMODSEQ under
+        CONDSTORE) of several folders without selecting them
+        Uses a single LIST-STATUS command (RFC 5819) when available,
+        otherwise pipelined STATUS commands, so the cost does not grow by
+        one round trip per folder.
+        
+        Args:
+            folders: Folder names to query
+        
+        Returns:
+            Dictionary mapping folder name to {item name: value}; folders the
+            server reported no status for are omitted
+        
+        Raises:
+            IMAPFolderError: If the connection fails while querying
+        """
+        if not self._connection:
+            raise IMAPFolderError("Not connected to IMAP server")
+        
+        items = 'MESSAGES UIDNEXT UIDVALIDITY'
+        if self.has_capability('CONDSTORE') or self.has_capability('QRESYNC'):
+            items += ' HIGHESTMODSEQ'
+        
+        try:
+            if self.has_capability('LIST-STATUS'):
+                tag = self._send_command(
+                    'LIST', b'""', b'*', b'RETURN', f'(STATUS ({items}))'.encode('ascii')
+                )
+                self._connection._command_complete('LIST', tag)
+                self._connection.untagged_responses.pop('LIST', None)
+            else:
+                in_flight = []
+                for folder in folders:
+                    in_flight.append(self._send_command(
+                        'STATUS', self._quote_mailbox(folder).encode('utf-8'), f'({items})'.encode('ascii')
+                    ))
+                    while len(in_flight) >= STATUS_PIPELINE_DEPTH:
+                        self._connection._command_complete('STATUS', in_flight.pop(0))
+                for tag in in_flight:
+                    # NO for a single folder only means that folder gets no status
+                    self._connection._command_complete('STATUS', tag)
+        except imaplib.IMAP4.abort as e:
+            raise IMAPFolderError(f"Connection lost while reading folder status: {str(e)}")
+        except imaplib.IMAP4.error:
+            # BAD (e.g. unsupported item): report what arrived so far
+            pass
+        
+        # Response format: [b'"Folder Name" (MESSAGES 3 UIDNEXT 9 UIDVALIDITY 1)', ...]
+        wanted = set(folders)
+        statuses = {}
+        for item in self._connection.untagged_responses.pop('STATUS', []):
+            if not isinstance(item, bytes):
+                continue
+            text = item.decode('utf-8', errors='ignore')
+            match = re.match(r'\s*(?:"((?:[^"\\]|\\.)*)"|(\S+))\s+\((.*)\)', text)
+            if not match:
+                continue
+            folder = match.group(1).replace('\\"', '"') if match.group(1) is not None else match.group(2)
+            if folder not in wanted:
+                continue
+            values = match.group(3).split()
+            statuses[folder] = {
+                name.upper(): int(value)
+                for name, value in zip(values[::2], values[1::2])
+                if value.isdigit()
+            }
+        
+        return statuses
+    
     def create_folder(self, folder: str) -> bool:
         """
         Create folder if it doesn't exist
@@ -235,9 +757,12 @@ class IMAPClient:
                 f"IMAP error creating folder '{folder}': {str(e)}"
             )
 
-    def get_uid_list(self) -> List[str]:
+    def get_uid_list(self, start_uid: int = 1) -> List[str]:
         """
-        Fetch all UIDs from currently selected folder
+        Fetch UIDs from currently selected folder
+        
+        Args:
+            start_uid: Lowest UID to return; above 1 only UID start_uid:* is searched
         
         Returns:
             List of UID strings
@@ -250,7 +775,10 @@ class IMAPClient:
         
         try:
             # Search for all messages using UID
-            status, response = self._connection.uid('search', None, 'ALL')
+            if start_uid > 1:
+                status, response = self._connection.uid('search', None, 'UID', f'{start_uid}:*')
+            else:
+                status, response = self._connection.uid('search', None, 'ALL')
             
             if status != 'OK':
                 raise IMAPFetchError(
@@ -265,6 +793,10 @@ class IMAPClient:
             uid_string = response[0].decode('utf-8')
             uids = uid_string.split()
             
+            # 'n:*' always matches the highest UID, even if it is below n
+            if start_uid > 1:
+                uids = [uid for uid in uids if int(uid) >= start_uid]
+            
             return uids
             
         except imaplib.IMAP4.error as e:
@@ -280,103 +812,547 @@ class IMAPClient:
                 f"Unexpected error retrieving UIDs: {str(e)}"
             )
 
-    def fetch_message(self, uid: str) -> Tuple[bytes, str, List[str]]:
+    def fetch_message(self, uid: str, binary: bool = False,
+                      spool_threshold: int = 0) -> Tuple[bytes, str, List[str]]:
         """
         Fetch single message by UID using streaming
         
         Args:
             uid: Message UID to fetch
+            binary: Fetch BINARY.PEEK[] (RFC 3516) instead of RFC822, so the
+                server sends base64/quoted-printable parts decoded
+            spool_threshold: Messages larger than this many bytes are
+                streamed to a temporary file (0 keeps them in memory)
             
         Returns:
             Tuple of (message_data, date, flags)
-            - message_data: RFC822 message as bytes
+            - message_data: RFC822 message as bytes, or SpooledMessage
             - date: Internal date string
             - flags: List of message flags
             
         Raises:
             IMAPFetchError: If message fetch fails
         """
+        messages = list(self.fetch_messages([uid], binary=binary, spool_threshold=spool_threshold))
+        
+        if not messages:
+            raise IMAPFetchError(
+                f"Empty response when fetching message UID {uid} - message may not exist"
+            )
+        
+        _, message_data, date, flags = messages[0]
+        return (message_data, date, flags)
+    
+    def fetch_manifest(self, start_uid: int = 1) -> List[ManifestEntry]:
+        """
+        Fetch UID, size, internal date and flags of every message in the
+        selected folder with a single UID FETCH start_uid:* command
+        
+        Args:
+            start_uid: Lowest UID to include (1 for the whole folder)
+        
+        Returns:
+            List of ManifestEntry in server order
+        
+        Raises:
+            IMAPFetchError: If the manifest cannot be retrieved
+        """
         if not self._connection:
             raise IMAPFetchError("Not connected to IMAP server")
         
         try:
-            # Fetch message data, internal date, and flags
             status, response = self._connection.uid(
-                'fetch', 
-                uid, 
-                '(RFC822 INTERNALDATE FLAGS)'
+                'fetch', f'{start_uid}:*', '(UID RFC822.SIZE INTERNALDATE FLAGS)'
             )
             
             if status != 'OK':
+                self._connection.untagged_responses.pop('FETCH', None)
                 raise IMAPFetchError(
-                    f"IMAP fetch command failed for UID {uid}: {response}"
+                    f"IMAP fetch command failed for folder manifest: {response}"
                 )
             
-            if not response or not response[0]:
-                raise IMAPFetchError(
-                    f"Empty response when fetching message UID {uid} - message may not exist"
-                )
+            # Response format: [b'1 (UID 5 RFC822.SIZE 1234 INTERNALDATE "..." FLAGS (...))', ...]
+            entries = []
+            seen = set()
+            for item in response or []:
+                if not isinstance(item, bytes):
+                    continue
+                metadata = item.decode('utf-8', errors='ignore')
+                uid_match = re.search(r'UID (\d+)', metadata)
+                size_match = re.search(r'RFC822\.SIZE (\d+)', metadata)
+                if not uid_match or not size_match or uid_match.group(1) in seen:
+                    continue
+                # 'n:*' always matches the highest UID, even if it is below n
+                if int(uid_match.group(1)) < start_uid:
+                    continue
+                seen.add(uid_match.group(1))
+                
+                date_match = re.search(r'INTERNALDATE "([^"]+)"', metadata)
+                flags_match = re.search(r'FLAGS \(([^)]*)\)', metadata)
+                flags_str = flags_match.group(1) if flags_match else ''
+                
+                entries.append(ManifestEntry(
+                    uid=uid_match.group(1),
+                    size=int(size_match.group(1)),
+                    internal_date=date_match.group(1) if date_match else '',
+                    flags=flags_str.split()
+                ))
             
-            # Parse the response
-            # Response format: [(b'1 (FLAGS (...) INTERNALDATE "..." RFC822 {size}', b'message data'), b')']
-            message_parts = response[0]
+            return entries
+        
+        except imaplib.IMAP4.error as e:
+            raise IMAPFetchError(
+                f"IMAP protocol error retrieving folder manifest: {str(e)}"
+            )
+        except IMAPFetchError:
+            raise
+        except Exception as e:
+            raise IMAPFetchError(
+                f"Unexpected error retrieving folder manifest: {str(e)}"
+            )
+    
+    def fetch_changes(self, since_modseq: int) -> Tuple[Dict[str, List[str]], List[str]]:
+        """
+        Fetch the flags of messages changed since a mod-sequence (RFC 7162)
+        With QRESYNC enabled the same command also reports expunged UIDs
+        
+        Args:
+            since_modseq: HIGHESTMODSEQ recorded by the previous run
+        
+        Returns:
+            Tuple of (flags_by_uid, vanished_uids)
+            - flags_by_uid: Current flags of every changed message
+            - vanished_uids: UIDs expunged since then (always empty without QRESYNC)
+        
+        Raises:
+            IMAPFetchError: If the changes cannot be retrieved
+        """
+        if not self._connection:
+            raise IMAPFetchError("Not connected to IMAP server")
+        
+        modifier = f'CHANGEDSINCE {since_modseq}'
+        if 'QRESYNC' in self.enabled:
+            modifier += ' VANISHED'
+        
+        try:
+            status, response = self._connection.uid('fetch', '1:*', '(UID FLAGS)', f'({modifier})')
+            _, vanished_data = self._connection._untagged_response(status, [None], 'VANISHED')
             
-            if not isinstance(message_parts, tuple) or len(message_parts) < 2:
+            if status != 'OK':
+                self._connection.untagged_responses.pop('FETCH', None)
                 raise IMAPFetchError(
-                    f"Invalid response format for message UID {uid} - expected tuple with 2 elements"
+                    f"IMAP fetch command failed for changes since modseq {since_modseq}: {response}"
                 )
             
-            # Extract message data (RFC822)
-            message_data = message_parts[1]
+            # Response format: [b'1 (UID 5 FLAGS (\\Seen) MODSEQ (12))', ...]
+            flags_by_uid = {}
+            for item in response or []:
+                if not isinstance(item, bytes):
+                    continue
+                metadata = item.decode('utf-8', errors='ignore')
+                uid_match = re.search(r'UID (\d+)', metadata)
+                flags_match = re.search(r'FLAGS \(([^)]*)\)', metadata)
+                if uid_match and flags_match:
+                    flags_by_uid[uid_match.group(1)] = flags_match.group(1).split()
             
-            if not message_data:
-                raise IMAPFetchError(
-                    f"Empty message data for UID {uid}"
-                )
+            # Vanished format: [b'(EARLIER) 3:5,9', ...]
+            vanished = []
+            for item in vanished_data:
+                if isinstance(item, bytes):
+                    uid_set = item.decode('ascii', errors='ignore').replace('(EARLIER)', '')
+                    vanished.extend(expand_uid_set(uid_set))
             
-            # Extract metadata from first part
-            metadata = message_parts[0].decode('utf-8', errors='ignore')
+            return flags_by_uid, vanished
+        
+        except imaplib.IMAP4.error as e:
+            raise IMAPFetchError(
+                f"IMAP protocol error retrieving changes since modseq {since_modseq}: {str(e)}"
+            )
+        except IMAPFetchError:
+            raise
+        except Exception as e:
+            raise IMAPFetchError(
+                f"Unexpected error retrieving changes since modseq {since_modseq}: {str(e)}"
+            )
+    
+    def store_flags(self, flags_by_uid: Dict[str, List[str]]) -> None:
+        """
+        Replace the flags of messages in the selected folder
+        Messages with the same flag set share one UID STORE command, so a
+        run of flag changes costs a few round trips instead of one per message
+        
+        Args:
+            flags_by_uid: New flags for each UID
+        
+        Raises:
+            IMAPStoreError: If a UID STORE command fails
+        """
+        if not self._connection:
+            raise IMAPStoreError("Not connected to IMAP server")
+        
+        groups: Dict[Tuple[str, ...], List[str]] = {}
+        for uid, flags in flags_by_uid.items():
+            # \Recent is session state and may not be set by STORE
+            key = tuple(sorted(flag for flag in flags if flag.lower() != '\\recent'))
+            groups.setdefault(key, []).append(uid)
+        
+        for flags, uids in groups.items():
+            for start in range(0, len(uids), UID_SET_CHUNK):
+                self._store(uids[start:start + UID_SET_CHUNK], 'FLAGS.SILENT', f"({' '.join(flags)})")
+    
+    def delete_messages(self, uids: List[str]) -> bool:
+        """
+        Mark messages in the selected folder \\Deleted and expunge exactly those
+        Only UID EXPUNGE (UIDPLUS) is used; a plain EXPUNGE would also remove
+        unrelated messages that are already marked \\Deleted.
+        
+        Args:
+            uids: UIDs to delete
+        
+        Returns:
+            True if the messages were expunged, False if they were only marked
+            \\Deleted because the server lacks UIDPLUS
+        
+        Raises:
+            IMAPStoreError: If a command fails
+        """
+        if not self._connection:
+            raise IMAPStoreError("Not connected to IMAP server")
+        
+        expunge = self.has_capability('UIDPLUS')
+        
+        for start in range(0, len(uids), UID_SET_CHUNK):
+            chunk = uids[start:start + UID_SET_CHUNK]
+            self._store(chunk, '+FLAGS.SILENT', '(\\Deleted)')
             
-            # Extract INTERNALDATE
-            date_match = re.search(r'INTERNALDATE "([^"]+)"', metadata)
-            date = date_match.group(1) if date_match else ''
+            if not expunge:
+                continue
             
-            # Extract FLAGS
-            flags_match = re.search(r'FLAGS \(([^)]*)\)', metadata)
-            flags_str = flags_match.group(1) if flags_match else ''
-            flags = [f.strip() for f in flags_str.split()] if flags_str else []
+            uid_set = compress_uid_set(chunk)
+            try:
+                status, response = self._connection.uid('expunge', uid_set)
+            except imaplib.IMAP4.error as e:
+                raise IMAPStoreError(f"IMAP protocol error expunging messages {uid_set}: {str(e)}")
             
-            return (message_data, date, flags)
+            if status != 'OK':
+                raise IMAPStoreError(f"IMAP expunge command failed for messages {uid_set}: {response}")
+        
+        return expunge
+    
+    def _store(self, uids: List[str], item: str, value: str) -> None:
+        """
+        Send one UID STORE command
+        
+        Args:
+            uids: UIDs to update
+            item: Data item name (e.g. 'FLAGS.SILENT')
+            value: Parenthesized flag list
+        
+        Raises:
+            IMAPStoreError: If the command fails
+        """
+        uid_set = compress_uid_set(uids)
+        
+        try:
+            status, response = self._connection.uid('store', uid_set, item, value)
+        except imaplib.IMAP4.error as e:
+            raise IMAPStoreError(f"IMAP protocol error storing flags for messages {uid_set}: {str(e)}")
+        
+        # Silent STOREs still get FETCH replies for concurrent changes; drop them
+        self._connection.untagged_responses.pop('FETCH', None)
+        
+        if status != 'OK':
+            raise IMAPStoreError(f"IMAP store command failed for messages {uid_set}: {response}")
+    
+    def fetch_message_sizes(self, uids: List[str]) -> Dict[str, int]:
+        """
+        Fetch RFC822.SIZE for a list of UIDs without downloading bodies
+        
+        Args:
+            uids: Message UIDs to query
+        
+        Returns:
+            Dictionary mapping UID string to message size in bytes
+        
+        Raises:
+            IMAPFetchError: If size retrieval fails
+        """
+        if not self._connection:
+            raise IMAPFetchError("Not connected to IMAP server")
+        
+        sizes = {}
+        
+        try:
+            for start in range(0, len(uids), UID_SET_CHUNK):
+                uid_set = compress_uid_set(uids[start:start + UID_SET_CHUNK])
+                status, response = self._connection.uid('fetch', uid_set, '(UID RFC822.SIZE)')
+                
+                if status != 'OK':
+                    self._connection.untagged_responses.pop('FETCH', None)
+                    raise IMAPFetchError(
+                        f"IMAP fetch command failed for message sizes: {response}"
+                    )
+                
+                # Response format: [b'1 (UID 5 RFC822.SIZE 1234)', ...]
+                for item in response:
+                    if not isinstance(item, bytes):
+                        continue
+                    metadata = item.decode('utf-8', errors='ignore')
+                    uid_match = re.search(r'UID (\d+)', metadata)
+                    size_match = re.search(r'RFC822\.SIZE (\d+)', metadata)
+                    if uid_match and size_match:
+                        sizes[uid_match.group(1)] = int(size_match.group(1))
             
+            return sizes
+        
         except imaplib.IMAP4.error as e:
             raise IMAPFetchError(
-                f"IMAP protocol error fetching message UID {uid}: {str(e)}"
+                f"IMAP protocol error retrieving message sizes: {str(e)}"
             )
-        except (UnicodeDecodeError, AttributeError) as e:
+        except IMAPFetchError:
+            raise
+        except Exception as e:
             raise IMAPFetchError(
-                f"Error parsing message metadata for UID {uid}: {str(e)}"
+                f"Unexpected error retrieving message sizes: {str(e)}"
             )
+    
+    def fetch_message_ids(self, uids: Optional[List[str]] = None,
+                          start_uid: int = 1) -> Dict[str, str]:
+        """
+        Fetch the Message-ID header of messages without downloading bodies
+        
+        Args:
+            uids: Message UIDs to query, None for every message from start_uid on
+            start_uid: Lowest UID to include when uids is None
+        
+        Returns:
+            Dictionary mapping UID string to Message-ID; messages without
+            the header are omitted
+        
+        Raises:
+            IMAPFetchError: If header retrieval fails
+        """
+        if not self._connection:
+            raise IMAPFetchError("Not connected to IMAP server")
+        
+        if uids is None:
+            uid_sets = [f'{start_uid}:*']
+        else:
+            uid_sets = [
+                compress_uid_set(uids[start:start + UID_SET_CHUNK])
+                for start in range(0, len(uids), UID_SET_CHUNK)
+            ]
+        
+        message_ids = {}
+        
+        try:
+            for uid_set in uid_sets:
+                status, response = self._connection.uid(
+                    'fetch', uid_set, '(UID BODY.PEEK[HEADER.FIELDS (MESSAGE-ID)])'
+                )
+                
+                if status != 'OK':
+                    self._connection.untagged_responses.pop('FETCH', None)
+                    raise IMAPFetchError(
+                        f"IMAP fetch command failed for Message-IDs: {response}"
+                    )
+                
+                # Response format: [(b'1 (UID 5 BODY[HEADER.FIELDS (MESSAGE-ID)] {52}', b'Message-ID: <...>\r\n\r\n'), b')', ...]
+                for item in response or []:
+                    if not isinstance(item, tuple) or len(item) < 2:
+                        continue
+                    uid_match = re.search(rb'UID (\d+)', item[0])
+                    message_id = parse_message_id(item[1] or b'')
+                    if not uid_match or not message_id:
+                        continue
+                    # 'n:*' always matches the highest UID, even if it is below n
+                    if uids is None and int(uid_match.group(1)) < start_uid:
+                        continue
+                    message_ids[uid_match.group(1).decode('ascii')] = message_id
+            
+            return message_ids
+        
+        except imaplib.IMAP4.error as e:
+            raise IMAPFetchError(
+                f"IMAP protocol error retrieving Message-IDs: {str(e)}"
+            )
+        except IMAPFetchError:
+            raise
         except Exception as e:
             raise IMAPFetchError(
-                f"Unexpected error fetching message UID {uid}: {str(e)}"
+                f"Unexpected error retrieving Message-IDs: {str(e)}"
             )
-
+    
+    def fetch_messages(self, uids: List[str], binary: bool = False,
+                       spool_threshold: int = 0) -> Iterator[Tuple[str, bytes, str, List[str]]]:
+        """
+        Fetch several messages with a single UID FETCH command
+        The response is parsed while it arrives (see FetchParser) and each
+        message is yielded as soon as its literal has been read, so the
+        caller can append and release it before the next one is received.
+        
+        Args:
+            uids: Message UIDs to fetch in one round trip
+            binary: Fetch BINARY.PEEK[] (RFC 3516) instead of RFC822
+            spool_threshold: Messages larger than this many bytes are
+                streamed to a temporary file (0 keeps them in memory)
+        
+        Yields:
+            Tuple of (uid, message_data, date, flags), message_data being a
+            SpooledMessage for messages above spool_threshold
+            UIDs missing from the server response are not yielded
+        
+        Raises:
+            IMAPFetchError: If the batch fetch fails; messages received
+            before the failure have been yielded already
+        """
+        if not self._connection:
+            raise IMAPFetchError("Not connected to IMAP server")
+        
+        if not uids:
+            return
+        
+        body_item, body_key = ('BINARY.PEEK[]', 'BINARY[]') if binary else ('RFC822', 'RFC822')
+        wanted = set(uids)
+        
+        for attributes in self._fetch_attributes(uids, body_item, spool_threshold):
+            message = self._fetched_message(attributes, body_key, wanted)
+            if message is not None:
+                yield message
+    
+    def fetch_message_range(self, uid: str, offset: int,
+                            length: int) -> Tuple[bytes, str, List[str]]:
+        """
+        Fetch part of a message with BODY.PEEK[]<offset.length>
+        Lets large messages be downloaded in pieces, so an interrupted
+        transfer can continue where it stopped.
+        
+        Args:
+            uid: Message UID to fetch
+            offset: Position of the first byte to fetch
+            length: Maximum number of bytes to fetch
+        
+        Returns:
+            Tuple of (data, date, flags)
+            - data: Requested bytes, shorter than length (possibly empty)
+              when the range reaches the end of the message
+            - date: Internal date string
+            - flags: List of message flags
+        
+        Raises:
+            IMAPFetchError: If the fetch fails or the message does not exist
+        """
+        if not self._connection:
+            raise IMAPFetchError("Not connected to IMAP server")
+        
+        body_key = f'BODY[]<{offset}>'
+        
+        for attributes in self._fetch_attributes([uid], f'BODY.PEEK[]<{offset}.{length}>', 0):
+            if str(attributes.get('UID', '')) != uid:
+                continue
+            data = attributes.get(body_key) or b''
+            date = attributes.get('INTERNALDATE') or ''
+            flags = [str(flag) for flag in attributes.get('FLAGS') or []]
+            return (data, date, flags)
+        
+        raise IMAPFetchError(
+            f"Empty response when fetching message UID {uid} - message may not exist"
+        )
+    
+    def _fetch_attributes(self, uids: List[str], body_item: str,
+                          spool_threshold: int) -> Iterator[Dict[str, object]]:
+        """
+        Send one UID FETCH for a message body and yield the parsed responses
+        
+        Args:
+            uids: Message UIDs to fetch
+            body_item: FETCH item for the body (e.g. 'RFC822')
+            spool_threshold: Literals larger than this many bytes are
+                streamed to a temporary file (0 keeps them in memory)
+        
+        Yields:
+            Attributes of each FETCH response as they arrive
+        
+        Raises:
+            IMAPFetchError: If the fetch fails
+        """
+        uid_set = compress_uid_set(uids)
+        parser = None
+        
+        try:
+            tag = self._send_command(
+                'UID', b'FETCH', uid_set.encode('ascii'),
+                f'(UID {body_item} INTERNALDATE FLAGS)'.encode('ascii')
+            )
+            parser = FetchParser(self._connection, self._receive, tag, spool_threshold)
+            
+            for _, attributes in parser.responses():
+                yield attributes
+        except GeneratorExit:
+            # Caller stopped early; read the rest so the session stays in sync
+            if parser is not None and not parser.complete:
+                parser.drain()
+            raise
+        except imaplib.IMAP4.error as e:
+            raise IMAPFetchError(
+                f"IMAP protocol error fetching messages {uid_set}: {str(e)}"
+            )
+        except Exception as e:
+            raise IMAPFetchError(
+                f"Unexpected error fetching messages {uid_set}: {str(e)}"
+            )
+        
+        if parser.status != 'OK':
+            raise IMAPFetchError(
+                f"IMAP fetch command failed for messages {uid_set}: {parser.response}"
+            )
+    
+    def _fetched_message(self, attributes: Dict[str, object], body_key: str,
+                         wanted: set) -> Optional[Tuple[str, bytes, str, List[str]]]:
+        """
+        Pick the fields of a transferred message from parsed FETCH attributes
+        
+        Args:
+            attributes: Attributes of one FETCH response
+            body_key: Attribute holding the message ('RFC822' or 'BINARY[]')
+            wanted: Set of requested UIDs
+        
+        Returns:
+            Tuple of (uid, message_data, date, flags), or None for responses
+            without a requested message (e.g. unsolicited flag updates)
+        """
+        uid = str(attributes.get('UID', ''))
+        message_data = attributes.get(body_key)
+        
+        if uid not in wanted or not message_data:
+            return None
+        
+        date = attributes.get('INTERNALDATE') or ''
+        flags = [str(flag) for flag in attributes.get('FLAGS') or []]
+        
+        return (uid, message_data, date, flags)
+    
     def append_message(self, folder: str, message_data: bytes, 
-                      date: str, flags: List[str]) -> str:
+                      date: str, flags: List[str], binary: bool = False) -> str:
         """
         Append message to destination folder with original metadata
         
         Args:
             folder: Destination folder name
-            message_data: RFC822 message data as bytes
+            message_data: RFC822 message data as bytes or SpooledMessage
             date: Original internal date string
             flags: List of message flags
+            binary: Send the message as a literal8 (RFC 3516), needed for
+                data fetched with BINARY that may contain NUL bytes
             
         Returns:
             New UID assigned by destination server
             
         Raises:
-            IMAPAppendError: If message append fails
+            IMAPAppendRejected: If the server answered NO or BAD, so the
+                message was not stored
+            IMAPAppendError: If message append fails otherwise, e.g. the
+                connection was lost and the message may have been stored
         """
         if not self._connection:
             raise IMAPAppendError("Not connected to IMAP server")
@@ -384,7 +1360,7 @@ class IMAPClient:
         try:
             # Validate message data
             if not message_data:
-                raise IMAPAppendError("Cannot append empty message data")
+                raise IMAPAppendRejected("Cannot append empty message data")
             
             # Format flags for IMAP APPEND command
             flags_str = ' '.join(flags) if flags else ''
@@ -395,16 +1371,30 @@ class IMAPClient:
             if ' ' in folder or any(c in folder for c in ['&', '|', '/']):
                 folder_to_append = f'"{folder}"'
             
-            # Append message with original date and flags
-            status, response = self._connection.append(
-                folder_to_append,
-                flags_str,
-                date if date else None,
-                message_data
-            )
+            # imaplib only accepts a preformatted INTERNALDATE when it is double-quoted
+            date_time = None
+            if date:
+                date_time = date if date.startswith('"') else f'"{date}"'
+            
+            if binary or isinstance(message_data, SpooledMessage):
+                # imaplib can neither send literal8 nor stream a literal from
+                # a file, so the command is built here
+                parts = ([self._quote_mailbox(folder).encode('utf-8')] +
+                         self._append_arguments(flags, date) +
+                         [_Literal(message_data, binary=binary)])
+                tag = self._send_command('APPEND', *parts)
+                status, response = self._connection._command_complete('APPEND', tag)
+            else:
+                # Append message with original date and flags
+                status, response = self._connection.append(
+                    folder_to_append,
+                    flags_str,
+                    date_time,
+                    message_data
+                )
             
             if status != 'OK':
-                raise IMAPAppendError(
+                raise IMAPAppendRejected(
                     f"IMAP append command failed for folder '{folder}': {response}"
                 )
             
@@ -419,8 +1409,16 @@ class IMAPClient:
             
             return uid
             
-        except imaplib.IMAP4.error as e:
+        except IMAPAppendError:
+            raise
+        except imaplib.IMAP4.abort as e:
+            # Connection lost: the server may have stored the message
             raise IMAPAppendError(
+                f"Connection lost appending message to folder '{folder}': {str(e)}"
+            )
+        except imaplib.IMAP4.error as e:
+            # Tagged BAD
+            raise IMAPAppendRejected(
                 f"IMAP protocol error appending message to folder '{folder}': {str(e)}"
             )
         except (UnicodeDecodeError, AttributeError) as e:
@@ -431,3 +1429,311 @@ class IMAPClient:
             raise IMAPAppendError(
                 f"Unexpected error appending message to folder '{folder}': {str(e)}"
             )
+    
+    def append_messages(self, folder: str, messages: List[Tuple[bytes, str, List[str]]],
+                        binary: bool = False) -> List[str]:
+        """
+        Append several messages to destination folder in one command
+        Uses MULTIAPPEND (RFC 3502) when the server advertises it, otherwise
+        falls back to one APPEND per message
+        
+        Args:
+            folder: Destination folder name
+            messages: List of (message_data, date, flags) tuples
+            binary: Send the messages as literal8 (RFC 3516)
+        
+        Returns:
+            New UIDs assigned by destination server, in the same order as
+            messages ('' for each UID the server did not report)
+        
+        Raises:
+            IMAPAppendRejected: If the server answered MULTIAPPEND with NO or
+                BAD; the command is atomic, so no message was stored
+            IMAPAppendError: If append fails otherwise. After a lost
+                connection the server may have stored every message of a
+                MULTIAPPEND; in fallback mode the messages before the
+                failing one were stored.
+        """
+        if not self._connection:
+            raise IMAPAppendError("Not connected to IMAP server")
+        
+        if not messages:
+            return []
+        
+        if len(messages) == 1 or not self.has_capability('MULTIAPPEND'):
+            return [
+                self.append_message(folder, message_data, date, flags, binary=binary)
+                for message_data, date, flags in messages
+            ]
+        
+        try:
+            parts = [self._quote_mailbox(folder).encode('utf-8')]
+            
+            for message_data, date, flags in messages:
+                if not message_data:
+                    raise IMAPAppendRejected("Cannot append empty message data")
+                parts.extend(self._append_arguments(flags, date))
+                parts.append(_Literal(message_data, binary=binary))
+            
+            tag = self._send_command('APPEND', *parts)
+            status, response = self._connection._command_complete('APPEND', tag)
+            
+            if status != 'OK':
+                raise IMAPAppendRejected(
+                    f"IMAP multiappend command failed for folder '{folder}': {response}"
+                )
+            
+            # Response format: [b'[APPENDUID <uidvalidity> <uid-set>] ...']
+            uids = []
+            if response and response[0]:
+                response_str = response[0].decode('utf-8', errors='ignore')
+                uid_match = re.search(r'APPENDUID \d+ ([\d:,]+)', response_str)
+                if uid_match:
+                    uids = expand_uid_set(uid_match.group(1))
+            
+            if len(uids) != len(messages):
+                # Server did not report UIDPLUS data we can map back
+                uids = [''] * len(messages)
+            
+            return uids
+        
+        except IMAPAppendError:
+            raise
+        except imaplib.IMAP4.abort as e:
+            # Connection lost: the server may have completed the command
+            raise IMAPAppendError(
+                f"Connection lost appending {len(messages)} messages to folder '{folder}': {str(e)}"
+            )
+        except imaplib.IMAP4.error as e:
+            # Tagged BAD
+            raise IMAPAppendRejected(
+                f"IMAP protocol error appending {len(messages)} messages to folder '{folder}': {str(e)}"
+            )
+        except Exception as e:
+            raise IMAPAppendError(
+                f"Unexpected error appending {len(messages)} messages to folder '{folder}': {str(e)}"
+            )
+    
+    def supports_pipelined_append(self) -> bool:
+        """
+        Check whether APPEND literals can be sent without waiting for '+'
+        
+        Returns:
+            True if server advertises LITERAL+ or LITERAL-
+        """
+        return self.has_capability('LITERAL+') or self.has_capability('LITERAL-')
+    
+    def supports_binary(self) -> bool:
+        """
+        Check whether messages can be fetched and appended in binary form
+        
+        Returns:
+            True if server advertises BINARY (RFC 3516)
+        """
+        return self.has_capability('BINARY')
+    
+    def append_messages_pipelined(self, folder: str,
+                                  messages: List[Tuple[str, bytes, str, List[str]]],
+                                  depth: int = 8,
+                                  binary: bool = False) -> Dict[str, Tuple[Optional[bool], str]]:
+        """
+        Append messages with several tagged APPEND commands in flight
+        Literals are sent non-synchronizing (LITERAL+ / LITERAL-) so a
+        message costs no round trip of its own; up to `depth` commands wait
+        for their tagged response at the same time.
+        
+        Args:
+            folder: Destination folder name
+            messages: List of (source_uid, message_data, date, flags) tuples
+            depth: Maximum number of APPEND commands awaiting a response
+            binary: Send the messages as literal8 (RFC 3516)
+        
+        Returns:
+            Dictionary mapping source UID to (success, detail), where detail
+            is the new destination UID ('' if not reported) on success and
+            the error text otherwise. success is False for a NO or BAD reply
+            and None for commands left without a tagged response when the
+            connection broke: the server may have stored those messages.
+        """
+        if not self._connection:
+            raise IMAPAppendError("Not connected to IMAP server")
+        
+        results = {}
+        in_flight = []  # (tag, source_uid)
+        mailbox = self._quote_mailbox(folder).encode('utf-8')
+        
+        def complete_oldest():
+            tag, source_uid = in_flight[0]
+            try:
+                status, response = self._connection._command_complete('APPEND', tag)
+            except imaplib.IMAP4.abort:
+                raise
+            except imaplib.IMAP4.error as e:
+                # BAD response: only this command failed, the session is intact
+                status, response = 'BAD', [str(e)]
+            in_flight.pop(0)
+            
+            if status != 'OK':
+                results[source_uid] = (
+                    False, f"IMAP append command failed for folder '{folder}': {response}"
+                )
+                return
+            
+            # Response format: [b'[APPENDUID <uidvalidity> <uid>] ...']
+            dest_uid = ''
+            if response and response[0]:
+                response_str = response[0].decode('utf-8', errors='ignore')
+                uid_match = re.search(r'APPENDUID \d+ (\d+)', response_str)
+                if uid_match:
+                    dest_uid = uid_match.group(1)
+            results[source_uid] = (True, dest_uid)
+        
+        try:
+            for source_uid, message_data, date, flags in messages:
+                if not message_data:
+                    results[source_uid] = (False, "Cannot append empty message data")
+                    continue
+                
+                parts = ([mailbox] + self._append_arguments(flags, date) +
+                         [_Literal(message_data, binary=binary)])
+                in_flight.append((self._send_command('APPEND', *parts), source_uid))
+                
+                while len(in_flight) >= max(depth, 1):
+                    complete_oldest()
+            
+            while in_flight:
+                complete_oldest()
+        
+        except imaplib.IMAP4.abort as e:
+            for _, source_uid in in_flight:
+                results[source_uid] = (
+                    None, f"Connection lost appending message to folder '{folder}': {str(e)}"
+                )
+        except Exception as e:
+            # Sent commands never got their reply, their outcome is unknown
+            for _, source_uid in in_flight:
+                results[source_uid] = (
+                    None, f"Unexpected error appending message to folder '{folder}': {str(e)}"
+                )
+        
+        # Messages never sent because the connection failed first
+        for source_uid, _, _, _ in messages:
+            if source_uid not in results:
+                results[source_uid] = (False, "Append not attempted after connection failure")
+        
+        return results
+    
+    def _can_send_non_sync(self, size: int) -> bool:
+        """
+        Check whether a literal of the given size may be non-synchronizing
+        
+        Args:
+            size: Literal size in bytes
+        
+        Returns:
+            True if LITERAL+ is advertised, or LITERAL- and size is small enough
+        """
+        if self.has_capability('LITERAL+'):
+            return True
+        return self.has_capability('LITERAL-') and size <= LITERAL_MINUS_MAX
+    
+    def _send_literal_data(self, data) -> None:
+        """
+        Send literal data, spooled messages chunk by chunk from their file
+        
+        Args:
+            data: Message data as bytes or SpooledMessage
+        """
+        if isinstance(data, SpooledMessage):
+            for chunk in data.chunks():
+                self._connection.send(chunk)
+        else:
+            self._connection.send(data)
+    
+    def _append_arguments(self, flags: List[str], date: str) -> List[bytes]:
+        """
+        Build the optional flag list and date arguments of an APPEND message
+        
+        Args:
+            flags: List of message flags
+            date: Internal date string (unquoted or quoted)
+        
+        Returns:
+            List of argument byte strings
+        """
+        arguments = []
+        
+        # \Recent is session state and may not be set by APPEND
+        flags = [flag for flag in flags if flag.lower() != '\\recent']
+        if flags:
+            arguments.append(f"({' '.join(flags)})".encode('utf-8'))
+        
+        if date:
+            arguments.append((date if date.startswith('"') else f'"{date}"').encode('utf-8'))
+        
+        return arguments
+    
+    def _quote_mailbox(self, folder: str) -> str:
+        """
+        Quote folder name if it contains spaces or special characters
+        
+        Args:
+            folder: Folder name
+        
+        Returns:
+            Folder name ready to be used as a command argument
+        """
+        if ' ' in folder or any(c in folder for c in ['&', '|', '/']):
+            return f'"{folder}"'
+        return folder
+    
+    def _send_command(self, name: str, *parts) -> bytes:
+        """
+        Send a command whose arguments may contain several literals
+        imaplib only supports a single literal per command, which rules out
+        MULTIAPPEND, and cannot send literal8 (~{n}) at all. Synchronizing
+        literals wait for the server continuation before the literal data is
+        sent; non-synchronizing literals are used when the server advertises
+        LITERAL+ or LITERAL-.
+        
+        Args:
+            name: Command name
+            *parts: Arguments as bytes or _Literal instances
+        
+        Returns:
+            Command tag; use _connection._command_complete to read the result
+        """
+        connection = self._connection
+        tag = connection._new_tag()
+        buffer = tag + b' ' + name.encode('ascii')
+        
+        try:
+            for part in parts:
+                if isinstance(part, _Literal):
+                    size = len(part.data)
+                    prefix = b'~' if part.binary else b''
+                    
+                    if self._can_send_non_sync(size):
+                        # LITERAL+ / LITERAL-: send data without waiting for '+'
+                        connection.send(buffer + b' %s{%d+}\r\n' % (prefix, size))
+                        self._send_literal_data(part.data)
+                        buffer = b''
+                        continue
+                    
+                    connection.send(buffer + b' %s{%d}\r\n' % (prefix, size))
+                    buffer = b''
+                    
+                    # Wait for continuation; a tagged response means rejection
+                    while connection._get_response():
+                        if connection.tagged_commands[tag]:
+                            return tag
+                    
+                    self._send_literal_data(part.data)
+                else:
+                    buffer += b' ' + part
+            
+            connection.send(buffer + b'\r\n')
+        except OSError as e:
+            raise connection.abort(f'socket error: {e}')
+        
+        return tag
@@ -3,16 +3,21 @@
 IMAP Mail Transfer Tool - Main Entry Point
 """
 import argparse
+import asyncio
 import logging
 import signal
 import sys
 from typing import Optional
 
 from .config import load_config_from_args, TransferConfig
-from .cache import CacheManager
+from .cache import CacheManager, SCHEMA_VERSION
 from .imap_client import IMAPClient
-from .transfer import TransferEngine
+from .connection_pool import ConnectionPool
+from .adaptive import AdaptiveController
+from .bandwidth import BandwidthLimiter
+from .transfer import TransferEngine, TransferResult
 from .auto_transfer import AutoTransferEngine
+from .async_transfer import transfer_single_folder
 from .utils import (
     IMAPTransferError, IMAPConnectionError, IMAPFolderError,
     ConfigValidationError, format_size
@@ -123,12 +128,150 @@ Examples:
         default='transfer_cache.db',
         help='Cache database path (default: transfer_cache.db)'
     )
+    optional.add_argument(
+        '--cache-commit-every',
+        type=int,
+        default=1,
+        help='Commit cache records in groups of this many messages instead of one disk sync per message; '
+             'after a crash the last group is verified on the destination (default: 1)'
+    )
+    optional.add_argument(
+        '--cache-commit-interval',
+        type=int,
+        default=1000,
+        help='With --cache-commit-every above 1, commit a group after this many milliseconds even if it is not full, 0 = only when full (default: 1000)'
+    )
     optional.add_argument(
         '--max-message-size',
         type=int,
         default=52428800,
         help='Maximum message size in bytes (default: 52428800 = 50MB)'
     )
+    optional.add_argument(
+        '--fetch-batch-size',
+        type=int,
+        default=50,
+        help='Maximum number of messages fetched per round trip (default: 50)'
+    )
+    optional.add_argument(
+        '--fetch-batch-bytes',
+        type=int,
+        default=20971520,
+        help='Maximum total bytes fetched per round trip (default: 20971520 = 20MB)'
+    )
+    optional.add_argument(
+        '--append-pipeline-depth',
+        type=int,
+        default=8,
+        help='APPEND commands kept in flight when destination supports LITERAL+ (default: 8, 1 disables)'
+    )
+    optional.add_argument(
+        '--pipeline',
+        action='store_true',
+        help='Fetch next messages from source while appending current ones to destination'
+    )
+    optional.add_argument(
+        '--pipeline-queue-bytes',
+        type=int,
+        default=41943040,
+        help='Maximum bytes of fetched messages waiting to be appended in --pipeline mode (default: 41943040 = 40MB)'
+    )
+    optional.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Number of parallel source/destination connection pairs per folder (default: 1)'
+    )
+    optional.add_argument(
+        '--parallel-folders',
+        type=int,
+        default=1,
+        help='Number of folders transferred at the same time in --auto-mode (default: 1)'
+    )
+    optional.add_argument(
+        '--max-connections-per-host',
+        type=int,
+        default=10,
+        help='Maximum open connections to one server in --auto-mode (default: 10)'
+    )
+    optional.add_argument(
+        '--use-asyncio',
+        action='store_true',
+        help='Transfer the folder with the asyncio engine, over --workers session pairs (single folder mode)'
+    )
+    optional.add_argument(
+        '--sync-expunges',
+        action='store_true',
+        help='Delete messages from destination that were expunged from source since the last run (requires QRESYNC on source)'
+    )
+    optional.add_argument(
+        '--follow',
+        action='store_true',
+        help='Keep running after the transfer and copy new messages as they arrive (IDLE, or STATUS polling)'
+    )
+    optional.add_argument(
+        '--poll-interval',
+        type=int,
+        default=60,
+        help='Seconds between STATUS polls in --follow mode without IDLE or in --auto-mode (default: 60)'
+    )
+    optional.add_argument(
+        '--no-source-compress',
+        dest='source_compress',
+        action='store_false',
+        help='Do not use COMPRESS=DEFLATE on source connections'
+    )
+    optional.add_argument(
+        '--no-dest-compress',
+        dest='dest_compress',
+        action='store_false',
+        help='Do not use COMPRESS=DEFLATE on destination connections'
+    )
+    optional.add_argument(
+        '--binary',
+        action='store_true',
+        help='Transfer messages with BINARY fetch/append when both servers support it (RFC 3516)'
+    )
+    optional.add_argument(
+        '--spool-threshold',
+        type=int,
+        default=10485760,
+        help='Messages larger than this (bytes) are streamed through a temporary file instead of memory, 0 disables (default: 10485760 = 10MB)'
+    )
+    optional.add_argument(
+        '--fetch-chunk-size',
+        type=int,
+        default=8388608,
+        help='Messages larger than this (bytes) are fetched in ranges of this size that resume after network errors, 0 disables (default: 8388608 = 8MB)'
+    )
+    optional.add_argument(
+        '--adaptive',
+        action='store_true',
+        help='Adjust workers and batch size to latency, failures and throttling; --workers and --fetch-batch-size become upper limits'
+    )
+    optional.add_argument(
+        '--max-rate',
+        type=int,
+        default=0,
+        help='Maximum bytes per second over all connections together, 0 = unlimited (default: 0)'
+    )
+    optional.add_argument(
+        '--source-max-rate',
+        type=int,
+        default=0,
+        help='Maximum bytes per second over all source connections, 0 = unlimited (default: 0)'
+    )
+    optional.add_argument(
+        '--dest-max-rate',
+        type=int,
+        default=0,
+        help='Maximum bytes per second over all destination connections, 0 = unlimited (default: 0)'
+    )
+    optional.add_argument(
+        '--bandwidth-schedule',
+        default=None,
+        help='JSON file with time-of-day bandwidth limits; replaces the --*max-rate options and is re-read when it changes'
+    )
     optional.add_argument(
         '--auto-mode',
         action='store_true',
@@ -187,6 +330,9 @@ def setup_logging(log_file: str) -> logging.Logger:
 _cache_manager: Optional[CacheManager] = None
 _source_client: Optional[IMAPClient] = None
 _dest_client: Optional[IMAPClient] = None
+_source_pool: Optional[ConnectionPool] = None
+_dest_pool: Optional[ConnectionPool] = None
+_bandwidth: Optional[BandwidthLimiter] = None
 _logger: Optional[logging.Logger] = None
 
 
@@ -213,16 +359,98 @@ def signal_handler(signum: int, frame) -> None:
     sys.exit(128 + signum)
 
 
+def log_compression_stats() -> None:
+    """
+    Log how much COMPRESS=DEFLATE saved on the main connections
+    """
+    for name, client in (("source", _source_client), ("destination", _dest_client)):
+        ratio = client.compression_ratio() if client else None
+        if ratio and _logger:
+            _logger.info(f"Wire compression ({name}): {ratio:.1f}:1")
+
+
+def log_transfer_summary(result: TransferResult, log_file: str) -> None:
+    """
+    Log the final statistics and error summary of a single folder transfer
+    
+    Args:
+        result: Transfer result of the folder
+        log_file: Log file holding the full error log
+    """
+    # Display final statistics
+    _logger.info("-" * 60)
+    _logger.info("Transfer Complete!")
+    _logger.info("=" * 60)
+    _logger.info(f"Total messages:      {result.total_messages}")
+    _logger.info(f"Transferred:         {result.transferred}")
+    _logger.info(f"Skipped (cached):    {result.skipped}")
+    if result.skipped_by_size:
+        _logger.info(f"Skipped (size):      {result.skipped_by_size}")
+    if result.flags_updated or result.expunged:
+        _logger.info(f"Flags updated:       {result.flags_updated}")
+        _logger.info(f"Expunged:            {result.expunged}")
+    _logger.info(f"Failed:              {result.failed}")
+    if result.reconnects:
+        _logger.info(f"Reconnects:          {result.reconnects}")
+    _logger.info(f"Total size:          {format_size(result.total_size)}")
+    if result.binary_bytes_saved:
+        _logger.info(f"Saved by BINARY:     {format_size(result.binary_bytes_saved)}")
+    _logger.info(f"Duration:            {result.duration_seconds:.1f} seconds")
+    log_compression_stats()
+    
+    if result.transferred > 0:
+        rate = result.transferred / result.duration_seconds
+        _logger.info(f"Transfer rate:       {rate:.1f} messages/second")
+        if result.bytes_transferred:
+            byte_rate = int(result.bytes_transferred / result.duration_seconds)
+            _logger.info(
+                f"Data rate:           {format_size(result.bytes_transferred)} "
+                f"at {format_size(byte_rate)}/s"
+            )
+    
+    _logger.info("=" * 60)
+    
+    # Display final error summary if any
+    if result.errors:
+        _logger.warning("")
+        _logger.warning("=" * 60)
+        _logger.warning("ERROR SUMMARY")
+        _logger.warning("=" * 60)
+        _logger.warning(f"Total errors encountered: {len(result.errors)}")
+        _logger.warning("")
+        _logger.warning("Error details:")
+        for error in result.errors[:10]:  # Show first 10 errors
+            _logger.warning(f"  - {error}")
+        if len(result.errors) > 10:
+            _logger.warning(f"  ... and {len(result.errors) - 10} more errors")
+        _logger.warning("")
+        _logger.warning(f"Full error log available in: {log_file}")
+        _logger.warning("=" * 60)
+
+
 def cleanup_resources() -> None:
     """
     Clean up resources (close connections and cache)
     Called during normal exit or signal handling
     """
-    global _cache_manager, _source_client, _dest_client, _logger
+    global _cache_manager, _source_client, _dest_client, _source_pool, _dest_pool, _bandwidth, _logger
     
     if _logger:
         _logger.info("Cleaning up resources...")
     
+    # Stop following the bandwidth schedule
+    if _bandwidth:
+        _bandwidth.close()
+    
+    # Close idle pooled connections of parallel workers
+    for pool in (_source_pool, _dest_pool):
+        if pool:
+            try:
+                pool.close()
+            except Exception as e:
+                if _logger:
+                    _logger.warning(f"Error closing connection pool: {e}")
+    
     # Disconnect IMAP clients
     if _source_client:
         try:
@@ -261,7 +489,7 @@ def main() -> int:
     Returns:
         Exit code (0 = success, 1 = error)
     """
-    global _cache_manager, _source_client, _dest_client, _logger
+    global _cache_manager, _source_client, _dest_client, _source_pool, _dest_pool, _bandwidth, _logger
     
     # Register signal handlers for graceful shutdown
     signal.signal(signal.SIGINT, signal_handler)
@@ -302,34 +530,92 @@ def main() -> int:
         # Initialize cache manager
         _logger.info(f"Initializing cache database: {config.cache_db}")
         try:
-            _cache_manager = CacheManager(config.cache_db)
+            _cache_manager = CacheManager(
+                config.cache_db,
+                commit_every=config.cache_commit_every,
+                commit_interval=config.cache_commit_interval / 1000
+            )
             _cache_manager.initialize()
+            if _cache_manager.migrated_from:
+                _logger.info(
+                    f"Cache database migrated from schema version {_cache_manager.migrated_from} "
+                    f"to {SCHEMA_VERSION}"
+                )
             _logger.debug("Cache database initialized")
         except Exception as e:
             _logger.error(f"Failed to initialize cache database: {e}")
             cleanup_resources()
             return 1
         
+        # Set up bandwidth limits shared by all connections
+        if (config.max_rate or config.source_max_rate or config.dest_max_rate or
+                config.bandwidth_schedule):
+            try:
+                _bandwidth = BandwidthLimiter(
+                    global_rate=config.max_rate,
+                    source_rate=config.source_max_rate,
+                    dest_rate=config.dest_max_rate,
+                    schedule_path=config.bandwidth_schedule,
+                    logger=_logger
+                )
+            except ValueError as e:
+                _logger.error(f"Configuration validation failed: {e}")
+                cleanup_resources()
+                return 1
+            _bandwidth.start()
+        
+        # The asyncio engine opens its own sessions, no synchronous clients are needed
+        if config.use_asyncio:
+            _logger.info("Starting transfer process with the asyncio engine...")
+            _logger.info("-" * 60)
+            try:
+                result = asyncio.run(transfer_single_folder(config, _cache_manager, _logger))
+            except (IMAPConnectionError, IMAPFolderError) as e:
+                _logger.error(f"Asyncio transfer could not start: {e}")
+                cleanup_resources()
+                return 1
+            
+            log_transfer_summary(result, config.log_file)
+            cleanup_resources()
+            
+            if result.failed > 0:
+                _logger.warning("Transfer completed with errors")
+                return 1
+            _logger.info("Transfer completed successfully")
+            return 0
+        
         # Create IMAP clients
         _logger.info("Creating IMAP client connections...")
         _source_client = IMAPClient(
             host=config.source_host,
             username=config.source_user,
             password=config.source_pass,
-            port=config.port
+            port=config.port,
+            compress=config.source_compress,
+            rate_limiters=_bandwidth.limiters_for('source') if _bandwidth else None
         )
         _dest_client = IMAPClient(
             host=config.dest_host,
             username=config.dest_user,
             password=config.dest_pass,
-            port=config.port
+            port=config.port,
+            compress=config.dest_compress,
+            rate_limiters=_bandwidth.limiters_for('dest') if _bandwidth else None
         )
+        _source_pool = ConnectionPool(_source_client, _logger)
+        _dest_pool = ConnectionPool(_dest_client, _logger)
+        controller = None
+        if config.adaptive:
+            controller = AdaptiveController(config.workers, config.fetch_batch_size, _logger)
+            _logger.info(f"Adaptive mode: starting with {controller.describe()}")
         
         # Connect to source server
         _logger.info(f"Connecting to source server: {config.source_host}:{config.port}")
         try:
             _source_client.connect()
             _logger.info("✓ Connected to source server")
+            if _source_client.compression_active:
+                _logger.info("  Using COMPRESS=DEFLATE on source connection")
         except IMAPConnectionError as e:
             _logger.error(f"Failed to connect to source server: {e}")
             cleanup_resources()
@@ -340,6 +626,8 @@ def main() -> int:
         try:
             _dest_client.connect()
             _logger.info("✓ Connected to destination server")
+            if _dest_client.compression_active:
+                _logger.info("  Using COMPRESS=DEFLATE on destination connection")
         except IMAPConnectionError as e:
             _logger.error(f"Failed to connect to destination server: {e}")
             cleanup_resources()
@@ -364,11 +652,30 @@ def main() -> int:
                 logger=_logger,
                 max_message_size=config.max_message_size,
                 retry_count=config.retry_count,
-                retry_delay=config.retry_delay
+                retry_delay=config.retry_delay,
+                fetch_batch_size=config.fetch_batch_size,
+                fetch_batch_bytes=config.fetch_batch_bytes,
+                append_pipeline_depth=config.append_pipeline_depth,
+                pipeline=config.pipeline,
+                pipeline_queue_bytes=config.pipeline_queue_bytes,
+                workers=config.workers,
+                parallel_folders=config.parallel_folders,
+                max_connections_per_host=config.max_connections_per_host,
+                sync_expunges=config.sync_expunges,
+                binary=config.binary,
+                spool_threshold=config.spool_threshold,
+                fetch_chunk_size=config.fetch_chunk_size,
+                source_pool=_source_pool,
+                dest_pool=_dest_pool,
+                controller=controller
             )
             
             # Transfer all folders
             results = auto_engine.transfer_all_folders()
+            log_compression_stats()
+            
+            if config.follow:
+                auto_engine.follow_all_folders(poll_interval=config.poll_interval)
             
             # Clean up resources
             cleanup_resources()
@@ -453,7 +760,20 @@ def main() -> int:
             logger=_logger,
             max_message_size=config.max_message_size,
             retry_count=config.retry_count,
-            retry_delay=config.retry_delay
+            retry_delay=config.retry_delay,
+            fetch_batch_size=config.fetch_batch_size,
+            fetch_batch_bytes=config.fetch_batch_bytes,
+            append_pipeline_depth=config.append_pipeline_depth,
+            pipeline=config.pipeline,
+            pipeline_queue_bytes=config.pipeline_queue_bytes,
+            workers=config.workers,
+            sync_expunges=config.sync_expunges,
+            binary=config.binary,
+            spool_threshold=config.spool_threshold,
+            fetch_chunk_size=config.fetch_chunk_size,
+            source_pool=_source_pool,
+            dest_pool=_dest_pool,
+            controller=controller
         )
         
         # Start transfer
@@ -463,39 +783,10 @@ def main() -> int:
         
         result = transfer_engine.transfer_folder(config.folder)
         
-        # Display final statistics
-        _logger.info("-" * 60)
-        _logger.info("Transfer Complete!")
-        _logger.info("=" * 60)
-        _logger.info(f"Total messages:      {result.total_messages}")
-        _logger.info(f"Transferred:         {result.transferred}")
-        _logger.info(f"Skipped (cached):    {result.skipped}")
-        _logger.info(f"Failed:              {result.failed}")
-        _logger.info(f"Total size:          {format_size(result.total_size)}")
-        _logger.info(f"Duration:            {result.duration_seconds:.1f} seconds")
-        
-        if result.transferred > 0:
-            rate = result.transferred / result.duration_seconds
-            _logger.info(f"Transfer rate:       {rate:.1f} messages/second")
-        
-        _logger.info("=" * 60)
+        log_transfer_summary(result, config.log_file)
         
-        # Display final error summary if any
-        if result.errors:
-            _logger.warning("")
-            _logger.warning("=" * 60)
-            _logger.warning("ERROR SUMMARY")
-            _logger.warning("=" * 60)
-            _logger.warning(f"Total errors encountered: {len(result.errors)}")
-            _logger.warning("")
-            _logger.warning("Error details:")
-            for error in result.errors[:10]:  # Show first 10 errors
-                _logger.warning(f"  - {error}")
-            if len(result.errors) > 10:
-                _logger.warning(f"  ... and {len(result.errors) - 10} more errors")
-            _logger.warning("")
-            _logger.warning(f"Full error log available in: {config.log_file}")
-            _logger.warning("=" * 60)
+        if config.follow:
+            transfer_engine.follow_folder(config.folder, poll_interval=config.poll_interval)
         
         # Clean up resources
         cleanup_resources()
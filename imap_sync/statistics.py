@@ -0,0 +1,185 @@
+"""
+Statistics Module
+Running transfer counters kept in memory, so progress and summaries need no cache queries
+"""
+
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, Optional, Set
+
+from .utils import format_size
+
+
+@dataclass
+class FolderStatistics:
+    """Counters of one folder, or of all folders together"""
+    folder: str
+    stored_messages: int = 0  # Recorded in the cache, including earlier runs
+    stored_bytes: int = 0
+    transferred: int = 0  # Recorded since the current pass over the folder began
+    transferred_bytes: int = 0
+    started: Optional[float] = None  # time.monotonic() when the pass began
+    
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the pass began, 0 if it has not"""
+        return time.monotonic() - self.started if self.started is not None else 0.0
+    
+    @property
+    def message_rate(self) -> float:
+        """Messages per second in the current pass"""
+        elapsed = self.elapsed
+        return self.transferred / elapsed if elapsed > 0 else 0.0
+    
+    @property
+    def byte_rate(self) -> float:
+        """Bytes per second in the current pass"""
+        elapsed = self.elapsed
+        return self.transferred_bytes / elapsed if elapsed > 0 else 0.0
+    
+    def describe(self) -> str:
+        """
+        Counters of the current pass for progress bars and log messages
+        
+        Returns:
+            Text like "120 msgs, 4.5 MB, 310.2 KB/s"
+        """
+        return (
+            f"{self.transferred} msgs, {format_size(self.transferred_bytes)}, "
+            f"{format_size(int(self.byte_rate))}/s"
+        )
+
+
+class TransferStatistics:
+    """
+    Message and byte counters per folder, updated as messages are recorded
+    The cache totals of a folder are loaded once (see CacheManager) and
+    then kept current by record(), forget() and reset(), so reading them
+    costs no query however large the folder grows. Thread-safe, so
+    parallel workers and folders update one instance.
+    """
+    
+    def __init__(self):
+        """Initialize empty statistics"""
+        self._folders: Dict[str, FolderStatistics] = {}
+        self._loaded: Set[str] = set()  # Folders whose cache totals are known
+        self._lock = threading.Lock()
+    
+    def is_loaded(self, folder: str) -> bool:
+        """
+        Check whether the cache totals of a folder are known
+        
+        Args:
+            folder: Folder name
+        
+        Returns:
+            True if load() or reset() was called for the folder
+        """
+        with self._lock:
+            return folder in self._loaded
+    
+    def load(self, folder: str, messages: int, size: int) -> None:
+        """
+        Set the cache totals of a folder, keeping counters of the current pass
+        The totals replace what record() counted so far, so they must include
+        the messages recorded before.
+        
+        Args:
+            folder: Folder name
+            messages: Messages recorded in the cache
+            size: Sum of their sizes in bytes
+        """
+        with self._lock:
+            stats = self._folders.setdefault(folder, FolderStatistics(folder))
+            stats.stored_messages = messages
+            stats.stored_bytes = size
+            self._loaded.add(folder)
+    
+    def begin(self, folder: str) -> None:
+        """
+        Start a pass over a folder: clear its pass counters and start the clock
+        
+        Args:
+            folder: Folder name
+        """
+        with self._lock:
+            stats = self._folders.setdefault(folder, FolderStatistics(folder))
+            stats.transferred = 0
+            stats.transferred_bytes = 0
+            stats.started = time.monotonic()
+    
+    def record(self, folder: str, size: int) -> None:
+        """
+        Count a message recorded in the cache
+        
+        Args:
+            folder: Folder name
+            size: Message size in bytes (0 if unknown)
+        """
+        with self._lock:
+            stats = self._folders.setdefault(folder, FolderStatistics(folder))
+            stats.stored_messages += 1
+            stats.stored_bytes += size
+            stats.transferred += 1
+            stats.transferred_bytes += size
+            if stats.started is None:
+                stats.started = time.monotonic()
+    
+    def forget(self, folder: str, messages: int, size: int) -> None:
+        """
+        Remove messages whose cache records were deleted
+        
+        Args:
+            folder: Folder name
+            messages: Number of deleted records
+            size: Sum of their sizes in bytes
+        """
+        with self._lock:
+            stats = self._folders.get(folder)
+            if stats is None:
+                return
+            stats.stored_messages = max(stats.stored_messages - messages, 0)
+            stats.stored_bytes = max(stats.stored_bytes - size, 0)
+    
+    def reset(self, folder: str) -> None:
+        """
+        Set the cache totals of a folder whose records were all deleted to zero
+        
+        Args:
+            folder: Folder name
+        """
+        self.load(folder, 0, 0)
+    
+    def folder(self, folder: str) -> FolderStatistics:
+        """
+        Get the counters of a folder
+        
+        Args:
+            folder: Folder name
+        
+        Returns:
+            Copy of the folder's counters (all zero if nothing is known)
+        """
+        with self._lock:
+            stats = self._folders.get(folder)
+            return replace(stats) if stats else FolderStatistics(folder)
+    
+    def totals(self) -> FolderStatistics:
+        """
+        Get the counters of all folders seen in this run added up
+        The pass clock starts with the earliest folder pass.
+        
+        Returns:
+            FolderStatistics with folder "*"
+        """
+        total = FolderStatistics('*')
+        with self._lock:
+            for stats in self._folders.values():
+                total.stored_messages += stats.stored_messages
+                total.stored_bytes += stats.stored_bytes
+                total.transferred += stats.transferred
+                total.transferred_bytes += stats.transferred_bytes
+                if stats.started is not None and (total.started is None or stats.started < total.started):
+                    total.started = stats.started
+        return total
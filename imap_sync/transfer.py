@@ -5,14 +5,23 @@ Manages message transfer logic and streaming control
 
 import gc
 import logging
+import queue
+import tempfile
+import threading
 import time
-from typing import List, Optional
+from typing import List, Optional, Dict, Iterator, Iterable, Tuple, Set
 from dataclasses import dataclass
 from tqdm import tqdm
 
 from .imap_client import IMAPClient
 from .cache import CacheManager
-from .utils import RetryHandler, format_size, IMAPFetchError, IMAPAppendError
+from .connection_pool import ConnectionPool
+from .adaptive import AdaptiveController
+from .utils import (
+    RetryHandler, ByteBoundedQueue, SpooledMessage, format_size, classify_error, ERROR_FATAL,
+    parse_message_id, IMAPFetchError, IMAPAppendError, IMAPAppendRejected, IMAPFolderError,
+    IMAPStoreError, IMAPConnectionError
+)
 
 
 @dataclass
@@ -25,6 +34,94 @@ class TransferResult:
     total_size: int
     duration_seconds: float
     errors: List[str]
+    skipped_by_size: int = 0
+    flags_updated: int = 0
+    expunged: int = 0
+    binary_bytes_saved: int = 0
+    reconnects: int = 0
+    bytes_transferred: int = 0
+
+
+def sync_start_uid(cache_manager: CacheManager, folder: str, uidvalidity: Optional[int],
+                   logger: logging.Logger) -> int:
+    """
+    Decide where the scan of a source folder starts
+    If UIDVALIDITY matches the stored folder state, only UIDs above the
+    stored watermark can be new. If it changed, cached UIDs refer to
+    other messages, so the cached state of the folder is discarded.
+    
+    Args:
+        cache_manager: Cache manager
+        folder: Source folder name (for cache)
+        uidvalidity: UIDVALIDITY of the selected source folder, None if unknown
+        logger: Logger instance
+    
+    Returns:
+        1 for a full scan, otherwise the first UID above the watermark
+    """
+    if uidvalidity is None:
+        return 1
+    
+    state = cache_manager.get_folder_state(folder)
+    if state is None:
+        return 1
+    
+    stored_uidvalidity, highest_uid, _ = state
+    if stored_uidvalidity != uidvalidity:
+        logger.warning(
+            f"UIDVALIDITY of folder '{folder}' changed ({stored_uidvalidity} -> {uidvalidity}), "
+            f"discarding cached transfer state of the folder"
+        )
+        cache_manager.invalidate_folder(folder)
+        return 1
+    
+    logger.info(f"Incremental sync: only checking UIDs above {highest_uid}")
+    return highest_uid + 1
+
+
+def advance_watermark(cache_manager: CacheManager, folder: str, uidvalidity: Optional[int],
+                      source_uids: List[str], pending: Set[str],
+                      highest_modseq: Optional[int], logger: logging.Logger) -> None:
+    """
+    Store the highest UID below which every source message is transferred
+    Messages that failed or were skipped by size hold the watermark below
+    them, so the next incremental run looks at them again
+    
+    Batched transfer records of the folder are committed first, so the
+    watermark never gets ahead of the records it stands for
+    
+    Args:
+        cache_manager: Cache manager
+        folder: Source folder name (for cache)
+        uidvalidity: UIDVALIDITY of the selected source folder, None if unknown
+        source_uids: UIDs examined in this run
+        pending: UIDs among them that were not transferred
+        highest_modseq: HIGHESTMODSEQ up to which flag changes are synced
+        logger: Logger instance
+    """
+    try:
+        cache_manager.finish_folder(folder)
+    except Exception as e:
+        logger.warning(f"Failed to commit transfer records of folder '{folder}': {str(e)}")
+    
+    if uidvalidity is None:
+        return
+    
+    if pending:
+        highest_uid = min(int(uid) for uid in pending) - 1
+    elif source_uids:
+        highest_uid = max(int(uid) for uid in source_uids)
+    else:
+        highest_uid = 0
+    
+    state = cache_manager.get_folder_state(folder)
+    if state and state[0] == uidvalidity:
+        highest_uid = max(highest_uid, state[1])
+    
+    try:
+        cache_manager.set_folder_state(folder, uidvalidity, highest_uid, highest_modseq)
+    except Exception as e:
+        logger.warning(f"Failed to save incremental sync state: {str(e)}")
 
 
 class TransferEngine:
@@ -36,7 +133,14 @@ class TransferEngine:
     def __init__(self, source_client: IMAPClient, dest_client: IMAPClient,
                  cache_manager: CacheManager, logger: logging.Logger,
                  max_message_size: int = 52428800, retry_count: int = 3,
-                 retry_delay: int = 5):
+                 retry_delay: int = 5, fetch_batch_size: int = 50,
+                 fetch_batch_bytes: int = 20971520, append_pipeline_depth: int = 8,
+                 pipeline: bool = False, pipeline_queue_bytes: int = 41943040,
+                 workers: int = 1, sync_expunges: bool = False, binary: bool = False,
+                 spool_threshold: int = 10485760, fetch_chunk_size: int = 8388608,
+                 source_pool: Optional[ConnectionPool] = None,
+                 dest_pool: Optional[ConnectionPool] = None,
+                 controller: Optional[AdaptiveController] = None):
         """
         Initialize TransferEngine with dependencies
         
@@ -48,22 +152,90 @@ class TransferEngine:
             max_message_size: Maximum message size in bytes (default: 50MB)
             retry_count: Number of retry attempts for network errors
             retry_delay: Initial delay between retries in seconds
+            fetch_batch_size: Maximum number of messages per batched FETCH
+            fetch_batch_bytes: Maximum total message bytes per batched FETCH (default: 20MB)
+            append_pipeline_depth: APPEND commands kept in flight when the
+                destination supports LITERAL+/LITERAL- (1 disables pipelining)
+            pipeline: Overlap fetching and appending in two stages linked by a queue
+            pipeline_queue_bytes: Maximum bytes of fetched messages waiting
+                between the stages (default: 40MB)
+            workers: Number of source/destination connection pairs transferring
+                the folder in parallel (1 uses only the given clients)
+            sync_expunges: Delete messages from the destination once they are
+                expunged from the source (needs QRESYNC on the source)
+            binary: Fetch with BINARY.PEEK[] and append with literal8 when both
+                servers support BINARY (RFC 3516), which avoids transferring
+                base64-encoded attachments in their inflated form
+            spool_threshold: Messages larger than this many bytes are streamed
+                to a temporary file and appended from there in chunks, so
+                memory use does not grow with message size (default: 10MB,
+                0 keeps every message in memory)
+            fetch_chunk_size: Messages larger than this many bytes are fetched
+                in BODY.PEEK[]<offset.length> ranges of this size; after a
+                network error the retry reconnects and resumes at the first
+                missing byte (default: 8MB, 0 fetches every message whole)
+            source_pool: Pool providing and repairing source connections;
+                a private pool is created (and its idle connections closed
+                after each parallel run) when not given
+            dest_pool: Pool providing and repairing destination connections
+            controller: Adaptive controller choosing the number of workers (up
+                to workers) and the batch size (up to fetch_batch_size) from
+                measured latency, failures and throttling; both stay fixed
+                when not given
         """
         self.source_client = source_client
         self.dest_client = dest_client
         self.cache_manager = cache_manager
         self.logger = logger
         self.max_message_size = max_message_size
+        self.fetch_batch_size = fetch_batch_size
+        self.fetch_batch_bytes = fetch_batch_bytes
+        self.append_pipeline_depth = append_pipeline_depth
+        self.pipeline = pipeline
+        self.pipeline_queue_bytes = pipeline_queue_bytes
+        self.workers = workers
+        self.sync_expunges = sync_expunges
+        self.binary = binary
+        self.spool_threshold = spool_threshold
+        self.fetch_chunk_size = fetch_chunk_size
         self.retry_handler = RetryHandler(max_retries=retry_count, delay=retry_delay, logger=logger)
+        self._owned_pools = []  # Pools created here, drained after parallel runs
+        if source_pool is None:
+            source_pool = ConnectionPool(source_client, logger)
+            self._owned_pools.append(source_pool)
+        if dest_pool is None:
+            dest_pool = ConnectionPool(dest_client, logger)
+            self._owned_pools.append(dest_pool)
+        self.source_pool = source_pool
+        self.dest_pool = dest_pool
+        self.controller = controller
+        if controller:
+            controller.watch(source_pool.circuit_breaker)
+            controller.watch(dest_pool.circuit_breaker)
+        self._reconnects = 0  # Broken connections replaced during the current run
+        self._fatal_errors: List[str] = []  # Session-ending errors, shared with workers
         self._message_data = None  # For cleanup tracking
+        self._progress_sizes: Optional[Dict[str, int]] = None  # Set for byte progress
+        self._next_modseq: Optional[int] = None  # HIGHESTMODSEQ to store with the watermark
+        self._message_sizes: Dict[str, int] = {}  # RFC822.SIZE of messages being transferred
+        self._binary_uids: Set[str] = set()  # Fetched with BINARY, not yet stored
+        self._binary_saved = 0  # RFC822.SIZE minus binary size of stored messages
+        # Serializes source commands between the pipeline's fetch stage and
+        # RFC822 re-fetches of messages the destination refused in binary form
+        self._source_lock = threading.RLock()
+        # Guards the counters and binary bookkeeping, which the pipeline's
+        # fetch stage and the appending thread both update
+        self._state_lock = threading.Lock()
     
-    def _get_untransferred_uids(self, source_uids: List[str], folder: str) -> List[str]:
+    def _get_untransferred_uids(self, source_uids: List[str], folder: str,
+                                min_uid: int = 1) -> List[str]:
         """
         Filter out already transferred messages by comparing with cache
         
         Args:
             source_uids: List of UIDs from source server
             folder: Folder name
+            min_uid: Lowest UID in source_uids; cached UIDs below it are not loaded
             
         Returns:
             List of UIDs that need to be transferred
@@ -71,7 +243,7 @@ class TransferEngine:
         self.logger.debug(f"Filtering {len(source_uids)} UIDs against cache for folder '{folder}'")
         
         # Get already transferred UIDs from cache
-        transferred_uids = set(self.cache_manager.get_transferred_uids(folder))
+        transferred_uids = set(self.cache_manager.get_transferred_uids(folder, min_uid=min_uid))
         
         # Filter out transferred UIDs
         untransferred = [uid for uid in source_uids if uid not in transferred_uids]
@@ -83,13 +255,213 @@ class TransferEngine:
         
         return untransferred
     
+    def _verify_unflushed(self, uids: List[str], folder: str, dest_folder: str,
+                          sizes: Optional[Dict[str, int]]) -> List[str]:
+        """
+        Find messages an interrupted run transferred without recording them
+        With batched cache commits, the last group of records before a crash
+        is lost although its messages are on the destination. They were
+        appended after the highest recorded destination UID, so only newer
+        destination messages are compared with the uncached source messages
+        by Message-ID; matches are recorded instead of transferred again.
+        
+        Args:
+            uids: Uncached source UIDs
+            folder: Source folder name (for cache)
+            dest_folder: Destination folder name
+            sizes: Message sizes by UID, if known
+        
+        Returns:
+            UIDs that still need to be transferred
+        """
+        since_uid = self.cache_manager.get_highest_dest_uid(folder) + 1
+        self.logger.info(
+            f"Previous run stopped with unflushed cache records for folder '{folder}', "
+            f"checking destination messages from UID {since_uid}"
+        )
+        
+        try:
+            if self.dest_client.selected_folder != dest_folder:
+                if not self.dest_client.folder_exists(dest_folder):
+                    return uids
+                self.dest_client.select_folder(dest_folder)
+            dest_ids = self.dest_client.fetch_message_ids(start_uid=since_uid)
+            source_ids = self.source_client.fetch_message_ids(uids) if dest_ids else {}
+        except (IMAPFetchError, IMAPFolderError) as e:
+            self.logger.warning(
+                f"Could not verify unflushed messages, they may be transferred twice: {str(e)}"
+            )
+            return uids
+        
+        # Destination UIDs by Message-ID, each usable for one source message
+        available: Dict[str, List[str]] = {}
+        for dest_uid, message_id in sorted(dest_ids.items(), key=lambda item: int(item[0])):
+            available.setdefault(message_id, []).append(dest_uid)
+        
+        remaining = []
+        for uid in uids:
+            matches = available.get(source_ids.get(uid, ''))
+            if not matches:
+                remaining.append(uid)
+                continue
+            try:
+                self.cache_manager.mark_transferred(uid, matches.pop(0), folder,
+                                                    sizes.get(uid) if sizes else None)
+            except Exception as e:
+                self.logger.warning(f"Failed to record verified message UID {uid}: {str(e)}")
+                remaining.append(uid)
+        
+        self.logger.info(
+            f"Found {len(uids) - len(remaining)} unflushed messages already on destination"
+        )
+        return remaining
+    
+    def _sync_start_uid(self, folder: str) -> int:
+        """
+        Decide where the scan of the source folder starts
+        
+        Args:
+            folder: Source folder name (for cache)
+        
+        Returns:
+            1 for a full scan, otherwise the first UID above the watermark
+        """
+        return sync_start_uid(self.cache_manager, folder, self.source_client.uidvalidity, self.logger)
+    
+    def _advance_watermark(self, folder: str, source_uids: List[str], pending: Set[str]) -> None:
+        """
+        Store the highest UID below which every source message is transferred
+        
+        Args:
+            folder: Source folder name (for cache)
+            source_uids: UIDs examined in this run
+            pending: UIDs among them that were not transferred
+        """
+        advance_watermark(self.cache_manager, folder, self.source_client.uidvalidity,
+                          source_uids, pending, self._next_modseq, self.logger)
+    
+    def _sync_changes(self, folder: str, dest_folder: str, errors: List[str]) -> Tuple[int, int]:
+        """
+        Bring flag changes and expunges of already transferred messages over
+        Uses CONDSTORE/QRESYNC: only messages whose mod-sequence is above the
+        HIGHESTMODSEQ stored by the previous run are fetched, and their new
+        flags are written to the recorded destination UIDs with batched
+        UID STORE commands. Also decides which HIGHESTMODSEQ the watermark
+        stores; on failure the old one is kept so the changes are retried.
+        
+        Args:
+            folder: Source folder name (for cache)
+            dest_folder: Destination folder name
+            errors: List the failure message is appended to
+        
+        Returns:
+            Tuple of (flags_updated, expunged) message counts
+        """
+        self._next_modseq = None
+        if not self.source_client.supports_delta_sync():
+            return 0, 0
+        
+        current_modseq = self.source_client.highestmodseq
+        self._next_modseq = current_modseq
+        
+        state = self.cache_manager.get_folder_state(folder)
+        if state is None or state[0] != self.source_client.uidvalidity or state[2] is None:
+            return 0, 0
+        
+        since_modseq = state[2]
+        if current_modseq <= since_modseq:
+            self.logger.info(f"No flag changes in folder '{folder}' since last run")
+            return 0, 0
+        
+        try:
+            changed, vanished = self.source_client.fetch_changes(since_modseq)
+            if not self.sync_expunges:
+                vanished = []
+            
+            dest_uids = self.cache_manager.get_dest_uids(folder, list(changed) + vanished)
+            updates = {dest_uids[uid]: flags for uid, flags in changed.items() if uid in dest_uids}
+            deletions = [dest_uids[uid] for uid in vanished if uid in dest_uids]
+            
+            self.logger.info(
+                f"Delta sync: {len(changed)} messages changed and {len(vanished)} expunged "
+                f"since modseq {since_modseq}, {len(updates) + len(deletions)} of them on destination"
+            )
+            
+            if (updates or deletions) and self.dest_client.selected_folder != dest_folder:
+                self.dest_client.select_folder(dest_folder)
+            
+            if updates:
+                self.dest_client.store_flags(updates)
+            
+            if deletions:
+                if not self.dest_client.delete_messages(deletions):
+                    self.logger.warning(
+                        f"Destination lacks UIDPLUS: {len(deletions)} messages marked \\Deleted "
+                        f"but not expunged"
+                    )
+            if vanished:
+                self.cache_manager.forget_messages(folder, vanished)
+            
+            return len(updates), len(deletions)
+        
+        except (IMAPFetchError, IMAPFolderError, IMAPStoreError) as e:
+            error_msg = f"Delta sync of folder '{folder}' failed, retrying next run: {str(e)}"
+            self.logger.warning(error_msg)
+            errors.append(error_msg)
+            self._next_modseq = since_modseq
+            return 0, 0
+    
+    def _load_manifest(self, folder: str,
+                       start_uid: int = 1) -> Tuple[List[str], Optional[Dict[str, int]]]:
+        """
+        Read the folder manifest from source and persist it in the cache
+        Falls back to a plain UID SEARCH if the server rejects UID FETCH 1:*
+        (some servers do so for empty folders); sizes then come from the
+        manifest stored by an earlier run, as far as it covers the UIDs.
+        
+        Args:
+            folder: Source folder name (for cache)
+            start_uid: Lowest UID to read (above 1 for incremental sync)
+        
+        Returns:
+            Tuple of (uids, sizes), sizes is None if no size is known; it
+            may lack UIDs the stored manifest does not cover
+        
+        Raises:
+            IMAPFetchError: If UIDs cannot be retrieved at all
+        """
+        try:
+            entries = self.source_client.fetch_manifest(start_uid)
+        except IMAPFetchError as e:
+            self.logger.warning(f"Could not retrieve folder manifest, using UID list: {str(e)}")
+            uids = self.source_client.get_uid_list(start_uid)
+            # Entries of an earlier UIDVALIDITY were dropped by invalidate_folder()
+            stored = {entry.uid: entry.size for entry in self.cache_manager.get_manifest(folder)}
+            sizes = {uid: stored[uid] for uid in uids if uid in stored}
+            if not sizes:
+                return uids, None
+            self.logger.info(f"Using stored manifest for {len(sizes)} of {len(uids)} messages")
+            return uids, sizes
+        
+        try:
+            self.cache_manager.save_manifest(folder, entries, replace_all=(start_uid == 1))
+        except Exception as e:
+            self.logger.warning(f"Failed to save folder manifest to cache: {str(e)}")
+        
+        total_bytes = sum(entry.size for entry in entries)
+        self.logger.info(f"Manifest: {len(entries)} messages, {format_size(total_bytes)}")
+        
+        return [entry.uid for entry in entries], {entry.uid: entry.size for entry in entries}
+    
     def _cleanup_message(self) -> None:
         """
         Release message data from memory and invoke garbage collection
         Ensures memory is freed after each message transfer
         """
-        # Delete message data reference
+        # Delete message data reference, removing the temporary file of a spooled message
         if self._message_data is not None:
+            if isinstance(self._message_data, SpooledMessage):
+                self._message_data.close()
             del self._message_data
             self._message_data = None
         
@@ -108,11 +480,16 @@ class TransferEngine:
             uid: Current message UID
             status: Status message
         """
-        progress_bar.set_description(f"UID {uid}: {status}")
-        progress_bar.update(1)
+        # Progress is counted in bytes when every message size is known
+        step = self._progress_sizes.get(uid, 0) if self._progress_sizes is not None else 1
+        
+        # Parallel workers share one progress bar
+        with progress_bar.get_lock():
+            progress_bar.set_description(f"UID {uid}: {status}")
+            progress_bar.update(step)
     
     def _transfer_single_message(self, uid: str, folder: str, dest_folder: str,
-                                 progress_bar: Optional[tqdm] = None) -> bool:
+                                 progress_bar: Optional[tqdm] = None) -> Optional[bool]:
         """
         Transfer a single message from source to destination with streaming
         Implements retry logic and memory cleanup
@@ -124,28 +501,181 @@ class TransferEngine:
             progress_bar: Optional progress bar for updates
             
         Returns:
-            True if transfer successful, False otherwise
+            True if transfer successful, None if the message exceeds the
+            size limit, False otherwise
         """
         try:
-            # Fetch message from source with retry logic
-            def fetch_operation():
-                return self.source_client.fetch_message(uid)
+            message = self._fetch_single_message(uid)
+            if message is None:
+                return False
             
+            message_data, date, flags = message
+            return self._store_message(uid, message_data, date, flags, folder, dest_folder)
+        
+        except Exception as e:
+            # Catch any unexpected errors
+            self.logger.error(
+                f"Unexpected error transferring message UID {uid}: {str(e)}",
+                exc_info=True
+            )
+            self._cleanup_message()
+            return False
+    
+    def _restore_connection(self, client: IMAPClient) -> None:
+        """
+        Make sure a connection still works before it is used again
+        Broken connections are reconnected by the pool, which also selects
+        the folder again. On the source, a changed UIDVALIDITY is an error:
+        the UIDs being transferred no longer identify the same messages.
+        
+        Args:
+            client: This engine's source or destination client
+        
+        Raises:
+            IMAPConnectionError: If reconnecting fails
+            IMAPFolderError: If the folder cannot be selected again or its
+                UIDVALIDITY changed
+        """
+        if client is not self.source_client:
+            if self.dest_pool.ensure_healthy(client):
+                with self._state_lock:
+                    self._reconnects += 1
+            return
+        
+        with self._source_lock:
+            uidvalidity = client.uidvalidity
+            if not self.source_pool.ensure_healthy(client):
+                return
+            with self._state_lock:
+                self._reconnects += 1
+            if client.uidvalidity != uidvalidity:
+                raise IMAPFolderError(
+                    f"UIDVALIDITY of '{client.selected_folder}' changed after reconnect"
+                )
+    
+    def _recover_source_connection(self) -> None:
+        """
+        Repair the source connection after a failed batched fetch
+        Runs before the single-message fallback so that its first attempt
+        does not fail on a dead socket; errors are left to its retries
+        unless they are fatal, which stops the transfer.
+        """
+        try:
+            self._restore_connection(self.source_client)
+        except Exception as e:
+            if classify_error(e) == ERROR_FATAL:
+                self.logger.error(f"Could not restore source connection: {str(e)}")
+                self._fatal_errors.append(str(e))
+            else:
+                self.logger.warning(f"Could not restore source connection: {str(e)}")
+    
+    def _execute_with_retry(self, client: IMAPClient, operation):
+        """
+        Run an operation with the retry handler, repairing the connection between attempts
+        Without this, retries after a dropped connection would all fail on the
+        same dead socket. Attempts wait while the server's circuit breaker is
+        open. A fatal error (e.g. failed login on reconnect) is recorded;
+        messages are not attempted after it and transfer_folder() stops.
+        
+        Args:
+            client: Client the operation uses
+            operation: Callable without arguments
+        
+        Returns:
+            Result of the operation
+        
+        Raises:
+            Last exception if all retries fail
+        """
+        pool = self.source_pool if client is self.source_client else self.dest_pool
+        attempts = 0
+        
+        def attempt():
+            nonlocal attempts
+            if attempts:
+                self._restore_connection(client)
+            attempts += 1
+            return operation()
+        
+        try:
+            return self.retry_handler.execute(attempt, circuit_breaker=pool.circuit_breaker)
+        except Exception as e:
+            if classify_error(e) == ERROR_FATAL:
+                self._fatal_errors.append(str(e))
+            raise
+    
+    def _fetch_single_message(self, uid: str,
+                              allow_binary: bool = True) -> Optional[Tuple[bytes, str, List[str]]]:
+        """
+        Fetch a single message from source with retry logic
+        In binary mode BINARY.PEEK[] is tried once first; if the server
+        refuses it (e.g. NO [UNKNOWN-CTE]) the message is fetched as RFC822.
+        
+        Args:
+            uid: Message UID to fetch
+            allow_binary: Try BINARY.PEEK[] when binary mode is active
+        
+        Returns:
+            Tuple of (message_data, date, flags), or None if fetch failed
+        """
+        if self._fatal_errors:
+            return None
+        
+        if self._use_chunked_fetch(uid):
+            return self._fetch_chunked_message(uid)
+        
+        if allow_binary and self._use_binary():
             try:
-                self.logger.debug(f"Fetching message UID {uid} from source server")
-                message_data, date, flags = self.retry_handler.execute(fetch_operation)
+                message = self.source_client.fetch_message(uid, binary=True,
+                                                           spool_threshold=self.spool_threshold)
+                with self._state_lock:
+                    self._binary_uids.add(uid)
+                return message
             except IMAPFetchError as e:
-                self.logger.error(
-                    f"Failed to fetch message UID {uid} after {self.retry_handler.max_retries} retries: {str(e)}"
+                self.logger.info(
+                    f"BINARY fetch of message UID {uid} refused, falling back to RFC822: {str(e)}"
                 )
-                return False
-            except Exception as e:
-                self.logger.error(
-                    f"Unexpected error fetching message UID {uid}: {str(e)}",
-                    exc_info=True
-                )
-                return False
-            
+        
+        def fetch_operation():
+            return self.source_client.fetch_message(uid, spool_threshold=self.spool_threshold)
+        
+        try:
+            self.logger.debug(f"Fetching message UID {uid} from source server")
+            return self._execute_with_retry(self.source_client, fetch_operation)
+        except IMAPFetchError as e:
+            self.logger.error(
+                f"Failed to fetch message UID {uid} after {self.retry_handler.max_retries} retries: {str(e)}"
+            )
+            return None
+        except Exception as e:
+            self.logger.error(
+                f"Unexpected error fetching message UID {uid}: {str(e)}",
+                exc_info=True
+            )
+            return None
+    
+    def _store_message(self, uid: str, message_data: bytes, date: str, flags: List[str],
+                       folder: str, dest_folder: str) -> Optional[bool]:
+        """
+        Append an already fetched message to destination and record it in cache
+        Implements retry logic and memory cleanup
+        
+        Args:
+            uid: Source message UID
+            message_data: RFC822 message data
+            date: Original internal date string
+            flags: List of message flags
+            folder: Source folder name (for cache)
+            dest_folder: Destination folder name (for append)
+        
+        Returns:
+            True if transfer successful, None if the message exceeds the
+            size limit, False otherwise
+        """
+        if self._fatal_errors:
+            return False
+        
+        try:
             # Store reference for cleanup
             self._message_data = message_data
             
@@ -159,7 +689,56 @@ class TransferEngine:
                     f"exceeds limit {format_size(self.max_message_size)}"
                 )
                 self._cleanup_message()
-                return False
+                return None
+            
+            # Messages fetched with BINARY are sent as literal8; a refused one is
+            # fetched again as RFC822, a lost one is looked for on the destination
+            dest_uid = None
+            with self._state_lock:
+                binary = uid in self._binary_uids
+            if binary:
+                def binary_append_operation():
+                    return self.dest_client.append_message(dest_folder, message_data, date,
+                                                           flags, binary=True)
+                
+                try:
+                    self.logger.debug(f"Appending message UID {uid} to destination server as literal8")
+                    dest_uid = binary_append_operation()
+                except IMAPAppendRejected as e:
+                    self.logger.info(
+                        f"Binary append of message UID {uid} refused, falling back to RFC822: {str(e)}"
+                    )
+                    # The decoded form may not be valid as a normal literal, fetch the original
+                    with self._state_lock:
+                        self._binary_uids.discard(uid)
+                    with self._source_lock:
+                        message = self._fetch_single_message(uid, allow_binary=False)
+                    if message is None:
+                        self._cleanup_message()
+                        return False
+                    message_data, date, flags = message
+                    self._message_data = message_data
+                    message_size = len(message_data)
+                except IMAPAppendError as e:
+                    self.logger.warning(
+                        f"Binary append of message UID {uid} was interrupted, "
+                        f"checking destination before appending again: {str(e)}"
+                    )
+                    found = self._find_appended([(uid, message_data, date, flags)],
+                                                folder, dest_folder)
+                    if found is None:
+                        # Appending again could duplicate it
+                        self._cleanup_message()
+                        return False
+                    dest_uid = found.get(uid)
+                    if dest_uid is None:
+                        try:
+                            dest_uid = self._execute_with_retry(self.dest_client,
+                                                                binary_append_operation)
+                        except Exception as e:
+                            self.logger.error(f"Failed to append message UID {uid} as literal8: {str(e)}")
+                            self._cleanup_message()
+                            return False
             
             # Append message to destination with retry logic
             # Note: dest_folder is passed from transfer_folder method
@@ -167,8 +746,9 @@ class TransferEngine:
                 return self.dest_client.append_message(dest_folder, message_data, date, flags)
             
             try:
-                self.logger.debug(f"Appending message UID {uid} to destination server")
-                dest_uid = self.retry_handler.execute(append_operation)
+                if dest_uid is None:
+                    self.logger.debug(f"Appending message UID {uid} to destination server")
+                    dest_uid = self._execute_with_retry(self.dest_client, append_operation)
             except IMAPAppendError as e:
                 self.logger.error(
                     f"Failed to append message UID {uid} after {self.retry_handler.max_retries} retries: {str(e)}"
@@ -193,6 +773,8 @@ class TransferEngine:
                 )
                 # Continue anyway - message was transferred successfully
             
+            self._record_binary_savings(uid, message_size)
+            
             # Log success
             self.logger.debug(
                 f"Successfully transferred message UID {uid} -> {dest_uid} "
@@ -213,6 +795,887 @@ class TransferEngine:
             self._cleanup_message()
             return False
     
+    def _store_messages(self, messages: List[tuple], folder: str, dest_folder: str,
+                        progress_bar: tqdm) -> Dict[str, Optional[bool]]:
+        """
+        Append fetched messages to destination in bulk
+        Uses one MULTIAPPEND command when available, otherwise pipelined
+        APPEND commands with non-synchronizing literals. If the server rejects
+        MULTIAPPEND, nothing was stored (it is atomic) and every message is
+        retried through the single-message path; pipelined NO or BAD replies
+        are retried the same way. If the connection is lost instead, the
+        unanswered messages may have been stored, so the destination is
+        checked for them first.
+        
+        Args:
+            messages: List of (uid, message_data, date, flags) tuples
+            folder: Source folder name (for cache)
+            dest_folder: Destination folder name (for append)
+            progress_bar: Progress bar updated once per message
+        
+        Returns:
+            Dictionary mapping UID to transfer success (None if skipped by size)
+        """
+        try:
+            outcomes = {}
+            accepted = []
+            
+            for uid, message_data, date, flags in messages:
+                if len(message_data) > self.max_message_size:
+                    self._update_progress(progress_bar, len(outcomes) + 1, len(messages),
+                                          uid, "skipped")
+                    self.logger.warning(
+                        f"Skipping message UID {uid}: size {format_size(len(message_data))} "
+                        f"exceeds limit {format_size(self.max_message_size)}"
+                    )
+                    outcomes[uid] = None
+                else:
+                    accepted.append((uid, message_data, date, flags))
+            
+            # Destination UID per source UID for messages stored in bulk
+            stored = {}
+            
+            # A bulk upload is sent as literal8 if any message was fetched with
+            # BINARY; RFC822 data is valid literal8 content as well
+            with self._state_lock:
+                binary = any(uid in self._binary_uids for uid, _, _, _ in accepted)
+            
+            if len(accepted) > 1:
+                self.dest_pool.circuit_breaker.wait()
+            
+            if len(accepted) > 1 and self.dest_client.has_capability('MULTIAPPEND'):
+                try:
+                    self.logger.debug(
+                        f"Appending {len(accepted)} messages to destination server with MULTIAPPEND"
+                    )
+                    dest_uids = self.dest_client.append_messages(
+                        dest_folder,
+                        [(message_data, date, flags) for _, message_data, date, flags in accepted],
+                        binary=binary
+                    )
+                    stored = {uid: dest_uid for (uid, _, _, _), dest_uid in zip(accepted, dest_uids)}
+                except IMAPAppendRejected as e:
+                    self.logger.warning(
+                        f"MULTIAPPEND of {len(accepted)} messages failed, "
+                        f"falling back to single APPEND: {str(e)}"
+                    )
+                except IMAPAppendError as e:
+                    self.logger.warning(
+                        f"MULTIAPPEND of {len(accepted)} messages was interrupted, "
+                        f"checking destination before appending again: {str(e)}"
+                    )
+                    stored = self._find_appended(accepted, folder, dest_folder)
+                    if stored is None:
+                        # Appending again could duplicate the whole batch
+                        stored = {}
+                        for uid, _, _, _ in accepted:
+                            outcomes[uid] = False
+            elif len(accepted) > 1 and self._use_pipelined_append():
+                self.logger.debug(
+                    f"Appending {len(accepted)} messages to destination server "
+                    f"with {self.append_pipeline_depth} pipelined APPEND commands"
+                )
+                results = self.dest_client.append_messages_pipelined(
+                    dest_folder, accepted, depth=self.append_pipeline_depth, binary=binary
+                )
+                unanswered = []
+                for uid, (success, detail) in results.items():
+                    if success:
+                        stored[uid] = detail
+                    elif success is None:
+                        unanswered.append(uid)
+                    else:
+                        self.logger.warning(f"Pipelined append of message UID {uid} failed: {detail}")
+                
+                if unanswered:
+                    self.logger.warning(
+                        f"Connection lost with {len(unanswered)} pipelined APPEND commands unanswered, "
+                        f"checking destination before appending again: {results[unanswered[0]][1]}"
+                    )
+                    found = self._find_appended(
+                        [message for message in accepted if message[0] in unanswered],
+                        folder, dest_folder, exclude=stored.values()
+                    )
+                    if found is None:
+                        # Appending again could duplicate them
+                        for uid in unanswered:
+                            outcomes[uid] = False
+                    else:
+                        stored.update(found)
+            
+            for uid, message_data, date, flags in accepted:
+                if uid in outcomes:
+                    # Left pending after an interrupted append could not be checked
+                    self._update_progress(progress_bar, len(outcomes), len(messages),
+                                          uid, "failed")
+                    continue
+                
+                self._update_progress(progress_bar, len(outcomes) + 1, len(messages),
+                                      uid, "transferring")
+                
+                if uid not in stored:
+                    outcomes[uid] = self._store_message(uid, message_data, date, flags,
+                                                        folder, dest_folder)
+                    continue
+                
+                # Mark as transferred in cache
+                try:
+                    self.cache_manager.mark_transferred(uid, stored[uid], folder, len(message_data))
+                except Exception as e:
+                    self.logger.error(
+                        f"Failed to mark message UID {uid} as transferred in cache: {str(e)}",
+                        exc_info=True
+                    )
+                
+                self._record_binary_savings(uid, len(message_data))
+                self.logger.debug(
+                    f"Successfully transferred message UID {uid} -> {stored[uid]} "
+                    f"({format_size(len(message_data))})"
+                )
+                outcomes[uid] = True
+            
+            return outcomes
+        finally:
+            # Remove temporary files of spooled messages, whichever path stored them
+            for _, message_data, _, _ in messages:
+                if isinstance(message_data, SpooledMessage):
+                    message_data.close()
+            self._cleanup_message()
+    
+    def _find_appended(self, accepted: List[tuple], folder: str, dest_folder: str,
+                       exclude: Iterable[str] = ()) -> Optional[Dict[str, str]]:
+        """
+        Find messages of an interrupted append on the destination
+        The server may have stored them before the connection dropped.
+        Destination messages after the highest recorded destination UID are
+        compared with them by Message-ID, like in _verify_unflushed().
+        
+        Args:
+            accepted: List of (uid, message_data, date, flags) tuples sent
+            folder: Source folder name (for cache)
+            dest_folder: Destination folder name
+            exclude: Destination UIDs already known to hold other messages
+        
+        Returns:
+            Destination UID by source UID for messages found, None if the
+            destination could not be checked
+        """
+        try:
+            self._restore_connection(self.dest_client)
+            if self.dest_client.selected_folder != dest_folder:
+                self.dest_client.select_folder(dest_folder)
+            since_uid = self.cache_manager.get_highest_dest_uid(folder) + 1
+            dest_ids = self.dest_client.fetch_message_ids(start_uid=since_uid)
+        except Exception as e:
+            if classify_error(e) == ERROR_FATAL:
+                self.logger.error(f"Could not restore destination connection: {str(e)}")
+                self._fatal_errors.append(str(e))
+            else:
+                self.logger.warning(
+                    f"Could not check destination after interrupted append, "
+                    f"leaving {len(accepted)} messages for the next run: {str(e)}"
+                )
+            return None
+        
+        # Destination UIDs by Message-ID, each usable for one source message
+        claimed = set(exclude)
+        available: Dict[str, List[str]] = {}
+        for dest_uid, message_id in sorted(dest_ids.items(), key=lambda item: int(item[0])):
+            if dest_uid not in claimed:
+                available.setdefault(message_id, []).append(dest_uid)
+        
+        found = {}
+        for uid, message_data, _, _ in accepted:
+            if isinstance(message_data, SpooledMessage):
+                header = bytes(next(message_data.chunks(65536), b''))
+            else:
+                header = bytes(message_data[:65536])
+            matches = available.get(parse_message_id(header) or '')
+            if matches:
+                found[uid] = matches.pop(0)
+        
+        self.logger.info(
+            f"Found {len(found)} of {len(accepted)} messages of the interrupted append "
+            f"on destination"
+        )
+        return found
+    
+    def _use_pipelined_append(self) -> bool:
+        """
+        Check whether fetched batches should be uploaded with pipelined APPEND
+        
+        Returns:
+            True if pipelining is enabled and destination supports it
+        """
+        return self.append_pipeline_depth > 1 and self.dest_client.supports_pipelined_append()
+    
+    def _use_binary(self) -> bool:
+        """
+        Check whether messages should be transferred with BINARY
+        
+        Returns:
+            True if binary mode is enabled and both servers support BINARY
+        """
+        return (self.binary and self.source_client.supports_binary() and
+                self.dest_client.supports_binary())
+    
+    def _fetch_messages(self, batch: List[str]) -> Iterator[Tuple[str, bytes, str, List[str]]]:
+        """
+        Fetch a batch with one UID FETCH, using BINARY.PEEK[] in binary mode
+        Messages that are fetched in chunks are left out; callers fetch
+        them through the single-message path like other missing UIDs.
+        
+        Args:
+            batch: UIDs to fetch
+        
+        Yields:
+            Tuple of (uid, message_data, date, flags) as parsed from the response
+        """
+        batch = [uid for uid in batch if not self._use_chunked_fetch(uid)]
+        binary = self._use_binary()
+        self.source_pool.circuit_breaker.wait()
+        for message in self.source_client.fetch_messages(batch, binary=binary,
+                                                         spool_threshold=self.spool_threshold):
+            if binary:
+                with self._state_lock:
+                    self._binary_uids.add(message[0])
+            yield message
+    
+    def _use_chunked_fetch(self, uid: str) -> bool:
+        """
+        Check whether a message is large enough to be fetched in chunks
+        Only messages whose size is known from RFC822.SIZE qualify
+        
+        Args:
+            uid: Message UID
+        
+        Returns:
+            True if the message should be fetched with _fetch_chunked_message
+        """
+        return (self.fetch_chunk_size > 0 and
+                self._message_sizes.get(uid, 0) > self.fetch_chunk_size)
+    
+    def _fetch_chunked_message(self, uid: str) -> Optional[Tuple[bytes, str, List[str]]]:
+        """
+        Fetch a large message in BODY.PEEK[]<offset.length> ranges
+        Received chunks are kept (on disk when the message is above
+        spool_threshold). When a chunk fails, the retry repairs the source
+        connection and continues at the first missing byte, so a network
+        error near the end of a huge message does not restart the download.
+        Binary mode does not apply, chunks are fetched in RFC822 form.
+        
+        Args:
+            uid: Message UID to fetch
+        
+        Returns:
+            Tuple of (message_data, date, flags), or None if fetch failed
+        """
+        size = self._message_sizes[uid]
+        spool = self.spool_threshold > 0 and size > self.spool_threshold
+        received = tempfile.TemporaryFile() if spool else bytearray()
+        state = {'offset': 0, 'date': '', 'flags': []}
+        
+        def fetch_operation():
+            if state['offset']:
+                self.logger.info(
+                    f"Resuming fetch of message UID {uid} at byte {state['offset']}"
+                )
+            
+            while True:
+                with self._source_lock:
+                    data, date, flags = self.source_client.fetch_message_range(
+                        uid, state['offset'], self.fetch_chunk_size
+                    )
+                if state['offset'] == 0:
+                    state['date'], state['flags'] = date, flags
+                
+                # Position explicitly, a failed write must not shift later chunks
+                if spool:
+                    received.seek(state['offset'])
+                    received.write(data)
+                else:
+                    del received[state['offset']:]
+                    received.extend(data)
+                state['offset'] += len(data)
+                
+                # A short chunk means the end of the message was reached
+                if len(data) < self.fetch_chunk_size:
+                    break
+        
+        try:
+            self.logger.debug(
+                f"Fetching message UID {uid} ({format_size(size)}) in chunks of "
+                f"{format_size(self.fetch_chunk_size)}"
+            )
+            self._execute_with_retry(self.source_client, fetch_operation)
+        except Exception as e:
+            self.logger.error(
+                f"Failed to fetch message UID {uid} after {self.retry_handler.max_retries} retries "
+                f"({state['offset']} of {size} bytes received): {str(e)}"
+            )
+            if spool:
+                received.close()
+            return None
+        
+        if not state['offset']:
+            if spool:
+                received.close()
+            self.logger.error(f"Empty response when fetching message UID {uid}")
+            return None
+        
+        message_data = SpooledMessage(received, state['offset']) if spool else received
+        return (message_data, state['date'], state['flags'])
+    
+    def _record_binary_savings(self, uid: str, message_size: int) -> None:
+        """
+        Count the bytes saved by transferring a stored message in binary form
+        
+        Args:
+            uid: Source message UID
+            message_size: Size of the stored message data in bytes
+        """
+        with self._state_lock:
+            if uid not in self._binary_uids:
+                return
+            
+            self._binary_uids.discard(uid)
+            rfc822_size = self._message_sizes.get(uid)
+            if rfc822_size:
+                self._binary_saved += max(rfc822_size - message_size, 0)
+    
+    def _exclude_oversized(self, uids: List[str], sizes: Dict[str, int]) -> List[str]:
+        """
+        Drop messages larger than max_message_size before any body is fetched
+        Messages with unknown size are kept and checked after download
+        
+        Args:
+            uids: UIDs to transfer
+            sizes: Message sizes by UID from RFC822.SIZE
+        
+        Returns:
+            UIDs within the size limit, in the original order
+        """
+        accepted = []
+        
+        for uid in uids:
+            size = sizes.get(uid, 0)
+            if size > self.max_message_size:
+                self.logger.warning(
+                    f"Skipping message UID {uid}: size {format_size(size)} "
+                    f"exceeds limit {format_size(self.max_message_size)}"
+                )
+                continue
+            accepted.append(uid)
+        
+        if len(accepted) < len(uids):
+            self.logger.info(
+                f"Skipping {len(uids) - len(accepted)} messages larger than "
+                f"{format_size(self.max_message_size)} without downloading them"
+            )
+        
+        return accepted
+    
+    def _plan_batches(self, uids: List[str], sizes: Dict[str, int]) -> Iterator[List[str]]:
+        """
+        Group UIDs into fetch batches bounded by message count and total bytes
+        A message larger than the byte limit is placed in a batch of its own.
+        Batches are formed lazily, so a batch size lowered by the adaptive
+        controller applies to the next batch.
+        
+        Args:
+            uids: UIDs to transfer, in transfer order
+            sizes: Known message sizes by UID (missing sizes count as 0)
+        
+        Yields:
+            Lists of UIDs, one list per batched FETCH
+        """
+        batch = []
+        batch_bytes = 0
+        
+        for uid in uids:
+            size = sizes.get(uid, 0)
+            batch_size = self.controller.batch_size if self.controller else self.fetch_batch_size
+            
+            if batch and (len(batch) >= batch_size or
+                          batch_bytes + size > self.fetch_batch_bytes):
+                yield batch
+                batch = []
+                batch_bytes = 0
+            
+            batch.append(uid)
+            batch_bytes += size
+        
+        if batch:
+            yield batch
+    
+    def _transfer_batch(self, batch: List[str], folder: str, dest_folder: str,
+                        progress_bar: tqdm) -> Dict[str, Optional[bool]]:
+        """
+        Transfer a batch of messages using one UID FETCH round trip
+        Messages are appended as they are parsed from the response. If the
+        batched fetch fails, or the server omits some UIDs, the remaining
+        messages fall back to the single-message path with its retry logic.
+        
+        Args:
+            batch: UIDs to transfer
+            folder: Source folder name (for cache)
+            dest_folder: Destination folder name (for append)
+            progress_bar: Progress bar updated once per message
+        
+        Returns:
+            Dictionary mapping UID to transfer success (None if skipped by size)
+        """
+        outcomes = {}
+        
+        # With MULTIAPPEND or pipelined APPEND the whole batch is uploaded
+        # together, otherwise each message is appended as soon as it is parsed
+        bulk_append = (self.dest_client.has_capability('MULTIAPPEND') or
+                       self._use_pipelined_append())
+        fetched = []
+        seen = set()
+        
+        try:
+            self.logger.debug(f"Fetching batch of {len(batch)} messages from source server")
+            for uid, message_data, date, flags in self._fetch_messages(batch):
+                if uid in seen:
+                    continue
+                seen.add(uid)
+                if bulk_append:
+                    fetched.append((uid, message_data, date, flags))
+                    continue
+                self._update_progress(progress_bar, len(outcomes) + 1, len(batch),
+                                      uid, "transferring")
+                outcomes[uid] = self._store_message(uid, message_data, date, flags,
+                                                    folder, dest_folder)
+                del message_data
+        except IMAPFetchError as e:
+            self.logger.warning(
+                f"Batched fetch failed, falling back to single message fetch: {str(e)}"
+            )
+            self._recover_source_connection()
+        except Exception as e:
+            self.logger.warning(
+                f"Unexpected error in batched fetch, falling back to single message fetch: {str(e)}",
+                exc_info=True
+            )
+            self._recover_source_connection()
+        
+        if fetched:
+            outcomes.update(self._store_messages(fetched, folder, dest_folder, progress_bar))
+            del fetched
+        
+        # Messages not delivered by the batched fetch
+        for uid in batch:
+            if uid in outcomes:
+                continue
+            self._update_progress(progress_bar, len(outcomes) + 1, len(batch),
+                                  uid, "transferring")
+            outcomes[uid] = self._transfer_single_message(uid, folder, dest_folder, progress_bar)
+        
+        return outcomes
+    
+    def _fetch_batch(self, batch: List[str]) -> Tuple[List[tuple], Dict[str, bool]]:
+        """
+        Fetch a batch of messages without appending them
+        UIDs missing from the batched response are fetched one by one
+        
+        Args:
+            batch: UIDs to fetch
+        
+        Returns:
+            Tuple of (fetched, failures)
+            - fetched: List of (uid, message_data, date, flags) tuples
+            - failures: Dictionary of UIDs that could not be fetched (all False)
+        """
+        fetched = []
+        seen = set()
+        
+        try:
+            self.logger.debug(f"Fetching batch of {len(batch)} messages from source server")
+            for uid, message_data, date, flags in self._fetch_messages(batch):
+                if uid in seen:
+                    continue
+                seen.add(uid)
+                fetched.append((uid, message_data, date, flags))
+        except Exception as e:
+            self.logger.warning(
+                f"Batched fetch failed, falling back to single message fetch: {str(e)}"
+            )
+            self._recover_source_connection()
+        
+        failures = {}
+        for uid in batch:
+            if uid in seen:
+                continue
+            message = self._fetch_single_message(uid)
+            if message is None:
+                failures[uid] = False
+            else:
+                fetched.append((uid,) + tuple(message))
+        
+        return fetched, failures
+    
+    def _produce_batches(self, batches: Iterable[List[str]], queue: ByteBoundedQueue,
+                         stop_event: threading.Event) -> None:
+        """
+        Fetch stage of the pipeline, runs in a background thread
+        Only this thread uses the source connection while the pipeline runs,
+        apart from RFC822 re-fetches after a refused binary append
+        
+        Args:
+            batches: Batches of UIDs to fetch
+            queue: Queue receiving (batch, fetched, failures) items
+            stop_event: Set by the append stage to stop fetching early
+        """
+        try:
+            for batch in batches:
+                if stop_event.is_set() or self._fatal_errors:
+                    break
+                
+                try:
+                    with self._source_lock:
+                        fetched, failures = self._fetch_batch(batch)
+                except Exception as e:
+                    self.logger.error(
+                        f"Unexpected error fetching UIDs {batch[0]}-{batch[-1]}: {str(e)}",
+                        exc_info=True
+                    )
+                    fetched, failures = [], {uid: False for uid in batch}
+                
+                size = sum(len(message[1]) for message in fetched)
+                if not queue.put((batch, fetched, failures), size):
+                    break
+        finally:
+            queue.close()
+    
+    def _prefetch_batches(self, batches: Iterable[List[str]]) -> Iterator[tuple]:
+        """
+        Run the fetch stage in a background thread and yield its results
+        The queue between the stages is bounded in bytes, so at most
+        pipeline_queue_bytes of fetched messages wait for the append stage
+        
+        Args:
+            batches: Batches of UIDs to fetch
+        
+        Yields:
+            Tuple of (batch, fetched, failures) as returned by _fetch_batch
+        """
+        queue = ByteBoundedQueue(self.pipeline_queue_bytes)
+        stop_event = threading.Event()
+        producer = threading.Thread(
+            target=self._produce_batches,
+            args=(batches, queue, stop_event),
+            name="imap-fetch-stage",
+            daemon=True
+        )
+        producer.start()
+        
+        try:
+            while True:
+                item = queue.get()
+                if item is None:
+                    break
+                yield item
+        finally:
+            stop_event.set()
+            queue.close()
+            # The fetch stage ends after its current batch; nothing else may
+            # use the source connection before it has
+            producer.join()
+    
+    def _process_batch(self, batch: List[str], fetched: Optional[List[tuple]],
+                       failures: Optional[Dict[str, bool]], folder: str, dest_folder: str,
+                       progress_bar: tqdm) -> Dict[str, Optional[bool]]:
+        """
+        Transfer one batch, either fetching it now or storing prefetched messages
+        Unexpected errors fail the batch instead of stopping the transfer
+        
+        Args:
+            batch: UIDs in the batch
+            fetched: Prefetched messages from _fetch_batch, or None to fetch now
+            failures: UIDs the fetch stage could not fetch (with fetched)
+            folder: Source folder name (for cache)
+            dest_folder: Destination folder name (for append)
+            progress_bar: Progress bar updated once per message
+        
+        Returns:
+            Dictionary mapping UID to transfer success (None if skipped by size)
+        """
+        if self._fatal_errors:
+            return {uid: False for uid in batch}
+        
+        try:
+            if fetched is None:
+                return self._transfer_batch(batch, folder, dest_folder, progress_bar)
+            
+            outcomes = dict(failures)
+            for uid in failures:
+                self._update_progress(progress_bar, len(outcomes), len(batch),
+                                      uid, "fetch failed")
+            outcomes.update(self._store_messages(fetched, folder, dest_folder, progress_bar))
+            return outcomes
+        except KeyboardInterrupt:
+            raise
+        except Exception as e:
+            self.logger.error(
+                f"UIDs {batch[0]}-{batch[-1]}: Unexpected error - {str(e)}",
+                exc_info=True
+            )
+            return {uid: False for uid in batch}
+    
+    def _run_batches(self, batches: Iterable[List[str]], folder: str, dest_folder: str,
+                     progress_bar: tqdm) -> Iterator[Tuple[List[str], Dict[str, Optional[bool]]]]:
+        """
+        Transfer batches over this engine's own connection pair
+        In pipeline mode batches arrive already fetched while the next
+        ones are downloaded in background
+        
+        Args:
+            batches: Batches of UIDs to transfer
+            folder: Source folder name (for cache)
+            dest_folder: Destination folder name (for append)
+            progress_bar: Progress bar updated once per message
+        
+        Yields:
+            Tuple of (batch, outcomes) for every batch
+        """
+        if self.pipeline:
+            for batch, fetched, failures in self._prefetch_batches(batches):
+                started = time.monotonic()
+                outcomes = self._process_batch(batch, fetched, failures, folder,
+                                               dest_folder, progress_bar)
+                del fetched
+                self._record_batch(outcomes, started)
+                yield batch, outcomes
+        else:
+            for batch in batches:
+                started = time.monotonic()
+                outcomes = self._process_batch(batch, None, None, folder,
+                                               dest_folder, progress_bar)
+                self._record_batch(outcomes, started)
+                yield batch, outcomes
+    
+    def _record_batch(self, outcomes: Dict[str, Optional[bool]], started: float) -> None:
+        """
+        Report a finished batch to the adaptive controller, if there is one
+        Batches abandoned after a fatal error are not measured.
+        
+        Args:
+            outcomes: Dictionary mapping UID to transfer success
+            started: time.monotonic() when the batch started
+        """
+        if self.controller and not self._fatal_errors:
+            failed = sum(1 for success in outcomes.values() if success is False)
+            self.controller.record_batch(len(outcomes), failed, time.monotonic() - started)
+    
+    def _open_worker_engines(self, count: int, folder: str) -> List['TransferEngine']:
+        """
+        Take additional connection pairs from the pools and wrap each in a worker engine
+        Pooled connections are checked before they are handed out. Workers
+        that cannot connect are left out, the transfer continues with the
+        connections that could be opened
+        
+        Args:
+            count: Number of additional workers to open
+            folder: Source folder to select on each new source connection
+        
+        Returns:
+            List of worker engines sharing this engine's cache and settings
+        """
+        engines = []
+        
+        for index in range(count):
+            try:
+                source_client = self.source_pool.acquire(folder)
+            except Exception as e:
+                self.logger.warning(f"Worker {index + 2}: could not open connections: {str(e)}")
+                continue
+            try:
+                dest_client = self.dest_pool.acquire()
+            except Exception as e:
+                self.logger.warning(f"Worker {index + 2}: could not open connections: {str(e)}")
+                self.source_pool.release(source_client)
+                continue
+            
+            engines.append(TransferEngine(
+                source_client, dest_client, self.cache_manager, self.logger,
+                max_message_size=self.max_message_size,
+                retry_count=self.retry_handler.max_retries,
+                retry_delay=self.retry_handler.delay,
+                fetch_batch_size=self.fetch_batch_size,
+                fetch_batch_bytes=self.fetch_batch_bytes,
+                append_pipeline_depth=self.append_pipeline_depth,
+                pipeline=self.pipeline,
+                pipeline_queue_bytes=self.pipeline_queue_bytes,
+                binary=self.binary,
+                spool_threshold=self.spool_threshold,
+                fetch_chunk_size=self.fetch_chunk_size,
+                source_pool=self.source_pool,
+                dest_pool=self.dest_pool,
+                controller=self.controller
+            ))
+            engines[-1]._progress_sizes = self._progress_sizes
+            engines[-1]._message_sizes = self._message_sizes
+            engines[-1]._fatal_errors = self._fatal_errors
+        
+        return engines
+    
+    def _run_worker(self, engine: 'TransferEngine', next_batch, results: queue.Queue,
+                    folder: str, dest_folder: str, progress_bar: tqdm,
+                    stop_event: threading.Event) -> None:
+        """
+        Worker thread: take batches from the shared queue until it is empty
+        
+        Args:
+            engine: Engine owning the worker's connection pair
+            next_batch: Callable returning the next batch, or None when the
+                worker should stop
+            results: Queue receiving (batch, outcomes); (None, engine) marks
+                the worker done
+            folder: Source folder name (for cache)
+            dest_folder: Destination folder name (for append)
+            progress_bar: Shared progress bar
+            stop_event: Set by the main thread to stop taking new batches
+        """
+        def batches():
+            while not stop_event.is_set():
+                batch = next_batch()
+                if batch is None:
+                    return
+                yield batch
+        
+        try:
+            for item in engine._run_batches(batches(), folder, dest_folder, progress_bar):
+                results.put(item)
+        except Exception as e:
+            self.logger.error(f"Worker stopped unexpectedly: {str(e)}", exc_info=True)
+        finally:
+            results.put((None, engine))
+    
+    def _worker_target(self) -> int:
+        """
+        Number of workers that should currently take batches
+        
+        Returns:
+            The adaptive controller's choice capped at workers, or workers
+        """
+        if self.controller:
+            return min(self.controller.workers, self.workers)
+        return self.workers
+    
+    def _run_parallel(self, batches: Iterable[List[str]], folder: str, dest_folder: str,
+                      progress_bar: tqdm) -> Iterator[Tuple[List[str], Dict[str, Optional[bool]]]]:
+        """
+        Transfer batches over several connection pairs in parallel
+        Workers pull batches from one shared queue, so a worker stuck on
+        large messages does not hold back the others. Results are yielded
+        in the calling thread, which keeps statistics in one place. With an
+        adaptive controller, workers above its current choice stop after
+        their batch and new ones are started (reusing stopped workers'
+        connections first) when it allows more.
+        
+        Args:
+            batches: Batches of UIDs to transfer
+            folder: Source folder name (for cache)
+            dest_folder: Destination folder name (for append)
+            progress_bar: Shared progress bar
+        
+        Yields:
+            Tuple of (batch, outcomes) for every batch
+        """
+        if self.controller:
+            count = self._worker_target()
+        else:
+            batches = list(batches)
+            count = min(self.workers, len(batches))
+        extra_engines = self._open_worker_engines(count - 1, folder)
+        idle_engines = []  # Engines whose worker stopped before the batches ran out
+        
+        batch_iter = iter(batches)
+        batch_lock = threading.Lock()
+        active = 0  # Workers currently taking batches
+        exhausted = False
+        
+        def next_batch():
+            nonlocal active, exhausted
+            with batch_lock:
+                batch = None
+                if active <= self._worker_target():
+                    batch = next(batch_iter, None)
+                    exhausted = exhausted or batch is None
+                if batch is None:
+                    active -= 1
+                return batch
+        
+        results = queue.Queue()
+        stop_event = threading.Event()
+        threads = []
+        
+        def start_worker(engine: 'TransferEngine') -> None:
+            nonlocal active
+            thread = threading.Thread(
+                target=self._run_worker,
+                args=(engine, next_batch, results, folder, dest_folder,
+                      progress_bar, stop_event),
+                name=f"imap-worker-{len(threads) + 1}",
+                daemon=True
+            )
+            with batch_lock:
+                active += 1
+            thread.start()
+            threads.append(thread)
+        
+        try:
+            for engine in [self] + extra_engines:
+                start_worker(engine)
+            if self.controller:
+                self.logger.info(
+                    f"Transferring with {len(threads)} parallel workers "
+                    f"(adaptive, up to {self.workers})"
+                )
+            else:
+                self.logger.info(f"Transferring with {len(threads)} parallel workers")
+            
+            running = len(threads)
+            can_open = True
+            while running:
+                batch, outcomes = results.get()
+                if batch is None:
+                    running -= 1
+                    if not exhausted:
+                        idle_engines.append(outcomes)
+                    continue
+                yield batch, outcomes
+                
+                # Follow an increase chosen by the adaptive controller
+                while self.controller and not exhausted and active < self._worker_target():
+                    if idle_engines:
+                        engine = idle_engines.pop()
+                    elif can_open:
+                        opened = self._open_worker_engines(1, folder)
+                        if not opened:
+                            can_open = False
+                            break
+                        engine = opened[0]
+                        extra_engines.append(engine)
+                    else:
+                        break
+                    start_worker(engine)
+                    running += 1
+        finally:
+            stop_event.set()
+            # Workers stop after their current batch; their connections must
+            # not go back to the pools while a command is still running on them
+            for thread in threads:
+                thread.join()
+            for engine in extra_engines:
+                self._binary_saved += engine._binary_saved
+                self._reconnects += engine._reconnects
+                self.source_pool.release(engine.source_client)
+                self.dest_pool.release(engine.dest_client)
+            for pool in self._owned_pools:
+                pool.close()
+    
     def transfer_folder(self, folder: str, dest_folder_override: Optional[str] = None) -> TransferResult:
         """
         Transfer all untransferred messages from a folder
@@ -238,13 +1701,21 @@ class TransferEngine:
         skipped = 0
         failed = 0
         total_size = 0
+        skipped_by_size = 0
+        flags_updated = 0
+        expunged = 0
         errors = []
+        self._binary_saved = 0
+        self._binary_uids.clear()
+        self._reconnects = 0
+        self._fatal_errors.clear()
         
         try:
-            # Get source UIDs
-            self.logger.info("Retrieving message UIDs from source server...")
+            # Get source UIDs with sizes, dates and flags in one command
+            self.logger.info("Retrieving message manifest from source server...")
             try:
-                source_uids = self.source_client.get_uid_list()
+                start_uid = self._sync_start_uid(folder)
+                source_uids, sizes = self._load_manifest(folder, start_uid)
                 total_messages = len(source_uids)
             except IMAPFetchError as e:
                 error_msg = f"Failed to retrieve UIDs from source server: {str(e)}"
@@ -273,8 +1744,15 @@ class TransferEngine:
                     errors=errors
                 )
             
+            # Flags and expunges of messages transferred by earlier runs
+            flags_updated, expunged = self._sync_changes(folder, dest_folder, errors)
+            
             if total_messages == 0:
-                self.logger.info(f"No messages found in folder '{folder}'")
+                if start_uid > 1:
+                    self.logger.info(f"No new messages in folder '{folder}' since last run")
+                else:
+                    self.logger.info(f"No messages found in folder '{folder}'")
+                self._advance_watermark(folder, source_uids, set())
                 return TransferResult(
                     total_messages=0,
                     transferred=0,
@@ -282,14 +1760,16 @@ class TransferEngine:
                     failed=0,
                     total_size=0,
                     duration_seconds=time.time() - start_time,
-                    errors=[]
+                    errors=errors,
+                    flags_updated=flags_updated,
+                    expunged=expunged
                 )
             
             self.logger.info(f"Found {total_messages} messages in source folder")
             
             # Filter untransferred UIDs
             try:
-                untransferred_uids = self._get_untransferred_uids(source_uids, folder)
+                untransferred_uids = self._get_untransferred_uids(source_uids, folder, start_uid)
                 skipped = total_messages - len(untransferred_uids)
             except Exception as e:
                 error_msg = f"Error filtering transferred UIDs: {str(e)}"
@@ -299,8 +1779,14 @@ class TransferEngine:
                 untransferred_uids = source_uids
                 skipped = 0
             
+            if untransferred_uids and self.cache_manager.needs_verification(folder):
+                verified = self._verify_unflushed(untransferred_uids, folder, dest_folder, sizes)
+                skipped += len(untransferred_uids) - len(verified)
+                untransferred_uids = verified
+            
             if len(untransferred_uids) == 0:
                 self.logger.info("All messages already transferred")
+                self._advance_watermark(folder, source_uids, set())
                 return TransferResult(
                     total_messages=total_messages,
                     transferred=0,
@@ -308,66 +1794,164 @@ class TransferEngine:
                     failed=0,
                     total_size=0,
                     duration_seconds=time.time() - start_time,
-                    errors=[]
+                    errors=errors,
+                    flags_updated=flags_updated,
+                    expunged=expunged
                 )
             
-            # Create progress bar
-            self.logger.info(f"Transferring {len(untransferred_uids)} messages...")
-            progress_bar = tqdm(
-                total=len(untransferred_uids),
-                desc="Transferring",
-                unit="msg",
-                bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]"
-            )
+            # Sizes bound batches in bytes and keep oversized messages from
+            # being downloaded; sizes the manifest did not provide are fetched separately
+            missing = [uid for uid in untransferred_uids if sizes is None or uid not in sizes]
+            sizes = sizes or {}
+            if missing:
+                try:
+                    sizes.update(self.source_client.fetch_message_sizes(missing))
+                except IMAPFetchError as e:
+                    self.logger.warning(f"Could not retrieve message sizes, batching by count only: {str(e)}")
+            
+            self._message_sizes = sizes
+            if self._use_binary():
+                self.logger.info("Binary mode: fetching with BINARY.PEEK[] and appending literal8")
+            elif self.binary:
+                self.logger.info("Binary mode requested but not supported by both servers, using RFC822")
+            
+            accepted_uids = self._exclude_oversized(untransferred_uids, sizes)
+            pending_uids = set(untransferred_uids) - set(accepted_uids)
+            untransferred_uids = accepted_uids
+            skipped_by_size = len(pending_uids)
+            
+            if len(untransferred_uids) == 0:
+                self.logger.info("No messages left to transfer within the size limit")
+                self._advance_watermark(folder, source_uids, pending_uids)
+                return TransferResult(
+                    total_messages=total_messages,
+                    transferred=0,
+                    skipped=skipped,
+                    failed=0,
+                    total_size=0,
+                    duration_seconds=time.time() - start_time,
+                    errors=errors,
+                    skipped_by_size=skipped_by_size,
+                    flags_updated=flags_updated,
+                    expunged=expunged
+                )
             
-            # Transfer each message
-            for idx, uid in enumerate(untransferred_uids, 1):
+            # Create progress bar, in bytes when every size is known so the
+            # rate and ETA reflect message sizes rather than message count
+            if all(uid in sizes for uid in untransferred_uids):
+                total_bytes = sum(sizes[uid] for uid in untransferred_uids)
+                self.logger.info(
+                    f"Transferring {len(untransferred_uids)} messages ({format_size(total_bytes)})..."
+                )
+                self._progress_sizes = sizes
+                progress_bar = tqdm(
+                    total=total_bytes,
+                    desc="Transferring",
+                    unit="B",
+                    unit_scale=True,
+                    unit_divisor=1024,
+                    bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}{postfix}]"
+                )
+            else:
+                self.logger.info(f"Transferring {len(untransferred_uids)} messages...")
+                self._progress_sizes = None
+                progress_bar = tqdm(
+                    total=len(untransferred_uids),
+                    desc="Transferring",
+                    unit="msg",
+                    bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}{postfix}]"
+                )
+            
+            # Running counters of this pass feed the progress bar and summary
+            self.cache_manager.statistics.begin(folder)
+            
+            # Transfer messages in batches, over several connections if requested
+            batches = self._plan_batches(untransferred_uids, sizes)
+            if self.pipeline:
+                self.logger.info("Pipeline mode: fetching and appending in parallel")
+            if self.workers > 1:
+                work = self._run_parallel(batches, folder, dest_folder, progress_bar)
+            else:
+                work = self._run_batches(batches, folder, dest_folder, progress_bar)
+            
+            processed = set()
+            for batch, outcomes in work:
+                if self._fatal_errors and not any(outcomes.values()):
+                    # Batches given up after a fatal error are counted below
+                    continue
+                processed.update(batch)
                 try:
-                    # Update progress
-                    self._update_progress(progress_bar, idx, len(untransferred_uids),
-                                        uid, "transferring")
-                    
-                    # Transfer single message
-                    success = self._transfer_single_message(uid, folder, dest_folder, progress_bar)
+                    for uid in batch:
+                        outcome = outcomes.get(uid, False)
+                        if outcome:
+                            transferred += 1
+                        elif outcome is None:
+                            # Larger than the manifest said, found only after download
+                            skipped_by_size += 1
+                            pending_uids.add(uid)
+                        else:
+                            failed += 1
+                            pending_uids.add(uid)
+                            error_msg = f"UID {uid}: Transfer failed"
+                            errors.append(error_msg)
                     
-                    if success:
-                        transferred += 1
-                        # Get message size from cache for statistics
-                        try:
-                            stats = self.cache_manager.get_statistics(folder)
-                            total_size = stats.get('total_size', 0)
-                        except Exception as e:
-                            self.logger.warning(f"Failed to get statistics from cache: {str(e)}")
-                    else:
-                        failed += 1
-                        error_msg = f"UID {uid}: Transfer failed"
-                        errors.append(error_msg)
+                    if any(outcomes.values()):
+                        progress_bar.set_postfix_str(
+                            self.cache_manager.statistics.folder(folder).describe(), refresh=False
+                        )
                         
                 except KeyboardInterrupt:
                     # Re-raise keyboard interrupt to allow graceful shutdown
-                    self.logger.warning(f"Transfer interrupted at message UID {uid}")
+                    self.logger.warning(f"Transfer interrupted in batch starting at UID {batch[0]}")
                     raise
                 except Exception as e:
-                    # Handle unexpected errors gracefully - don't crash, continue with next message
-                    failed += 1
-                    error_msg = f"UID {uid}: Unexpected error - {str(e)}"
+                    # Handle unexpected errors gracefully - don't crash, continue with next batch
+                    failed += len(batch)
+                    pending_uids.update(batch)
+                    error_msg = f"UIDs {batch[0]}-{batch[-1]}: Unexpected error - {str(e)}"
                     self.logger.error(error_msg, exc_info=True)
                     errors.append(error_msg)
-                    # Continue with next message
+                    # Continue with next batch
                     continue
             
+            if self._fatal_errors:
+                remaining = [uid for uid in untransferred_uids if uid not in processed]
+                failed += len(remaining)
+                pending_uids.update(remaining)
+                error_msg = (
+                    f"Transfer stopped after fatal error, {len(remaining)} messages "
+                    f"not transferred: {self._fatal_errors[0]}"
+                )
+                self.logger.error(error_msg)
+                errors.append(error_msg)
+            
             # Close progress bar
             progress_bar.close()
             
+            # Folder totals from the running statistics, including earlier runs
+            folder_stats = self.cache_manager.folder_statistics(folder)
+            total_size = folder_stats.stored_bytes
+            
+            # Remember how far this folder is complete for the next run
+            self._advance_watermark(folder, source_uids, pending_uids)
+            
             # Calculate duration
             duration = time.time() - start_time
             
             # Log summary
             self.logger.info(
                 f"Transfer complete: {transferred} transferred, "
-                f"{skipped} skipped, {failed} failed "
-                f"in {duration:.1f} seconds"
+                f"{skipped} skipped, {skipped_by_size} skipped by size, {failed} failed "
+                f"in {duration:.1f} seconds ({folder_stats.describe()})"
             )
+            if self._binary_saved:
+                self.logger.info(
+                    f"Binary transfer saved {format_size(self._binary_saved)} compared to RFC822"
+                )
+            if self._reconnects:
+                self.logger.info(f"Reconnected {self._reconnects} times after connection loss")
+            if self.controller:
+                self.logger.info(f"Adaptive settings after this folder: {self.controller.describe()}")
             
             # Log final error summary
             if errors:
@@ -385,7 +1969,13 @@ class TransferEngine:
                 failed=failed,
                 total_size=total_size,
                 duration_seconds=duration,
-                errors=errors
+                errors=errors,
+                skipped_by_size=skipped_by_size,
+                flags_updated=flags_updated,
+                expunged=expunged,
+                binary_bytes_saved=self._binary_saved,
+                reconnects=self._reconnects,
+                bytes_transferred=folder_stats.transferred_bytes
             )
             
         except KeyboardInterrupt:
@@ -398,6 +1988,10 @@ class TransferEngine:
             self.logger.error(error_msg, exc_info=True)
             errors.append(error_msg)
             
+            folder_stats = self.cache_manager.statistics.folder(folder)
+            if transferred:
+                total_size = folder_stats.stored_bytes
+            
             return TransferResult(
                 total_messages=total_messages,
                 transferred=transferred,
@@ -405,5 +1999,71 @@ class TransferEngine:
                 failed=failed,
                 total_size=total_size,
                 duration_seconds=duration,
-                errors=errors
+                errors=errors,
+                skipped_by_size=skipped_by_size,
+                flags_updated=flags_updated,
+                expunged=expunged,
+                binary_bytes_saved=self._binary_saved,
+                reconnects=self._reconnects,
+                bytes_transferred=folder_stats.transferred_bytes if transferred else 0
+            )
+    
+    def follow_folder(self, folder: str, dest_folder_override: Optional[str] = None,
+                      poll_interval: int = 60) -> None:
+        """
+        Keep transferring changes of a folder until interrupted
+        Waits with IDLE on the source connection when the server supports
+        it, otherwise polls the folder with STATUS every poll_interval
+        seconds. Each change triggers an incremental transfer_folder() run,
+        which only looks at UIDs above the watermark and at changes since
+        the stored HIGHESTMODSEQ. A connection lost while waiting is
+        re-established and followed by a transfer run, since changes may
+        have been missed in the meantime.
+        
+        Args:
+            folder: Source folder name (selected on the source client)
+            dest_folder_override: Optional destination folder name
+            poll_interval: Seconds between STATUS polls when IDLE is not available
+        
+        Raises:
+            IMAPConnectionError: If a lost connection cannot be re-established
+        """
+        use_idle = self.source_client.has_capability('IDLE')
+        if use_idle:
+            self.logger.info(f"Follow mode: waiting for changes in '{folder}' with IDLE")
+        else:
+            self.logger.info(
+                f"Follow mode: server lacks IDLE, polling '{folder}' with STATUS every {poll_interval} seconds"
+            )
+        
+        last_status = None if use_idle else self.source_client.folder_status([folder]).get(folder)
+        
+        while True:
+            try:
+                if use_idle:
+                    changed = self.source_client.idle()
+                else:
+                    time.sleep(poll_interval)
+                    status = self.source_client.folder_status([folder]).get(folder)
+                    changed = status != last_status
+                    last_status = status
+                
+                if not changed:
+                    # Keep the otherwise unused destination connection alive
+                    self.dest_client.noop()
+                    continue
+            except (IMAPConnectionError, IMAPFolderError) as e:
+                reconnected = self.source_pool.ensure_healthy(self.source_client)
+                reconnected = self.dest_pool.ensure_healthy(self.dest_client) or reconnected
+                if not reconnected:
+                    raise
+                self.logger.warning(f"Follow mode: connection lost and re-established: {str(e)}")
+            
+            # Refresh UIDVALIDITY and HIGHESTMODSEQ before the incremental run
+            self.source_client.select_folder(folder)
+            result = self.transfer_folder(folder, dest_folder_override)
+            
+            self.logger.info(
+                f"Follow mode: {result.transferred} transferred, {result.flags_updated} flags updated, "
+                f"{result.expunged} expunged, {result.failed} failed"
             )
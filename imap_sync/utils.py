@@ -3,9 +3,13 @@ Utilities Module
 Helper functions and classes
 """
 
+import asyncio
+import random
 import time
 import re
-from typing import Callable, Any
+import threading
+from collections import deque
+from typing import Callable, Any, List, Optional, NamedTuple, BinaryIO, Iterator
 from datetime import datetime
 
 
@@ -35,13 +39,150 @@ class IMAPAppendError(IMAPTransferError):
     pass
 
 
+class IMAPAppendRejected(IMAPAppendError):
+    """Exception raised when the server answered an append with NO or BAD, so nothing was stored"""
+    pass
+
+
+class IMAPStoreError(IMAPTransferError):
+    """Exception raised for IMAP flag update and expunge failures"""
+    pass
+
+
 class ConfigValidationError(IMAPTransferError):
     """Exception raised for configuration validation failures"""
     pass
 
 
+class ManifestEntry(NamedTuple):
+    """Metadata of one source message, known without downloading its body"""
+    uid: str
+    size: int
+    internal_date: str
+    flags: List[str]
+
+
+# Chunk size for writing spooled messages to disk and reading them back
+SPOOL_CHUNK_SIZE = 1048576
+
+
+class SpooledMessage:
+    """
+    Message data kept in an anonymous temporary file instead of memory
+    Large messages are streamed from the source literal to disk and sent to
+    the destination from there in chunks, so memory use does not grow with
+    message size. Supports len() and truth testing like bytes.
+    """
+    
+    def __init__(self, file: BinaryIO, size: int):
+        """
+        Wrap a temporary file holding a complete message
+        
+        Args:
+            file: Binary file containing the message data
+            size: Message size in bytes
+        """
+        self.file = file
+        self.size = size
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    def __bool__(self) -> bool:
+        return self.size > 0
+    
+    def chunks(self, chunk_size: int = SPOOL_CHUNK_SIZE) -> Iterator[memoryview]:
+        """
+        Read the message back from the start in chunks
+        
+        Args:
+            chunk_size: Maximum chunk size in bytes
+        
+        Yields:
+            Views of one reused buffer, each valid until the next chunk is read
+        
+        Raises:
+            IOError: If the file is shorter than the message size
+        """
+        view = memoryview(bytearray(min(chunk_size, max(self.size, 1))))
+        remaining = self.size
+        self.file.seek(0)
+        
+        while remaining:
+            count = self.file.readinto(view[:min(remaining, len(view))])
+            if not count:
+                raise IOError(f"Spooled message truncated, {remaining} bytes missing")
+            remaining -= count
+            yield view[:count]
+    
+    def close(self) -> None:
+        """Close and thereby delete the temporary file"""
+        self.file.close()
+
+
+# Error classes assigned by classify_error()
+ERROR_TRANSIENT = 'transient'  # Network trouble, retried soon
+ERROR_THROTTLED = 'throttled'  # Server asks to slow down, retried after a longer pause
+ERROR_PERMANENT = 'permanent'  # This message or request will never succeed, not retried
+ERROR_FATAL = 'fatal'  # The session cannot continue (login, quota, UIDVALIDITY), not retried
+
+# Response codes (RFC 5530 and common server extensions) by error class
+FATAL_RESPONSE_CODES = {
+    'AUTHENTICATIONFAILED', 'AUTHORIZATIONFAILED', 'EXPIRED', 'PRIVACYREQUIRED',
+    'CONTACTADMIN', 'NOPERM', 'OVERQUOTA'
+}
+THROTTLE_RESPONSE_CODES = {'THROTTLED', 'UNAVAILABLE', 'INUSE'}
+PERMANENT_RESPONSE_CODES = {
+    'TOOBIG', 'UNKNOWN-CTE', 'PARSE', 'CANNOT', 'LIMIT', 'NONEXISTENT',
+    'TRYCREATE', 'CORRUPTION', 'BADCHARSET', 'CLIENTBUG'
+}
+
+RESPONSE_CODE = re.compile(r'\[([A-Z][A-Z0-9-]*)[\] ]')
+FATAL_TEXT = re.compile(r'UIDVALIDITY .*changed|authentication failed', re.IGNORECASE)
+THROTTLE_TEXT = re.compile(r'throttl|rate.?limit|too many|exceeded .*limit|try again later', re.IGNORECASE)
+PERMANENT_TEXT = re.compile(r'command error: BAD|may not exist|empty message data', re.IGNORECASE)
+
+# Upper limit for a single retry pause in seconds
+MAX_BACKOFF = 300
+
+# Throttled operations wait this many times longer than transient failures
+THROTTLE_BACKOFF_FACTOR = 4
+
+
 # Utility Functions
 
+def classify_error(error: BaseException) -> str:
+    """
+    Decide how a failed operation should be retried
+    Server response codes (e.g. [TOOBIG], [THROTTLED]) take precedence over
+    the wording of the message; errors that match nothing, such as lost
+    connections and timeouts, count as transient.
+    
+    Args:
+        error: Exception raised by the operation
+    
+    Returns:
+        One of ERROR_TRANSIENT, ERROR_THROTTLED, ERROR_PERMANENT, ERROR_FATAL
+    """
+    text = str(error)
+    codes = set(RESPONSE_CODE.findall(text.upper()))
+    
+    if codes & FATAL_RESPONSE_CODES:
+        return ERROR_FATAL
+    if codes & THROTTLE_RESPONSE_CODES:
+        return ERROR_THROTTLED
+    if codes & PERMANENT_RESPONSE_CODES:
+        return ERROR_PERMANENT
+    if FATAL_TEXT.search(text):
+        return ERROR_FATAL
+    if THROTTLE_TEXT.search(text):
+        return ERROR_THROTTLED
+    if PERMANENT_TEXT.search(text):
+        return ERROR_PERMANENT
+    
+    return ERROR_TRANSIENT
+
+
 def format_size(bytes: int) -> str:
     """
     Convert bytes to human-readable format (KB, MB, GB)
@@ -99,6 +240,83 @@ def parse_imap_date(date_str: str) -> str:
     return datetime.now().strftime("%d-%b-%Y %H:%M:%S %z")
 
 
+def compress_uid_set(uids: List[str]) -> str:
+    """
+    Build a compact IMAP sequence set from a list of UIDs
+    Consecutive UIDs are collapsed into ranges (e.g. "1:5,7,9:12")
+    
+    Args:
+        uids: List of UID strings
+    
+    Returns:
+        IMAP sequence set string, empty string if no UIDs given
+    """
+    numbers = sorted(set(int(uid) for uid in uids))
+    
+    if not numbers:
+        return ''
+    
+    ranges = []
+    start = previous = numbers[0]
+    
+    for number in numbers[1:]:
+        if number == previous + 1:
+            previous = number
+            continue
+        ranges.append(f"{start}:{previous}" if start != previous else str(start))
+        start = previous = number
+    
+    ranges.append(f"{start}:{previous}" if start != previous else str(start))
+    
+    return ','.join(ranges)
+
+
+def expand_uid_set(uid_set: str) -> List[str]:
+    """
+    Expand an IMAP sequence set (e.g. "5:7,9") into individual UIDs
+    Order is preserved, which matters for APPENDUID responses to MULTIAPPEND
+    
+    Args:
+        uid_set: IMAP sequence set without '*'
+    
+    Returns:
+        List of UID strings
+    
+    Raises:
+        ValueError: If the set contains non-numeric values
+    """
+    uids = []
+    
+    for part in uid_set.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if ':' in part:
+            start, end = (int(value) for value in part.split(':', 1))
+            step = 1 if end >= start else -1
+            uids.extend(str(uid) for uid in range(start, end + step, step))
+        else:
+            uids.append(str(int(part)))
+    
+    return uids
+
+
+def parse_message_id(header: bytes) -> Optional[str]:
+    """
+    Find the Message-ID in message headers
+    
+    Args:
+        header: Raw header lines (the start of a message is enough)
+    
+    Returns:
+        Message-ID including angle brackets, None if there is none
+    """
+    # Header values may be folded onto continuation lines
+    header = re.sub(rb'\r?\n[ \t]+', b' ', header.split(b'\r\n\r\n', 1)[0])
+    match = re.search(rb'^Message-ID:\s*(\S+)', header, re.IGNORECASE | re.MULTILINE)
+    return match.group(1).decode('utf-8', errors='replace') if match else None
+
+
 def sanitize_folder_name(folder: str) -> str:
     """
     Clean and sanitize folder names for IMAP compatibility
@@ -132,9 +350,93 @@ def sanitize_folder_name(folder: str) -> str:
     return folder
 
 
+class CircuitBreaker:
+    """
+    Pauses all retried operations on one server after repeated throttling
+    After `threshold` throttled responses in a row the breaker opens: every
+    operation that checks it waits until the pause is over instead of
+    adding to the server's load. Each further trip doubles the pause (up to
+    MAX_BACKOFF); a successful operation resets it. Thread-safe, so workers
+    sharing a server can share one breaker.
+    """
+    
+    def __init__(self, name: str, threshold: int = 3, cooldown: float = 60.0, logger=None):
+        """
+        Initialize circuit breaker
+        
+        Args:
+            name: Server name used in log messages
+            threshold: Consecutive throttled responses that open the breaker
+            cooldown: Pause in seconds after the first trip
+            logger: Optional logger for pause warnings
+        """
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.logger = logger
+        self._throttled = 0
+        self._trips = 0
+        self._open_until = 0.0
+        self.throttle_count = 0  # Throttled responses seen in total
+        self._lock = threading.Lock()
+    
+    def record_success(self) -> None:
+        """Reset the breaker after an operation succeeded"""
+        with self._lock:
+            self._throttled = 0
+            self._trips = 0
+    
+    def record_throttle(self) -> None:
+        """Count a throttled response, opening the breaker at the threshold"""
+        with self._lock:
+            self.throttle_count += 1
+            self._throttled += 1
+            if self._throttled < self.threshold:
+                return
+            self._throttled = 0
+            pause = min(self.cooldown * (2 ** self._trips), MAX_BACKOFF)
+            self._trips += 1
+            self._open_until = max(self._open_until, time.monotonic() + pause)
+        
+        if self.logger:
+            self.logger.warning(
+                f"{self.name} throttled {self.threshold} requests in a row, "
+                f"pausing requests to it for {pause:.0f} seconds"
+            )
+    
+    def remaining(self) -> float:
+        """
+        Seconds until the breaker closes again
+        
+        Returns:
+            Remaining pause, 0 when requests may proceed
+        """
+        with self._lock:
+            return max(self._open_until - time.monotonic(), 0.0)
+    
+    def wait(self) -> None:
+        """Block while the breaker is open"""
+        pause = self.remaining()
+        while pause > 0:
+            time.sleep(pause)
+            pause = self.remaining()
+    
+    async def wait_async(self) -> None:
+        """Wait without blocking the event loop while the breaker is open"""
+        pause = self.remaining()
+        while pause > 0:
+            await asyncio.sleep(pause)
+            pause = self.remaining()
+
+
 class RetryHandler:
     """
-    Retry handler with exponential backoff for network operations
+    Retry handler with error classification and jittered exponential backoff
+    Transient errors (lost connections, timeouts) are retried after
+    delay, 2*delay, 4*delay... seconds; throttling responses wait
+    THROTTLE_BACKOFF_FACTOR times longer and are reported to the server's
+    circuit breaker; permanent and fatal errors are raised at once. Every
+    pause is randomized by +/-50% so parallel workers do not retry in lockstep.
     """
     
     def __init__(self, max_retries: int = 3, delay: int = 5, logger=None):
@@ -150,49 +452,206 @@ class RetryHandler:
         self.delay = delay
         self.logger = logger
     
-    def execute(self, func: Callable, *args, **kwargs) -> Any:
+    def _backoff(self, attempt: int, error_class: str) -> float:
+        """
+        Pause before the next attempt
+        
+        Args:
+            attempt: Number of the failed attempt, starting at 0
+            error_class: Class of the error as returned by classify_error()
+        
+        Returns:
+            Wait time in seconds
+        """
+        wait_time = self.delay * (2 ** attempt)
+        if error_class == ERROR_THROTTLED:
+            wait_time *= THROTTLE_BACKOFF_FACTOR
+        return min(wait_time, MAX_BACKOFF) * random.uniform(0.5, 1.5)
+    
+    def _handle_failure(self, error: Exception, attempt: int,
+                        circuit_breaker: Optional[CircuitBreaker]) -> Optional[float]:
+        """
+        Classify a failed attempt and decide whether to try again
+        
+        Args:
+            error: Exception raised by the attempt
+            attempt: Number of the failed attempt, starting at 0
+            circuit_breaker: Breaker of the server the operation talks to
+        
+        Returns:
+            Seconds to wait before the next attempt, or None to give up
+        """
+        error_class = classify_error(error)
+        
+        if error_class == ERROR_THROTTLED and circuit_breaker:
+            circuit_breaker.record_throttle()
+        
+        if error_class in (ERROR_PERMANENT, ERROR_FATAL):
+            if self.logger:
+                self.logger.error(f"Not retrying {error_class} error: {str(error)}")
+            return None
+        
+        if attempt >= self.max_retries - 1:
+            if self.logger:
+                self.logger.error(
+                    f"All {self.max_retries} attempts failed. Last error: {str(error)}"
+                )
+            return None
+        
+        wait_time = self._backoff(attempt, error_class)
+        if self.logger:
+            self.logger.warning(
+                f"Attempt {attempt + 1}/{self.max_retries} failed ({error_class}): {str(error)}. "
+                f"Retrying in {wait_time:.1f} seconds..."
+            )
+        return wait_time
+    
+    def execute(self, func: Callable, *args,
+                circuit_breaker: Optional[CircuitBreaker] = None, **kwargs) -> Any:
         """
         Execute function with retry logic and exponential backoff
         
         Args:
             func: Function to execute
             *args: Positional arguments for the function
+            circuit_breaker: Breaker of the server the function talks to;
+                attempts wait while it is open and throttling is reported to it
             **kwargs: Keyword arguments for the function
             
         Returns:
             Result of the function call
             
         Raises:
-            Last exception if all retries fail
+            Last exception if all retries fail, or the first permanent or fatal one
         """
-        last_exception = None
+        for attempt in range(self.max_retries):
+            if circuit_breaker:
+                circuit_breaker.wait()
+            
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                wait_time = self._handle_failure(e, attempt, circuit_breaker)
+                if wait_time is None:
+                    raise
+                time.sleep(wait_time)
+                continue
+            
+            if circuit_breaker:
+                circuit_breaker.record_success()
+            return result
+    
+    async def execute_async(self, func: Callable, *args,
+                            circuit_breaker: Optional[CircuitBreaker] = None, **kwargs) -> Any:
+        """
+        Await coroutine function with retry logic and exponential backoff
+        Same policy as execute(), but waits without blocking the event loop
+        
+        Args:
+            func: Coroutine function to execute
+            *args: Positional arguments for the function
+            circuit_breaker: Breaker of the server the function talks to
+            **kwargs: Keyword arguments for the function
         
+        Returns:
+            Result of the awaited call
+        
+        Raises:
+            Last exception if all retries fail, or the first permanent or fatal one
+        """
         for attempt in range(self.max_retries):
+            if circuit_breaker:
+                await circuit_breaker.wait_async()
+            
             try:
-                return func(*args, **kwargs)
+                result = await func(*args, **kwargs)
             except Exception as e:
-                last_exception = e
-                
-                if attempt < self.max_retries - 1:
-                    # Calculate exponential backoff delay
-                    wait_time = self.delay * (2 ** attempt)
-                    
-                    # Log retry warning
-                    if self.logger:
-                        self.logger.warning(
-                            f"Attempt {attempt + 1}/{self.max_retries} failed: {str(e)}. "
-                            f"Retrying in {wait_time} seconds..."
-                        )
-                    
-                    time.sleep(wait_time)
-                else:
-                    # Last attempt failed, log error and raise
-                    if self.logger:
-                        self.logger.error(
-                            f"All {self.max_retries} attempts failed. Last error: {str(e)}"
-                        )
-                    raise last_exception
-        
-        # Should not reach here, but raise last exception if it does
-        if last_exception:
-            raise last_exception
+                wait_time = self._handle_failure(e, attempt, circuit_breaker)
+                if wait_time is None:
+                    raise
+                await asyncio.sleep(wait_time)
+                continue
+            
+            if circuit_breaker:
+                circuit_breaker.record_success()
+            return result
+
+
+class ByteBoundedQueue:
+    """
+    Thread-safe FIFO queue bounded by the total size of its items in bytes
+    Used to hand fetched messages from the fetch stage to the append stage
+    without letting memory use grow with the backlog
+    """
+    
+    def __init__(self, max_bytes: int):
+        """
+        Initialize queue
+        
+        Args:
+            max_bytes: Maximum total size of queued items in bytes.
+                An item larger than the limit is still accepted when the
+                queue is empty, so oversized items cannot deadlock
+        """
+        self.max_bytes = max_bytes
+        self._items = deque()
+        self._bytes = 0
+        self._closed = False
+        self._condition = threading.Condition()
+    
+    def put(self, item: Any, size: int) -> bool:
+        """
+        Add item to queue, blocking while the byte limit would be exceeded
+        
+        Args:
+            item: Item to queue
+            size: Item size in bytes
+        
+        Returns:
+            True if item was queued, False if queue was closed
+        """
+        with self._condition:
+            while (not self._closed and self._items and
+                   self._bytes + size > self.max_bytes):
+                self._condition.wait()
+            
+            if self._closed:
+                return False
+            
+            self._items.append((item, size))
+            self._bytes += size
+            self._condition.notify_all()
+            return True
+    
+    def get(self) -> Optional[Any]:
+        """
+        Remove and return the oldest item, blocking while queue is empty
+        
+        Returns:
+            Oldest item, or None once the queue is closed and drained
+        """
+        with self._condition:
+            while not self._items and not self._closed:
+                self._condition.wait()
+            
+            if not self._items:
+                return None
+            
+            item, size = self._items.popleft()
+            self._bytes -= size
+            self._condition.notify_all()
+            return item
+    
+    def close(self) -> None:
+        """
+        Close queue: pending put() calls return False, get() drains remaining items
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+    
+    @property
+    def queued_bytes(self) -> int:
+        """Total size of queued items in bytes"""
+        with self._condition:
+            return self._bytes
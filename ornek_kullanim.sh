@@ -90,7 +90,7 @@ echo "   → transfer_cache.db  (SQLite veritabanı)"
 echo "   → transfer.log       (Detaylı log)"
 echo ""
 echo "✅ Cache'i sıfırlamak için:"
-echo "   rm transfer_cache.db"
+echo "   rm transfer_cache.db transfer_cache.db-wal transfer_cache.db-shm"
 echo ""
 echo ""
 
@@ -97,6 +97,10 @@ echo DEST_HOST=%DEST_HOST%
 echo DEST_USER=%DEST_USER%
 echo DEST_PASS=%DEST_PASS%
 echo MAX_MESSAGE_SIZE=%MAX_MESSAGE_SIZE%
+echo MAX_RATE=0
+echo SOURCE_MAX_RATE=0
+echo DEST_MAX_RATE=0
+echo BANDWIDTH_SCHEDULE=
 ) > "%config_file%"
 
 echo ✓ İş kaydedildi!
@@ -169,7 +173,11 @@ if not exist "%config_file%" (
     goto MAIN_MENU
 )
 
-REM Config'i yükle
+REM Config'i yükle (önceki işin bant genişliği ayarları taşınmasın)
+set "MAX_RATE="
+set "SOURCE_MAX_RATE="
+set "DEST_MAX_RATE="
+set "BANDWIDTH_SCHEDULE="
 for /f "tokens=1,* delims==" %%a in ('type "%config_file%"') do set "%%a=%%b"
 
 set "cache_file=%CACHES_DIR%\%SELECTED_JOB%.db"
@@ -201,8 +209,16 @@ pause
 REM Varsayılan değer
 if "%MAX_MESSAGE_SIZE%"=="" set "MAX_MESSAGE_SIZE=52428800"
 
+REM Bant genişliği sınırları (config'de 0 veya boş = sınırsız)
+if defined BANDWIDTH_SCHEDULE set "BANDWIDTH_SCHEDULE=%BANDWIDTH_SCHEDULE:"=%"
+set "BW_ARGS="
+if defined MAX_RATE if not "%MAX_RATE:"=%"=="0" set "BW_ARGS=%BW_ARGS% --max-rate %MAX_RATE:"=%"
+if defined SOURCE_MAX_RATE if not "%SOURCE_MAX_RATE:"=%"=="0" set "BW_ARGS=%BW_ARGS% --source-max-rate %SOURCE_MAX_RATE:"=%"
+if defined DEST_MAX_RATE if not "%DEST_MAX_RATE:"=%"=="0" set "BW_ARGS=%BW_ARGS% --dest-max-rate %DEST_MAX_RATE:"=%"
+if defined BANDWIDTH_SCHEDULE set "BW_ARGS=%BW_ARGS% --bandwidth-schedule "%BANDWIDTH_SCHEDULE%""
+
 REM Transfer'i başlat
-python -m imap_sync.main --source-host "%SOURCE_HOST%" --source-user "%SOURCE_USER%" --source-password "%SOURCE_PASS%" --dest-host "%DEST_HOST%" --dest-user "%DEST_USER%" --dest-password "%DEST_PASS%" --cache-db "%cache_file%" --log-file "%log_file%" --max-message-size "%MAX_MESSAGE_SIZE%" --auto-mode
+python -m imap_sync.main --source-host "%SOURCE_HOST%" --source-user "%SOURCE_USER%" --source-password "%SOURCE_PASS%" --dest-host "%DEST_HOST%" --dest-user "%DEST_USER%" --dest-password "%DEST_PASS%" --cache-db "%cache_file%" --log-file "%log_file%" --max-message-size "%MAX_MESSAGE_SIZE%"%BW_ARGS% --auto-mode
 
 echo.
 if %ERRORLEVEL%==0 (
@@ -40,6 +40,7 @@ show_job_details() {
     local config_file="$CONFIGS_DIR/${job_id}.conf"
     
     if [ -f "$config_file" ]; then
+        unset MAX_RATE SOURCE_MAX_RATE DEST_MAX_RATE BANDWIDTH_SCHEDULE
         source "$config_file"
         
         local cache_file="$CACHES_DIR/${job_id}.db"
@@ -54,6 +55,13 @@ show_job_details() {
             echo -e "${BLUE}📏 Max boyut:${NC} ${size_mb} MB"
         fi
         
+        # Bant genişliği sınırı
+        if [ -n "$BANDWIDTH_SCHEDULE" ]; then
+            echo -e "${BLUE}🚦 Bant genişliği:${NC} $BANDWIDTH_SCHEDULE"
+        elif [ "${MAX_RATE:-0}" != "0" ]; then
+            echo -e "${BLUE}🚦 Bant genişliği:${NC} $((MAX_RATE / 1024)) KB/s"
+        fi
+        
         if [ -f "$cache_file" ]; then
             local count=$(sqlite3 "$cache_file" "SELECT COUNT(*) FROM transferred_messages;" 2>/dev/null || echo "0")
             echo -e "${GREEN}✓ Transfer edilen:${NC} $count mesaj"
@@ -124,6 +132,23 @@ create_new_job() {
     echo -e "${GREEN}✓ Maksimum mesaj boyutu: $((MAX_MESSAGE_SIZE / 1024 / 1024)) MB${NC}"
     echo ""
     
+    # Bant genişliği ayarı
+    echo -e "${YELLOW}Bant genişliği sınırı (sunucuları yormamak için):${NC}"
+    read -p "Toplam hız sınırı MB/s (Enter=sınırsız): " rate_mb
+    if [[ "$rate_mb" =~ ^[0-9]+$ ]]; then
+        MAX_RATE=$((rate_mb * 1024 * 1024))
+    else
+        MAX_RATE=0
+    fi
+    read -p "Zaman çizelgesi JSON dosyası (Enter=yok): " BANDWIDTH_SCHEDULE
+    
+    if [ -n "$BANDWIDTH_SCHEDULE" ]; then
+        echo -e "${GREEN}✓ Bant genişliği: $BANDWIDTH_SCHEDULE (saate göre)${NC}"
+    elif [ "$MAX_RATE" != "0" ]; then
+        echo -e "${GREEN}✓ Bant genişliği: ${rate_mb} MB/s${NC}"
+    fi
+    echo ""
+    
     # İş ID'si oluştur (kaynak_hedef formatında)
     local source_clean=$(echo "$SOURCE_USER" | tr '@.' '_')
     local dest_clean=$(echo "$DEST_USER" | tr '@.' '_')
@@ -139,6 +164,10 @@ DEST_HOST="$DEST_HOST"
 DEST_USER="$DEST_USER"
 DEST_PASS="$DEST_PASS"
 MAX_MESSAGE_SIZE="$MAX_MESSAGE_SIZE"
+MAX_RATE="$MAX_RATE"
+SOURCE_MAX_RATE="0"
+DEST_MAX_RATE="0"
+BANDWIDTH_SCHEDULE="$BANDWIDTH_SCHEDULE"
 CREATED_AT="$(date '+%Y-%m-%d %H:%M:%S')"
 EOF
     
@@ -199,6 +228,7 @@ start_job() {
     fi
     
     # Config'i yükle
+    unset MAX_RATE SOURCE_MAX_RATE DEST_MAX_RATE BANDWIDTH_SCHEDULE
     source "$config_file"
     
     # Dosya yolları
@@ -237,6 +267,13 @@ start_job() {
     # Varsayılan değerler
     MAX_MESSAGE_SIZE=${MAX_MESSAGE_SIZE:-52428800}  # Varsayılan 50MB
     
+    # Bant genişliği sınırları (config'de 0 veya boş = sınırsız)
+    local bandwidth_args=()
+    [ "${MAX_RATE:-0}" != "0" ] && bandwidth_args+=(--max-rate "$MAX_RATE")
+    [ "${SOURCE_MAX_RATE:-0}" != "0" ] && bandwidth_args+=(--source-max-rate "$SOURCE_MAX_RATE")
+    [ "${DEST_MAX_RATE:-0}" != "0" ] && bandwidth_args+=(--dest-max-rate "$DEST_MAX_RATE")
+    [ -n "$BANDWIDTH_SCHEDULE" ] && bandwidth_args+=(--bandwidth-schedule "$BANDWIDTH_SCHEDULE")
+    
     # Transfer'i başlat
     python3 -m imap_sync.main \
         --source-host "$SOURCE_HOST" \
@@ -246,6 +283,7 @@ start_job() {
         --cache-db "$cache_file" \
         --log-file "$log_file" \
         --max-message-size "$MAX_MESSAGE_SIZE" \
+        "${bandwidth_args[@]}" \
         --auto-mode
     
     local exit_code=$?